@@ -1,4 +1,5 @@
 #include <WiFi.h>
+#include <WiFiUdp.h>
 #include <ESP32Servo.h>
 #include <Wire.h>
 #include <U8g2lib.h>
@@ -18,6 +19,7 @@ static const char* password = WIFI_PASS;
 
 static const uint16_t SERVER_PORT = 12345;   // must match your GUI
 WiFiServer server(SERVER_PORT);
+WiFiUDP udp;   // same port number, one binary frame per datagram
 
 // ================================================================
 // Servos / Pins (KEEP OR CHANGE TO MATCH YOUR BOARD)
@@ -65,7 +67,7 @@ static const uint32_t GESTURE_PRESS_MS = 1000; // 120–250 recommended
 // ================================================================
 // OLED / Status variables
 // ================================================================
-String lastCmd = "-";
+char lastCmd[24] = "-";
 String lastGestureInfo = "-";
 
 int s5_now = G_HOME_5;
@@ -142,6 +144,161 @@ bool parseRL(const String& data, int& outR, int& outL) {
   return true;
 }
 
+// ================================================================
+// Binary command frames (negotiated with "HELLO BIN2 BIN1" -> "OK BIN<n>" ->
+// "USE BIN<n>", see protocol.py)
+//   v1: 0 version | 1 flags | 2-3 seq (LE) | 4 L | 5 R | 6 reserved | 7 crc8
+//   v2: same + 7-10 t_us (LE) | 11 crc8, answered with an ack:
+//   ack: 0 0xAC | 1-2 seq | 3-6 t_us (echo) | 7 crc8
+// ================================================================
+static const uint8_t FRAME_V1 = 1;
+static const uint8_t FRAME_V2 = 2;
+static const size_t  FRAME_MAX = 12;
+static const uint8_t ACK_MAGIC = 0xAC;
+static const size_t  ACK_SIZE = 8;
+static const uint8_t FLAG_GESTURE_A = 0x01;
+static const uint8_t FLAG_GESTURE_B = 0x02;
+
+static inline size_t frameSize(uint8_t version) {
+  return version == FRAME_V1 ? 8 : (version == FRAME_V2 ? 12 : 0);
+}
+
+uint8_t crc8(const uint8_t* data, size_t n) {
+  uint8_t c = 0;
+  for (size_t i = 0; i < n; i++) {
+    c ^= data[i];
+    for (uint8_t k = 0; k < 8; k++) {
+      c = (c & 0x80) ? (uint8_t)((c << 1) ^ 0x07) : (uint8_t)(c << 1);
+    }
+  }
+  return c;
+}
+
+struct FrameReader {
+  uint8_t buf[FRAME_MAX];
+  size_t n = 0;
+  uint16_t lastSeq = 0;
+  bool haveSeq = false;
+  uint32_t crcErrors = 0;
+  uint32_t staleFrames = 0;
+
+  void reset() { n = 0; haveSeq = false; }
+
+  // true when buf holds a complete, valid, newer frame
+  bool push(uint8_t b) {
+    if (n == 0 && frameSize(b) == 0) return false;  // resync
+    buf[n++] = b;
+    const size_t size = frameSize(buf[0]);
+    if (n < size) return false;
+
+    if (crc8(buf, size - 1) != buf[size - 1]) {
+      crcErrors++;
+      // keep whatever follows the next version byte
+      size_t i = 1;
+      while (i < size && frameSize(buf[i]) == 0) i++;
+      n = size - i;
+      memmove(buf, buf + i, n);
+      return false;
+    }
+    n = 0;
+
+    uint16_t seq = (uint16_t)buf[2] | ((uint16_t)buf[3] << 8);
+    if (haveSeq && (int16_t)(seq - lastSeq) <= 0) {
+      staleFrames++;
+      return false;
+    }
+    lastSeq = seq;
+    haveSeq = true;
+    return true;
+  }
+};
+
+FrameReader frameReader;
+
+void sendAck(WiFiClient& client, const uint8_t* f) {
+  uint8_t ack[ACK_SIZE];
+  ack[0] = ACK_MAGIC;
+  ack[1] = f[2];                 // seq
+  ack[2] = f[3];
+  memcpy(ack + 3, f + 7, 4);     // t_us echo
+  ack[7] = crc8(ack, ACK_SIZE - 1);
+  client.write(ack, ACK_SIZE);
+}
+
+// ================================================================
+// UDP: latest-wins frames. The GUI resends the current state with the
+// same seq, so duplicates are acked but not re-applied (no second press);
+// older seqs are dropped. A new sender endpoint restarts seq tracking.
+// ================================================================
+IPAddress udpPeerIP;
+uint16_t udpPeerPort = 0;
+uint16_t udpLastSeq = 0;
+bool udpHaveSeq = false;
+uint32_t udpLastMs = 0;
+uint32_t udpStale = 0;
+
+void serviceUdp() {
+  int len;
+  while ((len = udp.parsePacket()) > 0) {
+    uint8_t f[FRAME_MAX];
+    if (len > (int)FRAME_MAX) {
+      udp.flush();
+      continue;
+    }
+    udp.read(f, len);
+
+    const size_t size = frameSize(f[0]);
+    if (size == 0 || (size_t)len != size || crc8(f, size - 1) != f[size - 1]) continue;
+
+    const uint32_t now = millis();
+    if (udp.remoteIP() != udpPeerIP || udp.remotePort() != udpPeerPort ||
+        now - udpLastMs > 2000) {
+      udpPeerIP = udp.remoteIP();
+      udpPeerPort = udp.remotePort();
+      udpHaveSeq = false;
+    }
+    udpLastMs = now;
+
+    const uint16_t seq = (uint16_t)f[2] | ((uint16_t)f[3] << 8);
+    const int16_t d = (int16_t)(seq - udpLastSeq);
+    if (!udpHaveSeq || d > 0) {
+      udpLastSeq = seq;
+      udpHaveSeq = true;
+      applyFrame(f);
+    } else if (d < 0) {
+      udpStale++;
+      continue;
+    }
+
+    if (f[0] == FRAME_V2) {
+      uint8_t ack[ACK_SIZE];
+      ack[0] = ACK_MAGIC;
+      ack[1] = f[2];
+      ack[2] = f[3];
+      memcpy(ack + 3, f + 7, 4);
+      ack[7] = crc8(ack, ACK_SIZE - 1);
+      udp.beginPacket(udpPeerIP, udpPeerPort);
+      udp.write(ack, ACK_SIZE);
+      udp.endPacket();
+    }
+  }
+}
+
+// "HELLO BIN2 BIN1" -> first offered version we speak, 0 = text
+uint8_t pickFrameVersion(const String& hello) {
+  int from = 5;
+  while (from < (int)hello.length()) {
+    int sp = hello.indexOf(' ', from + 1);
+    if (sp < 0) sp = hello.length();
+    String tok = hello.substring(from, sp);
+    tok.trim();
+    if (tok == "BIN2") return FRAME_V2;
+    if (tok == "BIN1") return FRAME_V1;
+    from = sp;
+  }
+  return 0;
+}
+
 // ================================================================
 // Non-blocking gesture sequencer (no delay())
 // ================================================================
@@ -176,12 +333,9 @@ GestureSequencer gseq;
 // A,A -> press each time it appears
 // B,B -> press on BOTH edges (enter and exit)
 // ================================================================
-void handleGestureCommand(const String& cmd) {
+void handleGesture(bool isA, bool isB) {
   static bool lastB = false;
 
-  const bool isA = (cmd == "A,A");
-  const bool isB = (cmd == "B,B");
-
   // OLED info (simple)
   if (isA) lastGestureInfo = "A";
   else if (isB) lastGestureInfo = "B";
@@ -208,6 +362,27 @@ void handleGestureCommand(const String& cmd) {
   lastB = isB;
 }
 
+void handleGestureCommand(const String& cmd) {
+  handleGesture(cmd == "A,A", cmd == "B,B");
+}
+
+void applyFrame(const uint8_t* f) {
+  const bool isA = f[1] & FLAG_GESTURE_A;
+  const bool isB = f[1] & FLAG_GESTURE_B;
+  const int gL = f[4];
+  const int gR = f[5];
+
+  if (isA)      strcpy(lastCmd, "A,A");
+  else if (isB) strcpy(lastCmd, "B,B");
+  else          snprintf(lastCmd, sizeof(lastCmd), "R%d,L%d", gR, gL);
+  pktCount++;
+  lastPktMs = millis();
+
+  handleGesture(isA, isB);
+  if (gL != 0) applyLeftGesture(gL);
+  if (gR != 0) applyRightGesture(gR);
+}
+
 // ================================================================
 // OLED dashboard (single screen)
 // ================================================================
@@ -229,7 +404,7 @@ void drawOLED() {
   String guiLine = String("GUI: ") + (guiConnected ? "ON " : "OFF") + " " + String(pktRate) + "/s";
   oled.drawStr(0, 30, guiLine.c_str());
 
-  String cmdLine = "CMD: " + lastCmd;
+  String cmdLine = "CMD: " + String(lastCmd);
   oled.drawStr(0, 40, cmdLine.c_str());
 
   String gestLine = "GEST: " + lastGestureInfo;
@@ -302,6 +477,7 @@ void setup() {
   }
 
   server.begin();
+  udp.begin(SERVER_PORT);
   drawOLED();
 }
 
@@ -325,6 +501,7 @@ void loop() {
   // keep press sequencer alive
   serviceUI();
   gseq.update();
+  serviceUdp();
 
   WiFiClient client = server.available();
   if (!client) {
@@ -336,21 +513,58 @@ void loop() {
   guiConnected = true;
   drawOLED();
 
+  bool binMode = false;
+  uint8_t offeredVersion = 0;   // answered "OK BIN<n>", waiting for "USE BIN<n>"
+  frameReader.reset();
+
   while (client.connected()) {
     serviceUI();
     gseq.update();
+    serviceUdp();
 
     if (!client.available()) {
       delay(1);
       continue;
     }
 
+    // binary frames: fixed size, no heap, no line scanning
+    if (binMode) {
+      while (client.available()) {
+        if (frameReader.push((uint8_t)client.read())) {
+          applyFrame(frameReader.buf);
+          if (frameReader.buf[0] == FRAME_V2) sendAck(client, frameReader.buf);
+        }
+      }
+      continue;
+    }
+
     String data = client.readStringUntil('\n');
     data.trim();
     if (data.length() == 0) continue;
 
+    // protocol negotiation (old GUIs never send this -> text forever)
+    if (data.startsWith("HELLO")) {
+      offeredVersion = pickFrameVersion(data);
+      if (offeredVersion == 0) {
+        client.print("OK TEXT\n");
+        continue;
+      }
+      client.print(offeredVersion == FRAME_V2 ? "OK BIN2\n" : "OK BIN1\n");
+      continue;
+    }
+
+    // frames only after the GUI confirms: a GUI whose hello timed out
+    // (late answer on a busy link) keeps sending text and we keep reading it
+    if (offeredVersion != 0 &&
+        data == (offeredVersion == FRAME_V2 ? "USE BIN2" : "USE BIN1")) {
+      binMode = true;
+      frameReader.reset();
+      continue;
+    }
+
     // stats
-    lastCmd = data;
+    strncpy(lastCmd, data.c_str(), sizeof(lastCmd) - 1);
+    lastCmd[sizeof(lastCmd) - 1] = '\0';
     pktCount++;
     lastPktMs = millis();
 
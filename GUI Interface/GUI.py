@@ -1,52 +1,174 @@
-import cv2
-import socket
 import time
+_T_LAUNCH = time.perf_counter()     # origen del informe de arranque
+
+import cv2
+import numpy as np
 import threading
-from tkinter import *
-from PIL import Image, ImageTk
-import mediapipe as mp
 import os
+import sys
+import argparse
+from contextlib import ExitStack
 
 import traceback
 
+from esp32_link import LinkState
+from link_pool import LinkPool, parse_targets
+from frame_ring import FrameRing
+from capture import CameraCapture, CaptureConfig
+from pose_worker import PoseWorker
+from roi_tracker import RoiPose, RoiTracker
+from inference_governor import LEVELS, GovernedPose, InferenceGovernor
+from pose_features import N_FEATURES, compute_features, landmarks_of
+from body_classifier import BodyClassifier, NO_POSE_COMMANDS, OUTPUTS
+from pose_recording import PoseRecorder
+from preview import PreviewRenderer
+from overlay import SkeletonOverlay
+from startup_profile import StartupProfile
+from metrics import REGISTRY, serve_metrics
+from latency_trace import FrameTrace, LatencyTracer
+from hotlog import LOG, install_excepthook
+
 import warnings
 warnings.filterwarnings("ignore", message="SymbolDatabase.GetPrototype.*", category=UserWarning)
 
+# Fases del arranque en frio (imports, Tk, camara, grafo, warm-up, calibracion)
+startup = StartupProfile(_T_LAUNCH)
+startup.add("imports", _T_LAUNCH, time.perf_counter())
+
 # ================================================================
 # CONFIG SERVIDOR ESP32
 # ================================================================
 #ESP32_IP = "192.168.10.175" #Old IP
 #ESP32_IP = "192.168.10.106"
-ESP32_IP = "192.168.10.140"
-PORT = 12345
+ESP32_IP = os.environ.get("ESP32_IP", "192.168.10.140")
+PORT = int(os.environ.get("ESP32_PORT", "12345"))
+
+# Varios avatares con la misma pose: ESP32_ROBOTS="ip[:puerto],ip[:puerto],..."
+# (por defecto solo ESP32_IP:ESP32_PORT). La inferencia corre una sola vez.
+ESP32_ROBOTS = parse_targets(os.environ.get("ESP32_ROBOTS", f"{ESP32_IP}:{PORT}"), PORT)
+
+# "tcp" (por defecto) o "udp" (latest-wins, sin bloqueo por paquetes perdidos)
+ESP32_TRANSPORT = os.environ.get("ESP32_TRANSPORT", "tcp")
+
+# Espera de la respuesta al HELLO (s); sin respuesta, texto hasta reconectar
+ESP32_HELLO_TIMEOUT = float(os.environ.get("ESP32_HELLO_TIMEOUT", "1.0"))
+
+# Latencia camara -> servo por segmentos (histogramas en /metrics);
+# LATENCY_TRACE=archivo.json guarda ademas una traza para chrome://tracing
+LATENCY_TRACE = os.environ.get("LATENCY_TRACE", "")
+tracer = LatencyTracer(path=LATENCY_TRACE or None)
+
+# Un LinkManager por robot, cada uno con su event loop, reconexion y cola
+# latest-wins: una placa lenta no frena a las demas (ver link_pool.py)
+link = LinkPool(ESP32_ROBOTS, transport=ESP32_TRANSPORT, tracer=tracer,
+                hello_timeout=ESP32_HELLO_TIMEOUT)
+
+# ================================================================
+# CONFIG CAMARA (CAMERA_INDEX=1 para la cámara externa, etc.)
+# ================================================================
+CAMERA = CaptureConfig.from_env(
+    os.environ,
+    device=0,          # 0 = built-in, 1 = external
+    width=640,
+    height=360,
+    fps=30,
+    fourcc="MJPG",     # "MJPG" / "YUYV" / None (driver default)
+    buffer_size=1,     # 1 = always the newest frame
+)
+
+# Inferencia en un proceso aparte (memoria compartida): POSE_WORKER=1 para activar
+USE_POSE_WORKER = os.environ.get("POSE_WORKER", "0") == "1"
+
+# Inferencia sobre un recorte alrededor del cuerpo: POSE_ROI=1 para activar
+USE_POSE_ROI = os.environ.get("POSE_ROI", "0") == "1"
+POSE_ROI_SIZE = int(os.environ.get("POSE_ROI_SIZE", "256"))   # lado del recorte (px)
+
+# Calidad adaptativa (complejidad del modelo + resolucion) segun el tiempo de
+# inferencia: POSE_GOVERNOR=0 para volver a complejidad 0 fija
+USE_POSE_GOVERNOR = os.environ.get("POSE_GOVERNOR", "1") == "1"
+POSE_TARGET_FPS = float(os.environ.get("POSE_TARGET_FPS", str(CAMERA.fps or 30)))
+
+# Grabar la sesion (landmarks + estado + codigos) para reproducirla con
+# pose_recording.py: POSE_RECORD=archivo.posrec o una carpeta
+POSE_RECORD = os.environ.get("POSE_RECORD", "")
+
+# Suavizado de yaw/lean/roll: ema (por frame, original), time_ema, one_euro,
+# kalman; POSE_LEAD_MS extrapola (one_euro / kalman)
+POSE_SMOOTHER = os.environ.get("POSE_SMOOTHER", "ema")
+POSE_LEAD_MS = float(os.environ.get("POSE_LEAD_MS", "0"))
+
+# Cargar y calentar el modelo en segundo plano al arrancar, mientras el modo
+# manual ya funciona: POSE_PRELOAD=0 para cargarlo solo al activar la camara
+POSE_PRELOAD = os.environ.get("POSE_PRELOAD", "1") == "1"
+
+# Metricas por etapa en http://METRICS_HOST:METRICS_PORT/metrics (formato
+# Prometheus; METRICS_PORT=0 sin servidor). STATS_PANEL=1 las muestra en la ventana
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+SHOW_STATS_PANEL = os.environ.get("STATS_PANEL", "0") == "1"
+
+# Vista previa: FPS maximo del dibujo (independiente del control; 0 = sin limite)
+PREVIEW_FPS = float(os.environ.get("PREVIEW_FPS", "20"))
+# Ancho de la vista previa en px (0 = resolucion de la camara); el esqueleto
+# se dibuja a esta resolucion
+PREVIEW_WIDTH = int(os.environ.get("PREVIEW_WIDTH", "0"))
 
 # ================================================================
 # VARIABLES GLOBALES
 # ================================================================
-latest_frame = None
+# Ring de frames preasignado: ids de frame + timestamp de captura, sin copias
+frame_ring = FrameRing(slots=4)
+pose_governor = None        # InferenceGovernor activo (lo lee update_gui)
 running = True
 
+# Metricas: cada una la escribe un solo hilo (el de su etapa), sin locks
+m_captured = REGISTRY.counter("eva_camera_frames_total", "Frames read from the camera")
+m_read_failures = REGISTRY.counter("eva_camera_read_failures_total", "Failed camera reads")
+REGISTRY.gauge("eva_camera_frames_dropped_total", "Frames with no free ring slot",
+               fn=lambda: frame_ring.dropped, kind="counter")
+m_processed = REGISTRY.counter("eva_pose_frames_total", "Frames run through pose inference")
+m_skipped = REGISTRY.counter("eva_pose_frames_skipped_total",
+                             "Camera frames replaced before pose inference saw them")
+m_no_pose = REGISTRY.counter("eva_pose_missing_total", "Processed frames without a pose")
+m_convert_ms = REGISTRY.histogram("eva_convert_ms", "BGR to RGB conversion (ms)")
+m_pose_ms = REGISTRY.histogram("eva_pose_ms", "pose.process() (ms)")
+m_classify_ms = REGISTRY.histogram("eva_classify_ms", "Features + classifier step (ms)")
+m_overlay_ms = REGISTRY.histogram("eva_overlay_ms", "Preview overlay drawing (ms)")
+m_gui_tick_ms = REGISTRY.histogram("eva_gui_tick_ms", "update_gui() tick (ms)")
+REGISTRY.gauge("eva_pose_level", "Inference governor level (-1 = fixed)",
+               fn=lambda: pose_governor.level if pose_governor is not None else -1)
+
 # GESTOS INDEPENDIENTES
 latest_left_code = "1"
 latest_left_name = "Quieto"
 latest_right_code = "1"
 latest_right_name = "Quieto"
 
-client = None
-connected = False
 manual_mode = True
-connection_in_progress = False
 
-frame_lock = threading.Lock()
 gesture_lock = threading.Lock()
 landmark_lock = threading.Lock()
 
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
+def set_commands(left=None, right=None, trace=None):
+    """
+    Single write point for the outgoing commands.
+    left / right: (code, name) tuples; None keeps that side as is.
+    trace: the FrameTrace of the camera frame behind them (camera mode).
+    Publishing wakes the link sender immediately.
+    """
+    global latest_left_code, latest_left_name
+    global latest_right_code, latest_right_name
+    with gesture_lock:
+        if left is not None:
+            latest_left_code, latest_left_name = left
+        if right is not None:
+            latest_right_code, latest_right_name = right
+        link.publish(latest_left_code, latest_right_code, trace)
 
-# Últimos landmarks detectados (para dibujar en la vista)
+# Últimos landmarks detectados, array (33, 4) (para dibujar en la vista)
 latest_pose_landmarks = None
+# Estado del clasificador para la vista ("NEUTRAL", "TURN_L", "A", ...)
+latest_body_state = "MANUAL"
 
 # FREEZE SYSTEM (para evitar falsos positivos cruzados)
 freeze_left = False
@@ -60,7 +182,9 @@ def request_calibration():
     global calibration_requested
     with calibration_lock:
         calibration_requested = True
-    print("[BodyControl] Calibration requested")
+    LOG.info("BodyControl", "Calibration requested")
+
+
 
 
 # ================================================================
@@ -78,616 +202,158 @@ button_bg       = "#1b1828"
 button_border   = neon_purple
 
 # ================================================================
-# TKINTER UI
+# ESTADO (GUI y modo headless)
 # ================================================================
-root = Tk()
-root.title("EVA-01 REMOTE LINK")
-root.configure(bg=bg_color)
-
-main_frame = Frame(root, bg=bg_color)
-main_frame.pack(padx=20, pady=20)
-
-# --- prevent layout resizing when content changes ---
-main_frame.pack_propagate(False)
-
-# ------------------ CAMARA ------------------
-camera_border = Frame(main_frame, bg=neon_purple, bd=4, relief="solid")
-camera_border.grid(row=0, column=0, padx=20)
-
-camera_label = Label(camera_border, bg="black")
-camera_label.pack()
-
-# ------------------ PANEL CONTROL ------------------
-control_frame = Frame(
-    main_frame, padx=20, pady=20,
-    bg=panel_color, bd=4, relief="solid",
-    highlightbackground=neon_green, highlightthickness=2
-)
-control_frame.grid(row=0, column=1, sticky="n")
-
-Label(
-    control_frame,
-    text="EVA CONTROL PANEL",
-    font=("Consolas", 18, "bold"),
-    fg=neon_orange,
-    bg=panel_color
-).grid(row=0, column=0, columnspan=3, pady=(0, 5))
-
-Label(
-    control_frame,
-    text="SYSTEM STATUS: NORMAL",
-    font=("Consolas", 10, "bold"),
-    fg=neon_green,
-    bg=panel_color
-).grid(row=1, column=0, columnspan=3, pady=(0, 10))
+def robot_rtt(lk):
+    if lk.frame_version == 2:
+        return lk.rtt.snapshot().summary()
+    if lk.state is LinkState.ONLINE:
+        return f"RTT: n/a ({lk.mode} link, no acks)"
+    return "RTT: --"
+
+def link_status():
+    """(level, link text, RTT text) for the status displays; level is
+    "online" (every robot), "reconnecting" or "offline"."""
+    online, total = link.online, len(link)
+    if online == total:
+        level = "online"
+    elif link.wanted:
+        level = "reconnecting"
+    else:
+        level = "offline"
+
+    if total == 1:
+        return level, f"LINK: {level.upper()}", robot_rtt(link.links[0])
+
+    text = f"LINKS: {online}/{total} ONLINE"
+    rtts = []
+    for lk in link:
+        p50 = lk.rtt.snapshot().p50 if lk.frame_version == 2 else None
+        if lk.state is not LinkState.ONLINE:
+            rtts.append(f"{lk.name} {lk.state.value}")
+        elif p50 is not None:
+            rtts.append(f"{lk.name} {p50:.1f}")
+        else:
+            rtts.append(f"{lk.name} n/a")          # no acks (text / v1)
+    return level, text, "RTT p50 ms: " + " | ".join(rtts)
+
+def log_status():
+    """One status line, the headless stand-in for the control panel."""
+    _, link_text, rtt_text = link_status()
+    parts = [link_text, rtt_text]
+    if pose_governor is not None:
+        parts.append(pose_governor.describe())
+    parts.append(tracer.describe())
+    with gesture_lock:
+        parts.append(f"L: {latest_left_name} ({latest_left_code}) | "
+                     f"R: {latest_right_name} ({latest_right_code})")
+    parts.append(f"STATE: {'MANUAL' if manual_mode else latest_body_state}")
+    LOG.info("STATUS", "{}", " | ".join(parts))
 
-# ================================================================
-# Button Calibration (in control panel)
-# ================================================================
-btn_calibrate = Button(
-    control_frame,
-    text="CALIBRAR (BASELINE)",
-    command=request_calibration,
-    width=18,
-    bg=button_bg,
-    fg=neon_orange,
-    font=("Consolas", 11, "bold"),
-    highlightbackground=neon_orange,
-    highlightthickness=2,
-    bd=0
-)
-# Place it under the connect/status row
-btn_calibrate.grid(row=7, column=0, columnspan=3, pady=(5, 10))
 
 # ================================================================
-# MODO MANUAL
+# MODO MANUAL / CAMARA
 # ================================================================
-manual_var = BooleanVar(value=True)
-
 def force_neutral():
-    global latest_left_code, latest_left_name
-    global latest_right_code, latest_right_name
+    set_commands(("1", "Neutral"), ("1", "Neutral"))
 
-    with gesture_lock:
-        latest_left_code  = "1"
-        latest_left_name  = "Neutral"
-        latest_right_code = "1"
-        latest_right_name = "Neutral"
-
-def toggle_manual():
+def set_manual_mode(value):
     global manual_mode
-    manual_mode = manual_var.get()
+    manual_mode = bool(value)
 
     # Always force a neutral command when switching modes
     force_neutral()
 
     if manual_mode:
-        print("[MODE] Switched to MANUAL → sending NEUTRAL")
+        LOG.info("MODE", "Switched to MANUAL → sending NEUTRAL")
     else:
-        print("[MODE] Switched to CAMERA → sending NEUTRAL")
-
-manual_check = Checkbutton(
-    control_frame,
-    text="Modo manual (No envia gestos automaticos)",
-    variable=manual_var,
-    command=toggle_manual,
-    fg=neon_green,
-    bg=panel_color,
-    selectcolor=panel_color,
-    font=("Consolas", 11),
-    activebackground=panel_color,
-    activeforeground=neon_green
-)
-manual_check.grid(row=2, column=0, columnspan=3, pady=10)
-
-# ================================================================
-# FUNCION AUXILIAR PARA BOTONES
-# ================================================================
-def make_dpad_button(parent, text):
-    return Button(
-        parent,
-        text=text,
-        width=8,
-        height=1,
-        bg=button_bg,
-        fg=neon_purple,
-        activebackground="#261b3a",
-        activeforeground=neon_blue,
-        highlightbackground=button_border,
-        highlightthickness=2,
-        bd=0,
-        font=("Consolas", 10, "bold"),
-        relief="flat"
-    )
-
-# ================================================================
-# PANEL MOVIMIENTOS LINEALES (SERVOS 1 y 2)
-# ================================================================
-lineal_frame = Frame(control_frame, bg=panel_color)
-lineal_frame.grid(row=3, column=0, columnspan=3, pady=(5, 10))
-
-Label(
-    lineal_frame,
-    text="MOVIMIENTOS LINEALES (Servos 1 y 2)",
-    font=("Consolas", 11, "bold"),
-    fg=neon_blue,
-    bg=panel_color
-).grid(row=0, column=0, columnspan=3, pady=(0, 5))
-
-def set_left_manual(code, name):
-    global latest_left_code, latest_left_name
-    if not manual_mode:
-        return
-    with gesture_lock:
-        latest_left_code = code
-        latest_left_name = name
-
-def reset_left(event=None):
-    global latest_left_code, latest_left_name
-    if not manual_mode:
-        return
-    with gesture_lock:
-        latest_left_code = "1"
-        latest_left_name = "Quieto"
-
-btn_lin_up     = make_dpad_button(lineal_frame, "ADELANTE")
-btn_lin_left   = make_dpad_button(lineal_frame, "IZQ")
-btn_lin_center = make_dpad_button(lineal_frame, "QUIETO")
-btn_lin_right  = make_dpad_button(lineal_frame, "DER")
-btn_lin_down   = make_dpad_button(lineal_frame, "ATRAS")
-
-btn_lin_up.grid(row=1, column=1)
-btn_lin_left.grid(row=2, column=0)
-btn_lin_center.grid(row=2, column=1)
-btn_lin_right.grid(row=2, column=2)
-btn_lin_down.grid(row=3, column=1)
-
-btn_lin_up.bind("<ButtonPress-1>",   lambda e: set_left_manual("2", "Adelante"))
-btn_lin_left.bind("<ButtonPress-1>", lambda e: set_left_manual("3", "Izquierda"))
-btn_lin_right.bind("<ButtonPress-1>",lambda e: set_left_manual("4", "Derecha"))
-btn_lin_down.bind("<ButtonPress-1>", lambda e: set_left_manual("5", "Atras"))
-btn_lin_center.bind("<ButtonPress-1>", lambda e: set_left_manual("1", "Quieto"))
-
-btn_lin_up.bind("<ButtonRelease-1>",     reset_left)
-btn_lin_left.bind("<ButtonRelease-1>",   reset_left)
-btn_lin_right.bind("<ButtonRelease-1>",  reset_left)
-btn_lin_down.bind("<ButtonRelease-1>",   reset_left)
-btn_lin_center.bind("<ButtonRelease-1>", reset_left)
-
-# ================================================================
-# BOTONES ESPECIALES: GESTO A y GESTO B
-# ================================================================
-Label(
-    lineal_frame,
-    text="GESTOS ESPECIALES",
-    font=("Consolas", 11, "bold"),
-    fg=neon_orange,
-    bg=panel_color
-).grid(row=4, column=0, columnspan=3, pady=(10, 5))
-
-def set_gesto_A(event=None):
-    if not manual_mode:
-        return
-    with gesture_lock:
-        global latest_left_code, latest_left_name, latest_right_code, latest_right_name
-        latest_left_code  = "A"
-        latest_left_name  = "Gesto A"
-        latest_right_code = "A"
-        latest_right_name = "Gesto A"
-
-def set_gesto_B(event=None):
-    if not manual_mode:
-        return
-    with gesture_lock:
-        global latest_left_code, latest_left_name, latest_right_code, latest_right_name
-        latest_left_code  = "B"
-        latest_left_name  = "Gesto B"
-        latest_right_code = "B"
-        latest_right_name = "Gesto B"
-
-def reset_gestos(event=None):
-    if not manual_mode:
-        return
-    with gesture_lock:
-        global latest_left_code, latest_left_name, latest_right_code, latest_right_name
-        latest_left_code  = "1"
-        latest_left_name  = "Quieto"
-        latest_right_code = "1"
-        latest_right_name = "Quieto"
-
-btn_gestoA = make_dpad_button(lineal_frame, "GESTO A")
-btn_gestoB = make_dpad_button(lineal_frame, "GESTO B")
-
-btn_gestoA.grid(row=5, column=0, pady=5)
-btn_gestoB.grid(row=5, column=2, pady=5)
-
-btn_gestoA.bind("<ButtonPress-1>", set_gesto_A)
-btn_gestoA.bind("<ButtonRelease-1>", reset_gestos)
-btn_gestoB.bind("<ButtonPress-1>", set_gesto_B)
-btn_gestoB.bind("<ButtonRelease-1>", reset_gestos)
-
-# ================================================================
-# PANEL ROTACIONES (SERVOS 3 y 4)
-# ================================================================
-rot_frame = Frame(control_frame, bg=panel_color)
-rot_frame.grid(row=4, column=0, columnspan=3, pady=(5, 10))
-
-Label(
-    rot_frame,
-    text="ROTACIONES (Servos 3 y 4)",
-    font=("Consolas", 11, "bold"),
-    fg=neon_green,
-    bg=panel_color
-).grid(row=0, column=0, columnspan=3)
-
-def set_right_manual(code, name):
-    global latest_right_code, latest_right_name
-    if not manual_mode:
-        return
-    with gesture_lock:
-        latest_right_code = code
-        latest_right_name = name
-
-def reset_right(event=None):
-    global latest_right_code, latest_right_name
-    if not manual_mode:
-        return
-    with gesture_lock:
-        latest_right_code = "1"
-        latest_right_name = "Quieto"
-
-btn_rot_up     = make_dpad_button(rot_frame, "ARRIBA")
-btn_rot_left   = make_dpad_button(rot_frame, "IZQ")
-btn_rot_center = make_dpad_button(rot_frame, "QUIETO")
-btn_rot_right  = make_dpad_button(rot_frame, "DER")
-btn_rot_down   = make_dpad_button(rot_frame, "ABAJO")
-
-btn_rot_up.grid(row=1, column=1)
-btn_rot_left.grid(row=2, column=0)
-btn_rot_center.grid(row=2, column=1)
-btn_rot_right.grid(row=2, column=2)
-btn_rot_down.grid(row=3, column=1)
-
-btn_rot_up.bind("<ButtonPress-1>",    lambda e: set_right_manual("2", "Arriba"))
-btn_rot_left.bind("<ButtonPress-1>",  lambda e: set_right_manual("3", "Izquierda"))
-btn_rot_right.bind("<ButtonPress-1>", lambda e: set_right_manual("4", "Derecha"))
-btn_rot_down.bind("<ButtonPress-1>",  lambda e: set_right_manual("5", "Abajo"))
-btn_rot_center.bind("<ButtonPress-1>",lambda e: set_right_manual("1", "Quieto"))
-
-btn_rot_up.bind("<ButtonRelease-1>",     reset_right)
-btn_rot_left.bind("<ButtonRelease-1>",   reset_right)
-btn_rot_right.bind("<ButtonRelease-1>",  reset_right)
-btn_rot_down.bind("<ButtonRelease-1>",   reset_right)
-btn_rot_center.bind("<ButtonRelease-1>", reset_right)
-
-# ================================================================
-# RETROALIMENTACION
-# ================================================================
-feedback_label = Label(
-    control_frame,
-    text="Brazo izq: Quieto | Brazo der: Quieto [Auto]",
-    font=("Consolas", 12),
-    fg=neon_blue,
-    bg=panel_color,
-    justify="left",
-    width=60,
-    anchor="w"
-)
-feedback_label.grid(row=5, column=0, columnspan=3, pady=10)
-
-# ================================================================
-# ESTADO DE CONEXION
-# ================================================================
-status_frame = Frame(control_frame, bg=panel_color)
-status_frame.grid(row=6, column=0, columnspan=3, pady=10)
-
-status_light = Label(status_frame, text="●", font=("Consolas", 22),
-                     fg=neon_red, bg=panel_color)
-status_light.grid(row=0, column=0)
-
-status_text = Label(status_frame, text="LINK: OFFLINE",
-                    font=("Consolas", 12, "bold"),
-                    fg=text_color, bg=panel_color)
-status_text.grid(row=0, column=1, padx=10)
-
-btn_connect = Button(
-    status_frame,
-    text="CONECTAR",
-    width=12,
-    bg=button_bg,
-    fg=neon_blue,
-    font=("Consolas", 11, "bold"),
-    highlightbackground=neon_blue,
-    highlightthickness=2,
-    bd=0
-)
-btn_connect.grid(row=0, column=2, padx=10)
-
-# ================================================================
-# TUTORIAL EN DOS COLUMNAS (INCLUYE GESTO A Y B)
-# ================================================================
-# tutorial_container = Frame(main_frame, bg=bg_color)
-# tutorial_container.grid(row=1, column=0, columnspan=2, pady=(20, 0), sticky="nsew")
-
-# canvas = Canvas(tutorial_container, bg=bg_color, highlightthickness=0)
-# scrollbar = Scrollbar(tutorial_container, orient="vertical", command=canvas.yview)
-# canvas.configure(yscrollcommand=scrollbar.set)
-
-# scrollbar.pack(side="right", fill="y")
-# canvas.pack(side="left", fill="both", expand=True)
-
-# scroll_frame = Frame(canvas, bg=bg_color)
-# canvas.create_window((0, 0), window=scroll_frame, anchor="nw")
-
-# tutorial_images = []
-
-# def load_tutorial_images():
-#     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-#     figuras = [
-#         ("fig1_quieto.png",   "Izq: Quieto",
-#          "Brazo izquierdo relajado hacia abajo.",
-#          "fig6_quietoR.png",  "Der: Quieto",
-#          "Brazo derecho relajado hacia abajo."),
-
-#         ("fig2_izquierda.png","Izq: Izquierda",
-#          "Extiende el brazo izquierdo hacia la izquierda.",
-#          "fig7_izquierdaR.png","Der: Izquierda",
-#          "Cruza brazo derecho hacia la izquierda."),
-
-#         ("fig3_derecha.png",  "Izq: Derecha",
-#          "Cruza el brazo izquierdo hacia la derecha.",
-#          "fig8_derechaR.png", "Der: Derecha",
-#          "Extiende brazo derecho hacia la derecha."),
-
-#         ("fig4_adelante.png", "Izq: Adelante",
-#          "Levanta brazo izquierdo al frente.",
-#          "fig9_arribaR.png",  "Der: Arriba",
-#          "Levanta el brazo derecho completamente hacia arriba."),
-
-#         ("fig5_atras.png",    "Izq: Atras",
-#          "Lleva brazo izquierdo hacia tu espalda o hombro.",
-#          "fig10_abajoR.png",  "Der: Abajo",
-#          "Lleva brazo derecho hacia atrás o cintura."),
-
-#         # Gesto A y Gesto B
-#         ("fig11_gestoA.png",  "Gesto A",
-#          "Alce ambos brazos para ejecutar el Gesto A.",
-#          "fig12_gestoB.png",  "Gesto B",
-#          "Retraiga ambos brazos hacia el cuerpo de forma que las manos casi toquen los hombros.")
-#     ]
-
-#     Label(
-#         scroll_frame,
-#         text="TUTORIAL DE POSTURAS — EVA LINK",
-#         font=("Consolas", 17, "bold"),
-#         fg=neon_orange,
-#         bg=bg_color
-#     ).grid(row=0, column=0, columnspan=2, pady=(0, 20))
-
-#     row = 1
-#     for izq_img, izq_title, izq_desc, der_img, der_title, der_desc in figuras:
-
-#         cardL = Frame(scroll_frame, bg=panel_color, bd=2,
-#                       highlightbackground=neon_purple, highlightthickness=2)
-#         cardL.grid(row=row, column=0, padx=20, pady=10, sticky="n")
-
-#         try:
-#             imgL = cv2.imread(os.path.join(BASE_DIR, izq_img))
-#             imgL = cv2.resize(imgL, (220, 220))
-#             imgL = cv2.cvtColor(imgL, cv2.COLOR_BGR2RGB)
-#             imgL = ImageTk.PhotoImage(Image.fromarray(imgL))
-#             tutorial_images.append(imgL)
-#             Label(cardL, image=imgL, bg=panel_color).pack(pady=(10, 5))
-#         except:
-#             Label(cardL, text=f"[No {izq_img}]", fg=neon_red, bg=panel_color).pack()
-
-#         Label(cardL, text=izq_title, font=("Consolas", 13, "bold"),
-#               fg=neon_blue, bg=panel_color).pack()
-#         Label(cardL, text=izq_desc, wraplength=230, justify="left",
-#               font=("Consolas", 11), fg=text_color, bg=panel_color).pack(pady=(0, 10))
-
-#         cardR = Frame(scroll_frame, bg=panel_color, bd=2,
-#                       highlightbackground=neon_purple, highlightthickness=2)
-#         cardR.grid(row=row, column=1, padx=20, pady=10, sticky="n")
-
-#         try:
-#             imgR = cv2.imread(os.path.join(BASE_DIR, der_img))
-#             imgR = cv2.resize(imgR, (220, 220))
-#             imgR = cv2.cvtColor(imgR, cv2.COLOR_BGR2RGB)
-#             imgR = ImageTk.PhotoImage(Image.fromarray(imgR))
-#             tutorial_images.append(imgR)
-#             Label(cardR, image=imgR, bg=panel_color).pack(pady=(10, 5))
-#         except:
-#             Label(cardR, text=f"[No {der_img}]", fg=neon_red, bg=panel_color).pack()
-
-#         Label(cardR, text=der_title, font=("Consolas", 13, "bold"),
-#               fg=neon_blue, bg=panel_color).pack()
-#         Label(cardR, text=der_desc, wraplength=230, justify="left",
-#               font=("Consolas", 11), fg=text_color, bg=panel_color).pack(pady=(0, 10))
-
-#         row += 1
-
-#     scroll_frame.update_idletasks()
-#     canvas.config(scrollregion=canvas.bbox("all"))
-
-# load_tutorial_images()
+        LOG.info("MODE", "Switched to CAMERA → sending NEUTRAL")
 
 # ================================================================
 # CONEXIÓN CON ESP32
 # ================================================================
-def connect_worker():
-    global client, connected, connection_in_progress
-
-    connection_in_progress = True
-    print("[CONNECT] Starting connection attempts...")
-
-    for i in range(30):
-        try:
-            c = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            c.settimeout(2)  # a bit more generous
-            c.connect((ESP32_IP, PORT))
-            c.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-
-            c.settimeout(None)
-
-            client = c
-            connected = True
-            print(f"[CONNECT] Connected to ESP32 on attempt {i+1}")
-            break
-        except Exception as e:
-            connected = False
-            print(f"[CONNECT] Attempt {i+1} failed:", e)
-            time.sleep(0.5)
-    else:
-        print("[CONNECT] Failed to connect after 30 attempts")
-
-    connection_in_progress = False
+def on_link_event(ev):
+    lk = ev.link
+    if ev.state is LinkState.ONLINE:
+        LOG.info("CONNECT", "Connected to {} ({}:{}, {} protocol)", lk.name, lk.host, lk.port, lk.mode)
+    elif ev.state is LinkState.BACKOFF:
+        LOG.info("CONNECT", "{} attempt {} failed: {} (retry in {:.2f}s)",
+                 lk.name, ev.attempt, ev.error, ev.delay)
+    elif ev.state is LinkState.OFFLINE:
+        LOG.info("CONNECT", "{} link offline", lk.name)
+
+link.add_listener(on_link_event)
+
+REGISTRY.gauge("eva_link_sends_total", "Commands written to the ESP32 links",
+               fn=lambda: link.sends, kind="counter")
+REGISTRY.gauge("eva_link_send_errors_total", "Failed link writes",
+               fn=lambda: link.send_errors, kind="counter")
+REGISTRY.gauge("eva_link_online", "ESP32 links currently online",
+               fn=lambda: link.online)
+if len(link) > 1:
+    for _lk in link:
+        REGISTRY.gauge(f'eva_robot_online{{robot="{_lk.name}"}}', "1 while this robot's link is online",
+                       fn=lambda lk=_lk: int(lk.state is LinkState.ONLINE))
+    for _lk in link:
+        REGISTRY.gauge(f'eva_robot_sends_total{{robot="{_lk.name}"}}', "Commands written to this robot",
+                       fn=lambda lk=_lk: lk.sends, kind="counter")
+    for _lk in link:
+        REGISTRY.gauge(f'eva_robot_send_errors_total{{robot="{_lk.name}"}}', "Failed writes to this robot",
+                       fn=lambda lk=_lk: lk.send_errors, kind="counter")
 
 
 def toggle_connection():
-    global client, connected, connection_in_progress
-
-    # If already connected: disconnect
-    if connected:
-        print("[CONNECT] Closing connection")
-        try:
-            client.close()
-        except:
-            pass
-        client = None
-        connected = False
+    # If a link is wanted (online or retrying): disconnect
+    if link.wanted:
+        LOG.info("CONNECT", "Closing connection")
+        link.disconnect()
         return
 
-    # Avoid starting multiple simultaneous connection threads
-    if connection_in_progress:
-        print("[CONNECT] Connection already in progress")
-        return
+    LOG.info("CONNECT", "Starting connection attempts...")
+    link.connect()
 
-    # Start background thread for connection attempts
-    threading.Thread(target=connect_worker, daemon=True).start()
-
-
-btn_connect.config(command=toggle_connection)
-
-# ================================================================
-# HILO ENVÍO Y RECIBIDO
-# ================================================================
-def communication_thread():
-    global client, connected, running
-    global latest_left_code, latest_right_code
-
-    prev_L = None
-    prev_R = None
-    was_connected = False
-
-    HEARTBEAT_INTERVAL = 0.5  # seconds
-    last_send = 0.0
-
-    while running:
-        if connected and client:
-            try:
-                with gesture_lock:
-                    L = latest_left_code
-                    R = latest_right_code
-
-                # Only send if:
-                #  - connection just became active, or
-                #  - the command changed
-                if (not was_connected) or (L != prev_L) or (R != prev_R):
-                    if L == "A" and R == "A":
-                        msg = "A,A\n"
-                    elif L == "B" and R == "B":
-                        msg = "B,B\n"
-                    else:
-                        msg = f"R{R},L{L}\n"
-
-                    client.send(msg.encode())
-
-                    prev_L, prev_R = L, R
-
-                was_connected = True
-
-            except Exception as e:
-                print("[SEND] Error:", e)
-                try:
-                    client.close()
-                except:
-                    pass
-                client = None
-                connected = False
-                was_connected = False
-        else:
-            was_connected = False
-
-        time.sleep(0.01)
-
-def receive_thread():
-    global client, connected, running
-    while running:
-        if connected and client:
-            try:
-                data = client.recv(1024)
-                if not data:
-                    # Connection closed gracefully
-                    print("[RECV] ESP32 closed the connection")
-                    try:
-                        client.close()
-                    except:
-                        pass
-                    client = None
-                    connected = False
-                else:
-                    # If you want debug:
-                    # print("ESP32:", data.decode(errors="ignore").strip())
-                    pass
-            except Exception as e:
-                # Any recv error: treat as broken connection
-                print("[RECV] Error:", e)
-                try:
-                    client.close()
-                except:
-                    pass
-                client = None
-                connected = False
-        time.sleep(0.05)
 
 
+def set_transport(transport):
+    link.transport = transport
+    LOG.info("CONNECT", "Transport -> {}", link.transport.upper())
+    # Takes effect on the next dial; redial now if a link is up
+    link.reconnect()
 
 # ================================================================
 # HILO CÁMARA
 # ================================================================
 def camera_thread():
-    global latest_frame, running
+    global running
 
-    cap = cv2.VideoCapture(0) #Built-in camera
-    #cap = cv2.VideoCapture(1) #External camera
-    cap.set(3, 640)
-    cap.set(4, 360)
-
-    if not cap.isOpened():
-        print("No se pudo abrir la cámara.")
+    cam = CameraCapture(CAMERA)
+    with startup.phase("camera_open"):
+        opened = cam.open()
+    if not opened:
+        LOG.error("CAMERA", "No se pudo abrir la cámara.")
         running = False
         return
+    LOG.info("CAMERA", "{} -> {}", CAMERA, cam.actual)
 
+    # No sleep: grab() blocks until the sensor delivers the next frame
     while running:
-        ret, frame = cap.read()
+        # Read straight into a free ring slot (no per-frame allocation)
+        buf = frame_ring.claim()
+        ret, frame, t_capture = cam.read(buf)
         if ret:
-            with frame_lock:
-                latest_frame = frame
-        time.sleep(0.01)
+            m_captured.inc()
+            if frame_ring.commit(frame, t_capture) == 1:
+                startup.mark("first_frame")
+        else:
+            m_read_failures.inc()
+            time.sleep(0.01)
 
-    cap.release()
+    cam.release()
 
 # ================================================================
 # DETECCIÓN MEDIAPIPE (freeze bilateral + Gesto A/B auto)
 # ================================================================
-import time
-from collections import deque
-import math
-
-# persistent lockout to avoid A → B confusion
-_last_raise_time = 0.0
+CALIBRATING = ("1", "Calibrating...")
 
 # -----------------------
 # Lean toggle controls
@@ -697,627 +363,843 @@ lean_enabled = False  # default OFF
 def toggle_lean():
     global lean_enabled
     lean_enabled = not lean_enabled
-    print(f"[BodyControl] lean_enabled = {lean_enabled}")
+    LOG.info("BodyControl", "lean_enabled = {}", lean_enabled)
 
 def set_lean_enabled(value: bool):
     global lean_enabled
     lean_enabled = bool(value)
-    print(f"[BodyControl] lean_enabled = {lean_enabled}")
+    LOG.info("BodyControl", "lean_enabled = {}", lean_enabled)
 
 
 def body_control_thread():
     """
-    Body-only locomotion + walk-in-place + optional lean + right-hand gestures:
-
-    Locomotion:
-      - Yaw right     -> R4,L1
-      - Yaw left      -> R3,L1
-      - Walk-in-place -> R1,L2   (forward intent)
-      - Lean forward  -> R1,L2   (only if lean_enabled == True)
-      - Lean back     -> R1,L5   (only if lean_enabled == True)
-      - Neutral       -> R1,L1
-
-    Right-hand gestures override locomotion:
-      - Right hand raised  -> A,A
-      - Right hand forward -> B,B
+    Camera frames -> pose -> BodyClassifier -> set_commands.
+
+    The locomotion / right-hand gesture rules and their tunables live in
+    body_classifier.py; this thread only feeds it features and capture
+    timestamps. With POSE_RECORD set, every processed frame is appended to
+    a recording that pose_recording.py can replay without a camera.
+
+    Startup runs as timed phases (see startup_profile.py): MediaPipe import,
+    graph construction and a warm-up on a dummy frame happen right away in
+    this thread while manual mode is already usable (with POSE_PRELOAD=0,
+    only once camera mode is first enabled); the initial calibration waits
+    for camera mode. The cold-start report prints with the first command.
     """
-    global latest_left_code, latest_left_name
-    global latest_right_code, latest_right_name
-    global manual_mode, latest_pose_landmarks
-    global lean_enabled
+    global manual_mode, latest_pose_landmarks, latest_body_state
+    global lean_enabled, pose_governor
     global calibration_requested, calibration_lock
 
-    # -----------------------
-    # Tunable parameters
-    # -----------------------
-    EMA_ALPHA = 0.35
-
-    # Yaw hysteresis
-    YAW_ON  = 0.08
-    YAW_OFF = 0.05
-
-    # Lean hysteresis
-    LEAN_ON  = 0.12
-    LEAN_OFF = 0.08
-
-    # Flip if directions are backwards (camera mirroring)
-    YAW_SIGN  = 1.0
-    LEAN_SIGN = -1.0
-
-    # Roll (lean left/right) hysteresis (normalized)
-    ROLL_ON  = 0.35
-    ROLL_OFF = 0.25
-    ROLL_SIGN = -1.0  # flip if left/right is inverted
-
-    roll0 = 0.0
-    roll_s = None
-
-
-    # -----------------------
-    # Right-hand gesture parameters (override locomotion)
-    # -----------------------
-    GESTURE_DEBOUNCE_FRAMES = 16   # must be true N frames before activating
-    GESTURE_RELEASE_FRAMES  = 8   # must be false N frames before releasing
-
-    RIGHT_HAND_RAISE_DY = 0.10    # wrist above shoulder by this much (normalized coords)
-    RIGHT_HAND_FWD_DZ   = 0.20    # wrist toward camera compared to shoulder (z units)
-
-    # -----------------------
-    # Walk-in-place parameters
-    # -----------------------
-    WIP_WINDOW_S = 1.2
-    WIP_MIN_FLIPS = 3
-    WIP_AMP_ON = 0.18
-    WIP_AMP_OFF = 0.12
-    WIP_EMA_ALPHA = 0.30
-
-    # Baselines (neutral pose)
-    yaw0 = 0.0
-    lean0 = 0.0
-
-    # Smoothed signals
-    yaw_s = None
-    lean_s = None
-
-    # State (hysteresis)
-    state = "NEUTRAL"  # "TURN_L", "TURN_R", "LEAN_L", "LEAN_R", "FWD", "BACK", "NEUTRAL"
-
-    # Walk-in-place state
-    wip_d_s = None
-    wip_last_sign = 0
-    wip_flip_times = deque()
-    wip_amp_hist = deque()
-    wip_amp_times = deque()
-    wip_active = False
-
-    # Right-hand gesture state
-    a_on_count = 0
-    a_off_count = 0
-    b_on_count = 0
-    b_off_count = 0
-    active_gesture = None  # None, "A", "B"
-
-    def ema(prev, new, a):
-        return new if prev is None else (a * new + (1.0 - a) * prev)
-
-    def avg3(a, b):
-        return ((a.x + b.x) * 0.5, (a.y + b.y) * 0.5, (a.z + b.z) * 0.5)
-
-    def compute_yaw_lean_roll(lm):
-        shL, shR = lm[11], lm[12]
-        hipL, hipR = lm[23], lm[24]
-
-        sh_c = avg3(shL, shR)
-        hip_c = avg3(hipL, hipR)
-
-        # Yaw proxy (depth difference)
-        yaw_raw = (shR.z - shL.z) * YAW_SIGN
-
-        # Forward/back lean (depth-based is more reliable than y-based)
-        lean_raw = (hip_c[2] - sh_c[2]) * LEAN_SIGN
-
-        # Roll proxy (side lean), normalized by shoulder width
-        shoulder_w = abs(shR.x - shL.x)
-        if shoulder_w < 1e-6:
-            roll_raw = 0.0
-        else:
-            shoulder_tilt = (shL.y - shR.y)
-            hip_tilt      = (hipL.y - hipR.y)
-            roll_raw = ((shoulder_tilt - hip_tilt) / shoulder_w) * ROLL_SIGN
-
-        return yaw_raw, lean_raw, roll_raw, sh_c, hip_c
-
-    def detect_right_hand_gesture(lm):
-        """
-        Returns: None, "A", or "B"
-        A = right hand raised
-        B = right hand forward (deliberate push)
-        """
-        global _last_raise_time
-
-        sh = lm[12]   # right shoulder
-        el = lm[14]   # right elbow
-        wr = lm[16]   # right wrist
-
-        # Arm vector (shoulder -> wrist)
-        dx = wr.x - sh.x
-        dy = wr.y - sh.y
-        dz = wr.z - sh.z
-
-        # ---------
-        # Angles
-        # ---------
-        # Elevation: how much the arm points UP
-        elev = math.degrees(
-            math.atan2(-dy, math.sqrt(dx*dx + dz*dz) + 1e-9)
-        )
-
-        # Forward: how much the arm points TOWARD CAMERA
-        fwd = math.degrees(
-            math.atan2(-dz, math.sqrt(dx*dx + dy*dy) + 1e-9)
-        )
-
-        # Elbow extension angle (straight arm check)
-        def angle_3pts(a, b, c):
-            ab = (a.x-b.x, a.y-b.y, a.z-b.z)
-            cb = (c.x-b.x, c.y-b.y, c.z-b.z)
-            dot = ab[0]*cb[0] + ab[1]*cb[1] + ab[2]*cb[2]
-            nab = math.sqrt(ab[0]**2 + ab[1]**2 + ab[2]**2) + 1e-9
-            ncb = math.sqrt(cb[0]**2 + cb[1]**2 + cb[2]**2) + 1e-9
-            cosang = max(-1.0, min(1.0, dot/(nab*ncb)))
-            return math.degrees(math.acos(cosang))
-
-        elbow = angle_3pts(sh, el, wr)
-
-        # ---------
-        # Tunables (start here)
-        # ---------
-        ELEV_ON   = 35    # degrees → clearly raised
-        FWD_ON    = 3205    # degrees → clearly forward
-        ELBOW_ON  = 135   # degrees → arm fairly straight
-        RAISE_LOCK = 0.35 # seconds
-
-        ELEV_UP_MIN = 10      # degrees (above shoulder line)
-        ELEV_DOWN_MAX = -15  # degrees (below shoulder line)
-
-        FWD_MIN = 25         # degrees
-
-
-        now = time.time()
-
-        print(
-            f"elev={elev:.1f}°  fwd={fwd:.1f}°  elbow={elbow:.1f}°",
-            end="\r"
-        )
-
-        # ---------
-        # Gesture A: RAISE (wins)
-        # ---------
-        if elev > ELEV_UP_MIN and fwd > FWD_MIN:
-            _last_raise_time = now
-            return "A"
+    while running and manual_mode and not POSE_PRELOAD:
+        time.sleep(0.05)
+    if not running:
+        return
 
-        # Ignore forward shortly after a raise motion
-        if (now - _last_raise_time) < RAISE_LOCK:
+    clf = BodyClassifier(lean_enabled=lean_enabled, verbose=True,
+                         SMOOTHER=POSE_SMOOTHER, SMOOTH_LEAD_S=POSE_LEAD_MS / 1000.0)
+    recorder = None
+    if POSE_RECORD:
+        path = POSE_RECORD
+        if os.path.isdir(path):
+            path = os.path.join(path, time.strftime("session-%Y%m%d-%H%M%S.posrec"))
+        recorder = PoseRecorder(path, params=clf.params())
+        LOG.info("BodyControl", "Recording to {}", path)
+
+    # Frame ring consumer state: only ever process a frame id once
+    last_frame_id = 0
+    last_t_capture = 0.0
+    last_t_commit = 0.0
+    last_t_dequeue = 0.0
+    rgb_buf = None
+
+    def next_rgb(timeout=0.1):
+        """Blocks for a new frame id; converts into a reused RGB buffer."""
+        nonlocal last_frame_id, last_t_capture, last_t_commit, last_t_dequeue, rgb_buf
+        f = frame_ring.wait_newer(last_frame_id, timeout)
+        if f is None:
             return None
-
-        # ---------
-        # Gesture B: FORWARD (deliberate push)
-        # ---------
-        if elev < ELEV_DOWN_MAX and fwd > FWD_MIN:
-            return "B"
-
-        return None
-
-    def update_walk_in_place(lm, sh_c, hip_c):
-        nonlocal wip_d_s, wip_last_sign, wip_active
-        now = time.time()
-
-        ankL, ankR = lm[27], lm[28]
-
-        dx = sh_c[0] - hip_c[0]
-        dy = sh_c[1] - hip_c[1]
-        scale = (dx * dx + dy * dy) ** 0.5
-        if scale < 1e-6:
-            return False
-
-        liftL = (hip_c[1] - ankL.y) / scale
-        liftR = (hip_c[1] - ankR.y) / scale
-
-        d = liftL - liftR
-        wip_d_s = ema(wip_d_s, d, WIP_EMA_ALPHA)
-        dabs = abs(wip_d_s)
-
-        wip_amp_hist.append(dabs)
-        wip_amp_times.append(now)
-
-        sign = 1 if wip_d_s > 0 else (-1 if wip_d_s < 0 else 0)
-        if sign != 0 and wip_last_sign != 0 and sign != wip_last_sign:
-            wip_flip_times.append(now)
-        if sign != 0:
-            wip_last_sign = sign
-
-        while wip_flip_times and (now - wip_flip_times[0]) > WIP_WINDOW_S:
-            wip_flip_times.popleft()
-        while wip_amp_times and (now - wip_amp_times[0]) > WIP_WINDOW_S:
-            wip_amp_times.popleft()
-            wip_amp_hist.popleft()
-
-        flips = len(wip_flip_times)
-        amp_peak = max(wip_amp_hist) if wip_amp_hist else 0.0
-
-        if wip_active:
-            if flips < 2 or amp_peak < WIP_AMP_OFF:
-                wip_active = False
-        else:
-            if flips >= WIP_MIN_FLIPS and amp_peak >= WIP_AMP_ON:
-                wip_active = True
-
-        return wip_active
-
-    with mp_pose.Pose(
-        model_complexity=0,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    ) as pose:
-
-        # -----------------------
-        # Calibration (~1s neutral)
-        # -----------------------
-        neutral_yaw = []
-        neutral_lean = []
-        neutral_roll = []
-
+        last_t_dequeue = time.monotonic()
+        with f:
+            if last_frame_id:
+                m_skipped.inc(f.frame_id - last_frame_id - 1)
+            last_frame_id = f.frame_id
+            last_t_capture = f.t_capture
+            last_t_commit = f.t_commit
+            if rgb_buf is None or rgb_buf.shape != f.image.shape:
+                rgb_buf = np.empty_like(f.image)
+            t0 = time.perf_counter()
+            cv2.cvtColor(f.image, cv2.COLOR_BGR2RGB, dst=rgb_buf)
+            m_convert_ms.observe((time.perf_counter() - t0) * 1000.0)
+        return rgb_buf
+
+    def infer(rgb):
+        t0 = time.perf_counter()
+        results = pose.process(rgb)
+        m_pose_ms.observe((time.perf_counter() - t0) * 1000.0)
+        m_processed.inc()
+        return results
+
+    # Landmarks -> (33, 4) array -> all features in one vectorized pass
+    lm_buf = np.empty((33, 4), np.float32)
+    feat_buf = np.empty(N_FEATURES, np.float32)
+
+    def frame_features(results):
+        """(landmarks, feature list), or (None, None) without a pose."""
+        lm = landmarks_of(results, lm_buf)
+        if lm is None:
+            return None, None
+        return lm, compute_features(lm, clf.YAW_SIGN, clf.LEAN_SIGN, clf.ROLL_SIGN,
+                                    out=feat_buf).tolist()
+
+    def record(lm, commands, calibrating=False, calib_start=False):
+        if recorder is not None:
+            recorder.append(last_t_capture, last_frame_id, lm, commands,
+                            clf.state, clf.active_gesture, calibrating,
+                            clf.lean_enabled, calib_start)
+
+    def calibrate():
+        """Collects new neutral baselines (~1s)."""
+        global latest_pose_landmarks, latest_body_state
+        latest_body_state = "CALIBRATING"
+        clf.begin_calibration()
+        # Replay must reset the classifier here too, even if no frame follows
+        record(None, (CALIBRATING, CALIBRATING), calib_start=True)
         calib_start = time.time()
 
         while running and (time.time() - calib_start) < 1.0:
-            if latest_frame is None or manual_mode:
+            if manual_mode:
                 time.sleep(0.02)
                 continue
 
-            with frame_lock:
-                frame = latest_frame.copy()
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose.process(rgb)
+            rgb = next_rgb()
+            if rgb is None:
+                continue
+            lm, f = frame_features(infer(rgb))
 
-            if results.pose_landmarks:
+            if f is not None:
                 with landmark_lock:
-                    latest_pose_landmarks = results.pose_landmarks
+                    latest_pose_landmarks = lm.copy()
+                clf.add_calibration(f)
+            record(lm, (CALIBRATING, CALIBRATING), calibrating=True)
 
-                lm = results.pose_landmarks.landmark
-                y_raw, l_raw, r_raw, _, _ = compute_yaw_lean_roll(lm)
-                neutral_yaw.append(y_raw)
-                neutral_lean.append(l_raw)
-                neutral_roll.append(r_raw)
+        return clf.end_calibration()
 
-            time.sleep(0.02)
+    # Same .process(rgb) -> .pose_landmarks interface either way; the
+    # worker imports MediaPipe in its own process
+    if USE_POSE_WORKER:
+        pose_backend = PoseWorker
+    else:
+        with startup.phase("mediapipe_import"):
+            import mediapipe as mp
+        pose_backend = mp.solutions.pose.Pose
+    pose_options = dict(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+    if USE_POSE_GOVERNOR:
+        # Downscaled levels fit the worker's buffer (sized by the full-frame
+        # warm-up), so both backends get every level
+        pose_governor = InferenceGovernor(budget_ms=1000.0 / POSE_TARGET_FPS,
+                                          levels=LEVELS,
+                                          start=LEVELS.index((0, None)))
+        pose_ctx = GovernedPose(pose_backend, pose_governor, **pose_options)
+    else:
+        pose_ctx = pose_backend(model_complexity=0, **pose_options)
+
+    try:
+        with ExitStack() as stack:
+            with startup.phase("graph_build"):
+                pose = stack.enter_context(pose_ctx)
+
+            # The first process() loads the model: pay for it on a dummy
+            # frame now, not on the first real one
+            shape = frame_ring.shape or (CAMERA.height, CAMERA.width, 3)
+            with startup.phase("warmup"):
+                if hasattr(pose, "warm_up"):
+                    pose.warm_up(shape)
+                else:
+                    pose.process(np.zeros(shape, np.uint8))
+            LOG.info("BodyControl", "Pose model ready")
 
-        yaw0 = (sum(neutral_yaw) / len(neutral_yaw)) if neutral_yaw else 0.0
-        lean0 = (sum(neutral_lean) / len(neutral_lean)) if neutral_lean else 0.0
-        roll0 = (sum(neutral_roll) / len(neutral_roll)) if neutral_roll else 0.0
+            if USE_POSE_ROI:
+                # Crop around the last pose; full frame again when it is lost
+                pose = RoiPose(pose, RoiTracker(input_size=POSE_ROI_SIZE))
 
-        # -----------------------
-        # Main loop
-        # -----------------------
-        while running:
-            # -----------------------
-            # Recalibration check
-            # -----------------------
-            do_calib = False
-            with calibration_lock:
-                if calibration_requested:
-                    do_calib = True
-
-            if do_calib:
-                # Clear request immediately (so it doesn't repeat)
+            while running and manual_mode:
+                time.sleep(0.02)
+
+            # Calibration (~1s neutral)
+            with startup.phase("calibration"):
+                calibrate()
+
+            while running:
+                # Recalibration check (clear the request so it doesn't repeat)
                 with calibration_lock:
+                    do_calib = calibration_requested
                     calibration_requested = False
 
-                # Optional: force safe outputs during calibration
-                with gesture_lock:
-                    latest_left_code = "1"
-                    latest_left_name = "Calibrating..."
-                    latest_right_code = "1"
-                    latest_right_name = "Calibrating..."
-
-                # Reset “stateful” filters so calibration feels immediate
-                yaw_s = None
-                lean_s = None
-                state = "NEUTRAL"
-
-                # Reset WIP state (important)
-                wip_d_s = None
-                wip_last_sign = 0
-                wip_flip_times.clear()
-                wip_amp_hist.clear()
-                wip_amp_times.clear()
-                wip_active = False
-
-                # Reset right-hand gesture state (important)
-                a_on_count = a_off_count = 0
-                b_on_count = b_off_count = 0
-                active_gesture = None
-
-                # Collect new baselines (~1s)
-                neutral_yaw = []
-                neutral_lean = []
-                neutral_roll = []
-                calib_start = time.time()
-
-                while running and (time.time() - calib_start) < 1.0:
-                    if latest_frame is None or manual_mode:
-                        time.sleep(0.02)
-                        continue
-
-                    with frame_lock:
-                        frame = latest_frame.copy()
-
-                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = pose.process(rgb)
-
-                    if results.pose_landmarks:
-                        with landmark_lock:
-                            latest_pose_landmarks = results.pose_landmarks
-
-                        lm = results.pose_landmarks.landmark
-                        y_raw, l_raw, r_raw, *_ = compute_yaw_lean_roll(lm)
-                        neutral_yaw.append(y_raw)
-                        neutral_lean.append(l_raw)
-                        neutral_roll.append(r_raw)
-                        
+                if do_calib:
+                    # Force safe outputs during calibration
+                    set_commands(CALIBRATING, CALIBRATING)
+                    yaw0, lean0, roll0 = calibrate()
+                    LOG.info("BodyControl", "Recalibrated yaw0={:.4f}, lean0={:.4f}, roll0={:.4f}",
+                             yaw0, lean0, roll0)
+                    continue
+
+                if manual_mode:
+                    latest_body_state = "MANUAL"
+                    last_frame_id = 0       # frames missed here are not "skipped"
                     time.sleep(0.02)
+                    continue
 
-                yaw0 = (sum(neutral_yaw) / len(neutral_yaw)) if neutral_yaw else yaw0
-                lean0 = (sum(neutral_lean) / len(neutral_lean)) if neutral_lean else lean0
-                roll0 = (sum(neutral_roll) / len(neutral_roll)) if neutral_roll else roll0
+                # Blocks until the camera publishes a new frame id, so the
+                # same image is never run through pose.process twice
+                rgb = next_rgb()
+                if rgb is None:
+                    continue
+                # Capture timestamp + stage stamps ride along to the link
+                trace = FrameTrace(last_frame_id, last_t_capture, last_t_commit,
+                                   last_t_dequeue)
+                results = infer(rgb)
+                trace.t_inferred = time.monotonic()
+                t0 = time.perf_counter()
+                lm, f = frame_features(results)
+
+                if f is not None:
+                    with landmark_lock:
+                        latest_pose_landmarks = lm.copy()
+                    clf.lean_enabled = lean_enabled
+                    clf.step(f, last_t_capture)
+                    m_classify_ms.observe((time.perf_counter() - t0) * 1000.0)
+                    latest_body_state = OUTPUTS[clf.output]
+                    commands = clf.commands
+                    if clf.step_rate:
+                        # Walk-in-place: show the cadence next to "Forward"
+                        (codeL, nameL), right = commands
+                        commands = ((codeL, f"{nameL} {clf.step_rate * 60:.0f} steps/min"), right)
+                else:
+                    with landmark_lock:
+                        latest_pose_landmarks = None
+                    latest_body_state = "NO POSE"
+                    commands = NO_POSE_COMMANDS
+                    m_no_pose.inc()
+
+                trace.t_published = time.monotonic()
+                set_commands(*commands, trace=trace)
+                record(lm, commands)
+                if startup.mark("first_command"):
+                    LOG.info(None, "{}", startup.report())
+    finally:
+        if recorder is not None:
+            recorder.close()
+            LOG.info("BodyControl", "Recorded {} frames", recorder.count)
 
-                print(f"[BodyControl] Recalibrated yaw0={yaw0:.4f}, lean0={lean0:.4f}, roll0={roll0:.4f}")
-                continue  # skip rest of this loop iteration
+# ================================================================
+# VISTA PREVIA (overlay dibujado fuera del hilo de Tk)
+# ================================================================
+overlay = SkeletonOverlay()
 
-            if latest_frame is None or manual_mode:
-                time.sleep(0.02)
-                continue
+def draw_overlay(frame):
+    """Skeleton + state + L/R commands onto the BGR preview (renderer thread)."""
+    t0 = time.perf_counter()
+    lm_to_draw = None
+    if not manual_mode:
+        with landmark_lock:
+            lm_to_draw = latest_pose_landmarks
 
-            with frame_lock:
-                frame = latest_frame.copy()
+    with gesture_lock:
+        left_name  = latest_left_name
+        left_code  = latest_left_code
+        right_name = latest_right_name
+        right_code = latest_right_code
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose.process(rgb)
+    overlay.draw(frame, lm_to_draw, (
+        f"L: {left_name} ({left_code})",
+        f"R: {right_name} ({right_code})",
+        f"STATE: {'MANUAL' if manual_mode else latest_body_state}",
+    ))
+    m_overlay_ms.observe((time.perf_counter() - t0) * 1000.0)
 
-            if results.pose_landmarks:
-                with landmark_lock:
-                    latest_pose_landmarks = results.pose_landmarks
 
-                lm = results.pose_landmarks.landmark
+# Overlay composed off the Tk thread, only for new frame ids, capped at PREVIEW_FPS
+preview = PreviewRenderer(frame_ring, compose=draw_overlay, max_fps=PREVIEW_FPS,
+                          width=PREVIEW_WIDTH)
 
-                # =====================================================
-                # RIGHT-HAND GESTURE OVERRIDE (A,A / B,B)
-                # =====================================================
-                g = detect_right_hand_gesture(lm)
 
-                # Update debounce counters
-                if g == "A":
-                    a_on_count += 1
-                    a_off_count = 0
-                else:
-                    a_off_count += 1
-                    a_on_count = 0
+# ================================================================
+# TKINTER UI (solo con la GUI: Tk y PIL se importan aqui)
+# ================================================================
+def build_ui():
+    """Builds the control window; returns the Tk root with update_gui scheduled."""
+    from tkinter import Tk, Frame, Label, Button, Checkbutton, BooleanVar
+    from PIL import Image, ImageTk
 
-                if g == "B":
-                    b_on_count += 1
-                    b_off_count = 0
-                else:
-                    b_off_count += 1
-                    b_on_count = 0
-
-                # Activate gesture if held long enough
-                if active_gesture is None:
-                    if a_on_count >= GESTURE_DEBOUNCE_FRAMES:
-                        active_gesture = "A"
-                    elif b_on_count >= GESTURE_DEBOUNCE_FRAMES:
-                        active_gesture = "B"
-                else:
-                    # Release gesture when gone long enough
-                    if active_gesture == "A" and a_off_count >= GESTURE_RELEASE_FRAMES:
-                        active_gesture = None
-                    elif active_gesture == "B" and b_off_count >= GESTURE_RELEASE_FRAMES:
-                        active_gesture = None
-
-                # If gesture active, override & skip locomotion
-                if active_gesture == "A":
-                    with gesture_lock:
-                        latest_left_code  = "A"
-                        latest_left_name  = "Gesture A (R hand up)"
-                        latest_right_code = "A"
-                        latest_right_name = "Gesture A (R hand up)"
-                    time.sleep(0.02)
-                    continue
+    root = Tk()
+    root.title("EVA-01 REMOTE LINK")
+    root.configure(bg=bg_color)
 
-                if active_gesture == "B":
-                    with gesture_lock:
-                        latest_left_code  = "B"
-                        latest_left_name  = "Gesture B (R hand forward)"
-                        latest_right_code = "B"
-                        latest_right_name = "Gesture B (R hand forward)"
-                    time.sleep(0.02)
-                    continue
+    main_frame = Frame(root, bg=bg_color)
+    main_frame.pack(padx=20, pady=20)
 
-                # =====================================================
-                # LOCOMOTION (yaw / wip / optional lean)
-                # =====================================================
-                yaw_raw, lean_raw, roll_raw, sh_c, hip_c = compute_yaw_lean_roll(lm)
-                yaw = yaw_raw - yaw0
-                lean = lean_raw - lean0
-                roll = roll_raw - roll0
-
-                yaw_s  = ema(yaw_s,  yaw,  EMA_ALPHA)
-                lean_s = ema(lean_s, lean, EMA_ALPHA)
-                roll_s = ema(roll_s, roll, EMA_ALPHA)
-
-                wip = update_walk_in_place(lm, sh_c, hip_c)
-
-                # Decide state (priority: yaw > roll > WIP > lean(if enabled))
-                # 1) Turning
-                if state in ("TURN_L", "TURN_R"):
-                    if abs(yaw_s) < YAW_OFF:
-                        state = "NEUTRAL"
-                    else:
-                        state = "TURN_R" if yaw_s > 0 else "TURN_L"
-                else:
-                    if abs(yaw_s) > YAW_ON:
-                        state = "TURN_R" if yaw_s > 0 else "TURN_L"
-                    else:
-                        # 2) Roll (lean left/right)
-                        if state in ("LEAN_L", "LEAN_R"):
-                            if abs(roll_s) < ROLL_OFF:
-                                state = "NEUTRAL"
-                            else:
-                                state = "LEAN_R" if roll_s > 0 else "LEAN_L"
-                        else:
-                            if abs(roll_s) > ROLL_ON:
-                                state = "LEAN_R" if roll_s > 0 else "LEAN_L"
-                            else:
-                                # 3) Walk-in-place
-                                if wip:
-                                    state = "FWD"
-                                else:
-                                    # 4) Lean forward/back (optional)
-                                    if not lean_enabled:
-                                        state = "NEUTRAL"
-                                    else:
-                                        if state in ("FWD", "BACK"):
-                                            if abs(lean_s) < LEAN_OFF:
-                                                state = "NEUTRAL"
-                                            else:
-                                                state = "BACK" if lean_s > 0 else "FWD"
-                                        else:
-                                            if abs(lean_s) > LEAN_ON:
-                                                state = "BACK" if lean_s > 0 else "FWD"
-                                            else:
-                                                state = "NEUTRAL"
-
-                # Map state -> your R/L commands
-                if state == "FWD":
-                    # forward
-                    codeR, nameR = "1", "Neutral"
-                    codeL, nameL = "2", "Forward"
-
-                elif state == "BACK":
-                    codeR, nameR = "1", "Neutral"
-                    codeL, nameL = "5", "Back"
-
-                elif state == "TURN_R":
-                    codeR, nameR = "4", "Turn Right"
-                    codeL, nameL = "1", "Neutral"
-
-                elif state == "TURN_L":
-                    codeR, nameR = "3", "Turn Left"
-                    codeL, nameL = "1", "Neutral"
-
-                elif state == "LEAN_R":
-                    # lean right -> R1,L4
-                    codeR, nameR = "1", "Neutral"
-                    codeL, nameL = "4", "Lean Right"
-
-                elif state == "LEAN_L":
-                    # lean left -> R1,L3
-                    codeR, nameR = "1", "Neutral"
-                    codeL, nameL = "3", "Lean Left"
+    # --- prevent layout resizing when content changes ---
+    main_frame.pack_propagate(False)
 
-                else:
-                    codeR, nameR = "1", "Neutral"
-                    codeL, nameL = "1", "Neutral"
+    # ------------------ CAMARA ------------------
+    camera_border = Frame(main_frame, bg=neon_purple, bd=4, relief="solid")
+    camera_border.grid(row=0, column=0, padx=20)
 
-                with gesture_lock:
-                    latest_left_code = codeL
-                    latest_left_name = nameL
-                    latest_right_code = codeR
-                    latest_right_name = nameR
+    camera_label = Label(camera_border, bg="black")
+    camera_label.pack()
 
-            else:
-                with landmark_lock:
-                    latest_pose_landmarks = None
-                with gesture_lock:
-                    latest_left_code = "1"
-                    latest_left_name = "Neutral"
-                    latest_right_code = "1"
-                    latest_right_name = "Neutral"
+    # ------------------ PANEL CONTROL ------------------
+    control_frame = Frame(
+        main_frame, padx=20, pady=20,
+        bg=panel_color, bd=4, relief="solid",
+        highlightbackground=neon_green, highlightthickness=2
+    )
+    control_frame.grid(row=0, column=1, sticky="n")
+
+    Label(
+        control_frame,
+        text="EVA CONTROL PANEL",
+        font=("Consolas", 18, "bold"),
+        fg=neon_orange,
+        bg=panel_color
+    ).grid(row=0, column=0, columnspan=3, pady=(0, 5))
+
+    Label(
+        control_frame,
+        text="SYSTEM STATUS: NORMAL",
+        font=("Consolas", 10, "bold"),
+        fg=neon_green,
+        bg=panel_color
+    ).grid(row=1, column=0, columnspan=3, pady=(0, 10))
+
+    # ================================================================
+    # Button Calibration (in control panel)
+    # ================================================================
+    btn_calibrate = Button(
+        control_frame,
+        text="CALIBRAR (BASELINE)",
+        command=request_calibration,
+        width=18,
+        bg=button_bg,
+        fg=neon_orange,
+        font=("Consolas", 11, "bold"),
+        highlightbackground=neon_orange,
+        highlightthickness=2,
+        bd=0
+    )
+    # Place it under the connect/status row
+    btn_calibrate.grid(row=7, column=0, columnspan=3, pady=(5, 10))
+
+    # Panel de metricas (STATS_PANEL=1)
+    stats_label = None
+    if SHOW_STATS_PANEL:
+        stats_label = Label(control_frame, text="", font=("Consolas", 9),
+                            fg=neon_blue, bg=panel_color, justify="left", anchor="w")
+        stats_label.grid(row=8, column=0, columnspan=3, sticky="w")
+
+    # ================================================================
+    # MODO MANUAL
+    # ================================================================
+    manual_var = BooleanVar(value=manual_mode)
+
+    def toggle_manual():
+        set_manual_mode(manual_var.get())
+
+
+    manual_check = Checkbutton(
+        control_frame,
+        text="Modo manual (No envia gestos automaticos)",
+        variable=manual_var,
+        command=toggle_manual,
+        fg=neon_green,
+        bg=panel_color,
+        selectcolor=panel_color,
+        font=("Consolas", 11),
+        activebackground=panel_color,
+        activeforeground=neon_green
+    )
+    manual_check.grid(row=2, column=0, columnspan=3, pady=10)
+
+    # ================================================================
+    # FUNCION AUXILIAR PARA BOTONES
+    # ================================================================
+    def make_dpad_button(parent, text):
+        return Button(
+            parent,
+            text=text,
+            width=8,
+            height=1,
+            bg=button_bg,
+            fg=neon_purple,
+            activebackground="#261b3a",
+            activeforeground=neon_blue,
+            highlightbackground=button_border,
+            highlightthickness=2,
+            bd=0,
+            font=("Consolas", 10, "bold"),
+            relief="flat"
+        )
 
-            #time.sleep(0.02)
+    # ================================================================
+    # PANEL MOVIMIENTOS LINEALES (SERVOS 1 y 2)
+    # ================================================================
+    lineal_frame = Frame(control_frame, bg=panel_color)
+    lineal_frame.grid(row=3, column=0, columnspan=3, pady=(5, 10))
+
+    Label(
+        lineal_frame,
+        text="MOVIMIENTOS LINEALES (Servos 1 y 2)",
+        font=("Consolas", 11, "bold"),
+        fg=neon_blue,
+        bg=panel_color
+    ).grid(row=0, column=0, columnspan=3, pady=(0, 5))
+
+    def set_left_manual(code, name):
+        if not manual_mode:
+            return
+        set_commands(left=(code, name))
 
-# ================================================================
-# UPDATE GUI
-# ================================================================
-def update_gui():
-    global latest_frame, connected, running
+    def reset_left(event=None):
+        if not manual_mode:
+            return
+        set_commands(left=("1", "Quieto"))
+
+    btn_lin_up     = make_dpad_button(lineal_frame, "ADELANTE")
+    btn_lin_left   = make_dpad_button(lineal_frame, "IZQ")
+    btn_lin_center = make_dpad_button(lineal_frame, "QUIETO")
+    btn_lin_right  = make_dpad_button(lineal_frame, "DER")
+    btn_lin_down   = make_dpad_button(lineal_frame, "ATRAS")
+
+    btn_lin_up.grid(row=1, column=1)
+    btn_lin_left.grid(row=2, column=0)
+    btn_lin_center.grid(row=2, column=1)
+    btn_lin_right.grid(row=2, column=2)
+    btn_lin_down.grid(row=3, column=1)
+
+    btn_lin_up.bind("<ButtonPress-1>",   lambda e: set_left_manual("2", "Adelante"))
+    btn_lin_left.bind("<ButtonPress-1>", lambda e: set_left_manual("3", "Izquierda"))
+    btn_lin_right.bind("<ButtonPress-1>",lambda e: set_left_manual("4", "Derecha"))
+    btn_lin_down.bind("<ButtonPress-1>", lambda e: set_left_manual("5", "Atras"))
+    btn_lin_center.bind("<ButtonPress-1>", lambda e: set_left_manual("1", "Quieto"))
+
+    btn_lin_up.bind("<ButtonRelease-1>",     reset_left)
+    btn_lin_left.bind("<ButtonRelease-1>",   reset_left)
+    btn_lin_right.bind("<ButtonRelease-1>",  reset_left)
+    btn_lin_down.bind("<ButtonRelease-1>",   reset_left)
+    btn_lin_center.bind("<ButtonRelease-1>", reset_left)
+
+    # ================================================================
+    # BOTONES ESPECIALES: GESTO A y GESTO B
+    # ================================================================
+    Label(
+        lineal_frame,
+        text="GESTOS ESPECIALES",
+        font=("Consolas", 11, "bold"),
+        fg=neon_orange,
+        bg=panel_color
+    ).grid(row=4, column=0, columnspan=3, pady=(10, 5))
+
+    def set_gesto_A(event=None):
+        if not manual_mode:
+            return
+        set_commands(("A", "Gesto A"), ("A", "Gesto A"))
 
-    if latest_frame is not None:
-        with frame_lock:
-            frame = latest_frame.copy()
+    def set_gesto_B(event=None):
+        if not manual_mode:
+            return
+        set_commands(("B", "Gesto B"), ("B", "Gesto B"))
 
-        # Draw pose landmarks if available and not in manual mode
+    def reset_gestos(event=None):
         if not manual_mode:
-            with landmark_lock:
-                lm_to_draw = latest_pose_landmarks
-            if lm_to_draw is not None:
-                mp_drawing.draw_landmarks(
-                    frame,
-                    lm_to_draw,
-                    mp_pose.POSE_CONNECTIONS,
-                    landmark_drawing_spec=mp_drawing_styles.get_default_pose_landmarks_style()
-                )
+            return
+        set_commands(("1", "Quieto"), ("1", "Quieto"))
+
+    btn_gestoA = make_dpad_button(lineal_frame, "GESTO A")
+    btn_gestoB = make_dpad_button(lineal_frame, "GESTO B")
+
+    btn_gestoA.grid(row=5, column=0, pady=5)
+    btn_gestoB.grid(row=5, column=2, pady=5)
+
+    btn_gestoA.bind("<ButtonPress-1>", set_gesto_A)
+    btn_gestoA.bind("<ButtonRelease-1>", reset_gestos)
+    btn_gestoB.bind("<ButtonPress-1>", set_gesto_B)
+    btn_gestoB.bind("<ButtonRelease-1>", reset_gestos)
+
+    # ================================================================
+    # PANEL ROTACIONES (SERVOS 3 y 4)
+    # ================================================================
+    rot_frame = Frame(control_frame, bg=panel_color)
+    rot_frame.grid(row=4, column=0, columnspan=3, pady=(5, 10))
+
+    Label(
+        rot_frame,
+        text="ROTACIONES (Servos 3 y 4)",
+        font=("Consolas", 11, "bold"),
+        fg=neon_green,
+        bg=panel_color
+    ).grid(row=0, column=0, columnspan=3)
+
+    def set_right_manual(code, name):
+        if not manual_mode:
+            return
+        set_commands(right=(code, name))
 
+    def reset_right(event=None):
+        if not manual_mode:
+            return
+        set_commands(right=("1", "Quieto"))
+
+    btn_rot_up     = make_dpad_button(rot_frame, "ARRIBA")
+    btn_rot_left   = make_dpad_button(rot_frame, "IZQ")
+    btn_rot_center = make_dpad_button(rot_frame, "QUIETO")
+    btn_rot_right  = make_dpad_button(rot_frame, "DER")
+    btn_rot_down   = make_dpad_button(rot_frame, "ABAJO")
+
+    btn_rot_up.grid(row=1, column=1)
+    btn_rot_left.grid(row=2, column=0)
+    btn_rot_center.grid(row=2, column=1)
+    btn_rot_right.grid(row=2, column=2)
+    btn_rot_down.grid(row=3, column=1)
+
+    btn_rot_up.bind("<ButtonPress-1>",    lambda e: set_right_manual("2", "Arriba"))
+    btn_rot_left.bind("<ButtonPress-1>",  lambda e: set_right_manual("3", "Izquierda"))
+    btn_rot_right.bind("<ButtonPress-1>", lambda e: set_right_manual("4", "Derecha"))
+    btn_rot_down.bind("<ButtonPress-1>",  lambda e: set_right_manual("5", "Abajo"))
+    btn_rot_center.bind("<ButtonPress-1>",lambda e: set_right_manual("1", "Quieto"))
+
+    btn_rot_up.bind("<ButtonRelease-1>",     reset_right)
+    btn_rot_left.bind("<ButtonRelease-1>",   reset_right)
+    btn_rot_right.bind("<ButtonRelease-1>",  reset_right)
+    btn_rot_down.bind("<ButtonRelease-1>",   reset_right)
+    btn_rot_center.bind("<ButtonRelease-1>", reset_right)
+
+    # ================================================================
+    # RETROALIMENTACION
+    # ================================================================
+    feedback_label = Label(
+        control_frame,
+        text="Brazo izq: Quieto | Brazo der: Quieto [Auto]",
+        font=("Consolas", 12),
+        fg=neon_blue,
+        bg=panel_color,
+        justify="left",
+        width=60,
+        anchor="w"
+    )
+    feedback_label.grid(row=5, column=0, columnspan=3, pady=10)
+
+    # ================================================================
+    # ESTADO DE CONEXION
+    # ================================================================
+    status_frame = Frame(control_frame, bg=panel_color)
+    status_frame.grid(row=6, column=0, columnspan=3, pady=10)
+
+    status_light = Label(status_frame, text="●", font=("Consolas", 22),
+                         fg=neon_red, bg=panel_color)
+    status_light.grid(row=0, column=0)
+
+    status_text = Label(status_frame, text="LINK: OFFLINE",
+                        font=("Consolas", 12, "bold"),
+                        fg=text_color, bg=panel_color)
+    status_text.grid(row=0, column=1, padx=10)
+
+    btn_connect = Button(
+        status_frame,
+        text="CONECTAR",
+        width=12,
+        bg=button_bg,
+        fg=neon_blue,
+        font=("Consolas", 11, "bold"),
+        highlightbackground=neon_blue,
+        highlightthickness=2,
+        bd=0
+    )
+    btn_connect.grid(row=0, column=2, padx=10)
+
+    # RTT del canal de acks (solo con tramas v2)
+    status_rtt = Label(status_frame, text="RTT: --",
+                       font=("Consolas", 10),
+                       fg=neon_blue, bg=panel_color)
+    status_rtt.grid(row=1, column=0, columnspan=3, pady=(5, 0))
+
+    # Nivel de calidad de la inferencia (gobernador adaptativo)
+    status_pose = Label(status_frame, text="POSE: --",
+                        font=("Consolas", 10),
+                        fg=neon_blue, bg=panel_color)
+    status_pose.grid(row=3, column=0, columnspan=3, pady=(5, 0))
+
+    # Latencia camara -> servo (p50 / p90)
+    status_latency = Label(status_frame, text="GLASS-TO-SERVO: --",
+                           font=("Consolas", 10),
+                           fg=neon_blue, bg=panel_color)
+    status_latency.grid(row=4, column=0, columnspan=3, pady=(5, 0))
+
+    udp_var = BooleanVar(value=(ESP32_TRANSPORT == "udp"))
+
+    # ================================================================
+    # TUTORIAL EN DOS COLUMNAS (INCLUYE GESTO A Y B)
+    # ================================================================
+    # tutorial_container = Frame(main_frame, bg=bg_color)
+    # tutorial_container.grid(row=1, column=0, columnspan=2, pady=(20, 0), sticky="nsew")
+
+    # canvas = Canvas(tutorial_container, bg=bg_color, highlightthickness=0)
+    # scrollbar = Scrollbar(tutorial_container, orient="vertical", command=canvas.yview)
+    # canvas.configure(yscrollcommand=scrollbar.set)
+
+    # scrollbar.pack(side="right", fill="y")
+    # canvas.pack(side="left", fill="both", expand=True)
+
+    # scroll_frame = Frame(canvas, bg=bg_color)
+    # canvas.create_window((0, 0), window=scroll_frame, anchor="nw")
+
+    # tutorial_images = []
+
+    # def load_tutorial_images():
+    #     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+    #     figuras = [
+    #         ("fig1_quieto.png",   "Izq: Quieto",
+    #          "Brazo izquierdo relajado hacia abajo.",
+    #          "fig6_quietoR.png",  "Der: Quieto",
+    #          "Brazo derecho relajado hacia abajo."),
+
+    #         ("fig2_izquierda.png","Izq: Izquierda",
+    #          "Extiende el brazo izquierdo hacia la izquierda.",
+    #          "fig7_izquierdaR.png","Der: Izquierda",
+    #          "Cruza brazo derecho hacia la izquierda."),
+
+    #         ("fig3_derecha.png",  "Izq: Derecha",
+    #          "Cruza el brazo izquierdo hacia la derecha.",
+    #          "fig8_derechaR.png", "Der: Derecha",
+    #          "Extiende brazo derecho hacia la derecha."),
+
+    #         ("fig4_adelante.png", "Izq: Adelante",
+    #          "Levanta brazo izquierdo al frente.",
+    #          "fig9_arribaR.png",  "Der: Arriba",
+    #          "Levanta el brazo derecho completamente hacia arriba."),
+
+    #         ("fig5_atras.png",    "Izq: Atras",
+    #          "Lleva brazo izquierdo hacia tu espalda o hombro.",
+    #          "fig10_abajoR.png",  "Der: Abajo",
+    #          "Lleva brazo derecho hacia atrás o cintura."),
+
+    #         # Gesto A y Gesto B
+    #         ("fig11_gestoA.png",  "Gesto A",
+    #          "Alce ambos brazos para ejecutar el Gesto A.",
+    #          "fig12_gestoB.png",  "Gesto B",
+    #          "Retraiga ambos brazos hacia el cuerpo de forma que las manos casi toquen los hombros.")
+    #     ]
+
+    #     Label(
+    #         scroll_frame,
+    #         text="TUTORIAL DE POSTURAS — EVA LINK",
+    #         font=("Consolas", 17, "bold"),
+    #         fg=neon_orange,
+    #         bg=bg_color
+    #     ).grid(row=0, column=0, columnspan=2, pady=(0, 20))
+
+    #     row = 1
+    #     for izq_img, izq_title, izq_desc, der_img, der_title, der_desc in figuras:
+
+    #         cardL = Frame(scroll_frame, bg=panel_color, bd=2,
+    #                       highlightbackground=neon_purple, highlightthickness=2)
+    #         cardL.grid(row=row, column=0, padx=20, pady=10, sticky="n")
+
+    #         try:
+    #             imgL = cv2.imread(os.path.join(BASE_DIR, izq_img))
+    #             imgL = cv2.resize(imgL, (220, 220))
+    #             imgL = cv2.cvtColor(imgL, cv2.COLOR_BGR2RGB)
+    #             imgL = ImageTk.PhotoImage(Image.fromarray(imgL))
+    #             tutorial_images.append(imgL)
+    #             Label(cardL, image=imgL, bg=panel_color).pack(pady=(10, 5))
+    #         except:
+    #             Label(cardL, text=f"[No {izq_img}]", fg=neon_red, bg=panel_color).pack()
+
+    #         Label(cardL, text=izq_title, font=("Consolas", 13, "bold"),
+    #               fg=neon_blue, bg=panel_color).pack()
+    #         Label(cardL, text=izq_desc, wraplength=230, justify="left",
+    #               font=("Consolas", 11), fg=text_color, bg=panel_color).pack(pady=(0, 10))
+
+    #         cardR = Frame(scroll_frame, bg=panel_color, bd=2,
+    #                       highlightbackground=neon_purple, highlightthickness=2)
+    #         cardR.grid(row=row, column=1, padx=20, pady=10, sticky="n")
+
+    #         try:
+    #             imgR = cv2.imread(os.path.join(BASE_DIR, der_img))
+    #             imgR = cv2.resize(imgR, (220, 220))
+    #             imgR = cv2.cvtColor(imgR, cv2.COLOR_BGR2RGB)
+    #             imgR = ImageTk.PhotoImage(Image.fromarray(imgR))
+    #             tutorial_images.append(imgR)
+    #             Label(cardR, image=imgR, bg=panel_color).pack(pady=(10, 5))
+    #         except:
+    #             Label(cardR, text=f"[No {der_img}]", fg=neon_red, bg=panel_color).pack()
+
+    #         Label(cardR, text=der_title, font=("Consolas", 13, "bold"),
+    #               fg=neon_blue, bg=panel_color).pack()
+    #         Label(cardR, text=der_desc, wraplength=230, justify="left",
+    #               font=("Consolas", 11), fg=text_color, bg=panel_color).pack(pady=(0, 10))
+
+    #         row += 1
+
+    #     scroll_frame.update_idletasks()
+    #     canvas.config(scrollregion=canvas.bbox("all"))
+
+    # load_tutorial_images()
+
+    # ================================================================
+    # CONEXIÓN CON ESP32 (controles)
+    # ================================================================
+    btn_connect.config(command=toggle_connection)
+
+    def toggle_transport():
+        set_transport("udp" if udp_var.get() else "tcp")
+
+    udp_check = Checkbutton(
+        status_frame,
+        text="Transporte UDP (baja latencia)",
+        variable=udp_var,
+        command=toggle_transport,
+        fg=neon_blue,
+        bg=panel_color,
+        selectcolor=panel_color,
+        font=("Consolas", 10),
+        activebackground=panel_color,
+        activeforeground=neon_blue
+    )
+    udp_check.grid(row=2, column=0, columnspan=3, pady=(5, 0))
+
+    # ================================================================
+    # UPDATE GUI
+    # ================================================================
+    LINK_COLORS = {"online": neon_green, "reconnecting": neon_orange,
+                   "offline": neon_red}
+    preview_photo = None        # persistent PhotoImage, updated in place
+    preview_id = 0              # frame id currently on screen
+
+    def paste_preview(rgb):
+        nonlocal preview_photo
+        h, w = rgb.shape[:2]
+        if preview_photo is None or (preview_photo.width(), preview_photo.height()) != (w, h):
+            preview_photo = ImageTk.PhotoImage("RGB", (w, h))
+            camera_label.config(image=preview_photo)
+        preview_photo.paste(Image.fromarray(rgb))
+
+    stats_due = 0.0
+
+    def update_gui():
+        nonlocal preview_id, stats_due
+        t0 = time.perf_counter()
+
+        preview_id = preview.show(preview_id, paste_preview)
+
+        # Connection UI
+        link_level, link_text, rtt_text = link_status()
+        status_light.config(fg=LINK_COLORS[link_level])
+        status_text.config(text=link_text)
+        btn_connect.config(text="DESCONECTAR" if link.wanted else "CONECTAR")
+        status_rtt.config(text=rtt_text)
+
+        if pose_governor is not None:
+            status_pose.config(text=pose_governor.describe())
+        status_latency.config(text=tracer.describe())
+
+        # Feedback label
         with gesture_lock:
-            left_name  = latest_left_name
-            left_code  = latest_left_code
-            right_name = latest_right_name
-            right_code = latest_right_code
-
-        L_COLOR = (0, 0, 0)    # red in BGR
-        R_COLOR = (0, 0, 0)    # green in BGR
-
-        cv2.putText(frame, f"L: {left_name} ({left_code})", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, L_COLOR, 2)
-        cv2.putText(frame, f"R: {right_name} ({right_code})", (10, 55),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, R_COLOR, 2)
-
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        imgtk = ImageTk.PhotoImage(Image.fromarray(frame))
-        camera_label.config(image=imgtk)
-        camera_label.imgtk = imgtk
-
-    # Connection UI
-    if connected:
-        status_light.config(fg=neon_green)
-        status_text.config(text="LINK: ONLINE")
-        btn_connect.config(text="DESCONECTAR")
-    else:
-        status_light.config(fg=neon_red)
-        status_text.config(text="LINK: OFFLINE")
-        btn_connect.config(text="CONECTAR")
+            feedback_label.config(
+                text=f"L: {latest_left_name} | R: {latest_right_name} [{'Manual' if manual_mode else 'Auto'}]"
+            )
 
-    # Feedback label
-    with gesture_lock:
-        feedback_label.config(
-            text=f"L: {latest_left_name} | R: {latest_right_name} [{'Manual' if manual_mode else 'Auto'}]"
-        )
+        # Metrics panel, twice a second is plenty
+        if stats_label is not None and t0 >= stats_due:
+            stats_due = t0 + 0.5
+            stats_label.config(text=REGISTRY.summary(prefix="eva_"))
 
-    if running:
-        root.after(10, update_gui)
+        m_gui_tick_ms.observe((time.perf_counter() - t0) * 1000.0)
+        if running:
+            root.after(10, update_gui)
 
+    update_gui()
+    return root
 
-# ================================================================
-# INICIO HILOS
-# ================================================================
-threading.Thread(target=camera_thread, daemon=True).start()
-threading.Thread(target=communication_thread, daemon=True).start()
-threading.Thread(target=receive_thread, daemon=True).start()
-threading.Thread(target=body_control_thread, daemon=True).start()
 
 # ================================================================
-# LOOP PRINCIPAL
+# INICIO
 # ================================================================
-update_gui()
-root.mainloop()
-running = False
+def start_metrics():
+    if not METRICS_PORT:
+        return None
+    try:
+        server = serve_metrics(REGISTRY, METRICS_PORT, METRICS_HOST)
+    except OSError as e:
+        LOG.warning("METRICS", "Could not serve on {}:{}: {}", METRICS_HOST, METRICS_PORT, e)
+        return None
+    LOG.info("METRICS", "http://{}:{}/metrics", METRICS_HOST, METRICS_PORT)
+    return server
+
+def start_threads():
+    start_metrics()
+    link.start()
+    threading.Thread(target=camera_thread, name="camera", daemon=True).start()
+    threading.Thread(target=body_control_thread, name="body", daemon=True).start()
+
+def stop():
+    global running
+    running = False
+    preview.stop()
+    link.stop()
+    tracer.close()
+    if not startup.reported:
+        LOG.info(None, "{}", startup.report())
+    LOG.close()
+
+def run_gui():
+    # Camera and model load in the background while the window is built
+    start_threads()
+    with startup.phase("tk_build"):
+        root = build_ui()
+    preview.start()
+    try:
+        root.mainloop()
+    finally:
+        stop()
+
+def run_headless(status_every=5.0):
+    """
+    Capture -> pose -> classifier -> ESP32 without Tk or PIL (edge boxes).
+    Starts in camera mode and dials the link right away; status goes to the
+    log every `status_every` seconds. Stops on Ctrl+C or SIGTERM.
+    """
+    import signal
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    set_manual_mode(False)
+    link.connect()
+    start_threads()
+    try:
+        while running:
+            time.sleep(status_every)
+            log_status()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+
+def main(argv=None):
+    # Uncaught errors in any thread dump the recent log ring to stderr
+    install_excepthook()
+    ap = argparse.ArgumentParser(description="EVA-01 remote link: body tracking -> ESP32")
+    ap.add_argument("--headless", action="store_true",
+                    default=os.environ.get("HEADLESS", "0") == "1",
+                    help="no window: camera mode, status in the log (HEADLESS=1)")
+    ap.add_argument("--status-every", type=float, default=5.0, metavar="S",
+                    help="headless status log interval in seconds (default 5)")
+    args = ap.parse_args(argv)
+    if args.headless:
+        run_headless(args.status_every)
+    else:
+        run_gui()
+
+
+if __name__ == "__main__":
+    main()
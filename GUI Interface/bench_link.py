@@ -0,0 +1,123 @@
+"""
+End-to-end command latency benchmark: LinkManager.publish() -> servo
+applied on the Python ESP32 stand-in (fake_esp32.py), both in-process so
+they share the monotonic clock.
+
+    python bench_link.py                    # binary frames, 2000 commands
+    python bench_link.py --text             # text protocol
+    python bench_link.py --no-acks          # v1 frames, no ack channel
+    python bench_link.py --udp --loss 0.1   # UDP, 10% datagrams dropped
+    python bench_link.py --max-p99-ms 5     # exit 1 if p99 is above 5 ms (CI)
+"""
+import argparse
+import sys
+import threading
+import time
+
+from esp32_link import LinkManager, LinkState
+from fake_esp32 import FakeEsp32
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return float("nan")
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def run(n=2000, binary=True, acks=True, interval=0.0, timeout=1.0,
+        udp=False, loss=0.0):
+    fake = FakeEsp32(binary=binary, acks=acks, udp_loss=loss).start()
+
+    applied = threading.Event()
+    last_left = [None]
+
+    def on_apply(ev):
+        if ev.kind == "left":
+            last_left[0] = ev.value
+            applied.set()
+
+    fake.board.add_apply_listener(on_apply)
+
+    online = threading.Event()
+    link = LinkManager("127.0.0.1", fake.port, binary=binary, acks=acks,
+                       transport="udp" if udp else "tcp")
+    link.add_listener(lambda ev: online.set() if ev.state is LinkState.ONLINE else None)
+    link.connect()
+    if not online.wait(5.0):
+        raise RuntimeError("could not connect to the stand-in server")
+
+    # Wait for the initial "R1,L1" so it isn't counted
+    applied.wait(timeout)
+
+    # Left code cycles 2..5 so every publish changes the command; right stays 1
+    lat = []
+    lost = 0
+    t_start = time.monotonic()
+    for i in range(n):
+        code = 2 + (i % 4)
+        applied.clear()
+        t_pub = time.monotonic()
+        link.publish(str(code), "1")
+        if not applied.wait(timeout) or last_left[0] != code:
+            lost += 1
+            continue
+        lat.append(time.monotonic() - t_pub)
+        if interval:
+            time.sleep(interval)
+    elapsed = time.monotonic() - t_start
+
+    mode = link.mode
+    time.sleep(0.05)                 # let the last acks arrive
+    rtt = link.rtt.snapshot()
+    link.stop()
+    fake.stop()
+
+    lat.sort()
+    return {
+        "mode": mode,
+        "commands": n,
+        "lost": lost,
+        "throughput": len(lat) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(lat, 50) * 1000.0,
+        "p99_ms": percentile(lat, 99) * 1000.0,
+        "max_ms": (lat[-1] * 1000.0) if lat else float("nan"),
+        "rtt": rtt,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="publish -> servo applied latency")
+    ap.add_argument("-n", type=int, default=2000, help="commands to send")
+    ap.add_argument("--text", action="store_true", help="force the text protocol")
+    ap.add_argument("--no-acks", action="store_true", help="v1 frames, no ack channel")
+    ap.add_argument("--udp", action="store_true", help="UDP latest-wins transport")
+    ap.add_argument("--loss", type=float, default=0.0,
+                    help="simulated UDP datagram loss on the stand-in (0..1)")
+    ap.add_argument("--interval", type=float, default=0.0,
+                    help="pause between commands in seconds")
+    ap.add_argument("--max-p99-ms", type=float, default=None,
+                    help="fail (exit 1) when p99 latency exceeds this")
+    args = ap.parse_args()
+
+    r = run(args.n, binary=not args.text, acks=not args.no_acks,
+            interval=args.interval, udp=args.udp, loss=args.loss)
+    print(f"[BENCH] protocol={r['mode']}  commands={r['commands']}  lost={r['lost']}")
+    print(f"[BENCH] throughput={r['throughput']:.0f} cmd/s  "
+          f"p50={r['p50_ms']:.3f} ms  p99={r['p99_ms']:.3f} ms  max={r['max_ms']:.3f} ms")
+    if r["rtt"].count:
+        print(f"[BENCH] acks={r['rtt'].count}  {r['rtt'].summary()}")
+
+    if r["lost"]:
+        print("[BENCH] FAIL: commands were not applied")
+        return 1
+    if args.max_p99_ms is not None and r["p99_ms"] > args.max_p99_ms:
+        print(f"[BENCH] FAIL: p99 {r['p99_ms']:.3f} ms > {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""
+Body gesture / locomotion classifier, independent of the camera and Tk.
+
+Feeds on pose_features vectors and explicit timestamps, so the same engine
+runs live in body_control_thread, offline over a recorded session
+(pose_recording.py) and in benchmarks:
+
+    clf = BodyClassifier()
+    clf.begin_calibration()
+    for f in neutral_frames:
+        clf.add_calibration(f)
+    clf.end_calibration()
+    codeL, codeR = clf.step(f, t)
+    (codeL, nameL), (codeR, nameR) = clf.commands
+
+Locomotion:
+  - Yaw right     -> R4,L1
+  - Yaw left      -> R3,L1
+  - Walk-in-place -> R1,L2   (forward intent)
+  - Lean forward  -> R1,L2   (only if lean_enabled == True)
+  - Lean back     -> R1,L5   (only if lean_enabled == True)
+  - Neutral       -> R1,L1
+
+Right-hand gestures override locomotion:
+  - Right hand raised  -> A,A
+  - Right hand forward -> B,B
+
+State is held in __slots__ with int states, the walk-in-place windows are
+O(1) streaming statistics (stream_stats.py), and step() returns
+preallocated tuples.
+
+Every tunable in DEFAULTS can be overridden per instance:
+BodyClassifier(YAW_ON=0.1, GESTURE_ON_MS=400).
+"""
+from debounce import Evidence, StateHold, visibility_weight
+from hotlog import LOG
+from pose_features import (YAW, LEAN, ROLL, ELEV, FWD, ELBOW, LIFT_L, LIFT_R,
+                           VIS_ARM, VIS_TORSO)
+from smoothing import FrameEma, TimeEma, make_smoother, tau_from_alpha
+from stream_stats import SlidingMax, ZeroCrossings
+
+# Locomotion states, then the gesture overrides: together the outputs
+NEUTRAL, TURN_L, TURN_R, LEAN_L, LEAN_R, FWD_STATE, BACK = range(7)
+OUT_A, OUT_B = 7, 8
+STATES = ("NEUTRAL", "TURN_L", "TURN_R", "LEAN_L", "LEAN_R", "FWD", "BACK")
+OUTPUTS = STATES + ("A", "B")
+
+G_NONE, G_A, G_B = 0, 1, 2
+GESTURES = (None, "A", "B")
+
+# output -> ((codeL, nameL), (codeR, nameR))
+COMMANDS = (
+    (("1", "Neutral"),    ("1", "Neutral")),       # NEUTRAL
+    (("1", "Neutral"),    ("3", "Turn Left")),     # TURN_L
+    (("1", "Neutral"),    ("4", "Turn Right")),    # TURN_R
+    (("3", "Lean Left"),  ("1", "Neutral")),       # LEAN_L -> R1,L3
+    (("4", "Lean Right"), ("1", "Neutral")),       # LEAN_R -> R1,L4
+    (("2", "Forward"),    ("1", "Neutral")),       # FWD
+    (("5", "Back"),       ("1", "Neutral")),       # BACK
+    (("A", "Gesture A (R hand up)"), ("A", "Gesture A (R hand up)")),
+    (("B", "Gesture B (R hand forward)"), ("B", "Gesture B (R hand forward)")),
+)
+# output -> (codeL, codeR)
+CODES = tuple((l[0], r[0]) for l, r in COMMANDS)
+
+NO_POSE_COMMANDS = COMMANDS[NEUTRAL]
+NO_POSE_CODES = CODES[NEUTRAL]
+
+DEFAULTS = {
+    # Signal smoothing (smoothing.py): "ema" = EMA_ALPHA per frame, or the
+    # time-based "time_ema", "one_euro", "kalman"
+    "SMOOTHER": "ema",
+    "EMA_ALPHA": 0.35,
+    "SMOOTH_MIN_CUTOFF": 1.0,   # Hz at rest (one_euro)
+    "SMOOTH_BETA": 10.0,        # extra Hz per unit/s of motion (one_euro)
+    "KALMAN_Q": 1.0,            # motion noise (kalman)
+    "KALMAN_R": 4e-4,           # measurement noise (kalman)
+    "SMOOTH_LEAD_S": 0.0,       # extrapolate ahead by this much (one_euro / kalman)
+
+    # Yaw hysteresis
+    "YAW_ON": 0.08,
+    "YAW_OFF": 0.05,
+
+    # Lean hysteresis
+    "LEAN_ON": 0.12,
+    "LEAN_OFF": 0.08,
+
+    # Flip if directions are backwards (camera mirroring)
+    "YAW_SIGN": 1.0,
+    "LEAN_SIGN": -1.0,
+
+    # Roll (lean left/right) hysteresis (normalized)
+    "ROLL_ON": 0.35,
+    "ROLL_OFF": 0.25,
+    "ROLL_SIGN": -1.0,   # flip if left/right is inverted
+
+    # Right-hand gesture parameters (override locomotion)
+    # Debouncing in ms of capture time (debounce.py); activation is weighted by
+    # visibility, release is not.
+    # 520 / 260 ms keep the old 16 / 8 frames at 30 FPS.
+    "GESTURE_ON_MS": 520,    # must be true this long before activating
+    "GESTURE_OFF_MS": 260,   # must be false this long before releasing
+    "STATE_ON_MS": 0,        # turn / lean / forward must hold this long
+    "STATE_OFF_MS": 0,       # ... and neutral this long before releasing
+    "VIS_MIN": 0.3,          # visibility that counts as no evidence
+    "VIS_FULL": 0.8,         # visibility that counts as full evidence
+
+    "ELEV_UP_MIN": 10,      # degrees (above shoulder line)
+    "ELEV_DOWN_MAX": -15,   # degrees (below shoulder line)
+    "FWD_MIN": 25,          # degrees
+    "RAISE_LOCK": 0.35,     # seconds: ignore forward shortly after a raise
+
+    # Walk-in-place parameters
+    "WIP_WINDOW_S": 1.2,
+    "WIP_MIN_FLIPS": 3,
+    "WIP_AMP_ON": 0.18,
+    "WIP_AMP_OFF": 0.12,
+    "WIP_EMA_ALPHA": 0.30,
+}
+
+
+class BodyClassifier:
+    __slots__ = tuple(DEFAULTS) + (
+        "lean_enabled", "verbose",
+        # Baselines (neutral pose) and calibration sums
+        "yaw0", "lean0", "roll0", "_cal_n", "_cal_yaw", "_cal_lean", "_cal_roll",
+        # Smoothed signals, hysteresis state, last output
+        "yaw_s", "lean_s", "roll_s", "state", "output",
+        # Walk-in-place
+        "_yaw_f", "_lean_f", "_roll_f",
+        "wip_d_s", "wip_active", "_flips", "_amps", "_wip_f",
+        # Right-hand gesture
+        "_ev_a", "_ev_b", "active_gesture", "_last_raise_time",
+        # Debounced locomotion state
+        "_hold",
+    )
+
+    def __init__(self, lean_enabled=False, verbose=False, **params):
+        for name, value in DEFAULTS.items():
+            setattr(self, name, value)
+        for name, value in params.items():
+            if name not in DEFAULTS:
+                raise TypeError(f"unknown classifier parameter {name!r}")
+            setattr(self, name, value)
+        self.lean_enabled = lean_enabled
+        self.verbose = verbose          # sampled arm angles in the hot log
+
+        self.yaw0 = 0.0
+        self.lean0 = 0.0
+        self.roll0 = 0.0
+        self._cal_n = 0
+        self._cal_yaw = self._cal_lean = self._cal_roll = 0.0
+
+        smooth = dict(alpha=self.EMA_ALPHA, min_cutoff=self.SMOOTH_MIN_CUTOFF,
+                      beta=self.SMOOTH_BETA, q=self.KALMAN_Q, r=self.KALMAN_R,
+                      lead=self.SMOOTH_LEAD_S)
+        self._yaw_f = make_smoother(self.SMOOTHER, **smooth)
+        self._lean_f = make_smoother(self.SMOOTHER, **smooth)
+        self._roll_f = make_smoother(self.SMOOTHER, **smooth)
+        # The stepping signal oscillates by design: it only gets an EMA,
+        # per frame in legacy mode and time-based otherwise
+        if self.SMOOTHER == "ema":
+            self._wip_f = FrameEma(self.WIP_EMA_ALPHA)
+        else:
+            self._wip_f = TimeEma(tau_from_alpha(self.WIP_EMA_ALPHA))
+
+        self._flips = ZeroCrossings(self.WIP_WINDOW_S)
+        self._amps = SlidingMax(self.WIP_WINDOW_S)
+        self._last_raise_time = float("-inf")
+
+        self._ev_a = Evidence()
+        self._ev_b = Evidence()
+        self._hold = StateHold(self.STATE_ON_MS / 1000.0, self.STATE_OFF_MS / 1000.0,
+                               neutral=NEUTRAL)
+        self.reset()
+
+    @classmethod
+    def defaults(cls):
+        """Default tunables as a dict."""
+        return dict(DEFAULTS)
+
+    def params(self):
+        """This instance's tunables as a dict (what a recording must store)."""
+        return {name: getattr(self, name) for name in DEFAULTS}
+
+    def reset(self):
+        """Clear filters, hysteresis, walk-in-place and gesture state."""
+        self.yaw_s = None
+        self.lean_s = None
+        self.roll_s = None
+        self._yaw_f.reset()
+        self._lean_f.reset()
+        self._roll_f.reset()
+        self.state = NEUTRAL
+        self.output = NEUTRAL
+
+        self.wip_d_s = None
+        self._wip_f.reset()
+        self.wip_active = False
+        self._flips.clear()
+        self._amps.clear()
+
+        self._ev_a.reset()
+        self._ev_b.reset()
+        self.active_gesture = G_NONE
+        self._hold.reset()
+
+    @property
+    def step_rate(self):
+        """Walk-in-place cadence in steps per second (0 when not stepping)."""
+        return self._flips.cadence() if self.wip_active else 0.0
+
+    @property
+    def commands(self):
+        """((codeL, nameL), (codeR, nameR)) of the last step."""
+        return COMMANDS[self.output]
+
+    # ------------------------------------------------------------
+    # Calibration
+    # ------------------------------------------------------------
+    def begin_calibration(self):
+        """Reset stateful filters so calibration feels immediate."""
+        self.reset()
+        self._cal_n = 0
+        self._cal_yaw = self._cal_lean = self._cal_roll = 0.0
+
+    def add_calibration(self, f):
+        self._cal_n += 1
+        self._cal_yaw += f[YAW]
+        self._cal_lean += f[LEAN]
+        self._cal_roll += f[ROLL]
+
+    def end_calibration(self):
+        """New baselines from the collected frames (kept when there were none)."""
+        n = self._cal_n
+        if n:
+            self.yaw0 = self._cal_yaw / n
+            self.lean0 = self._cal_lean / n
+            self.roll0 = self._cal_roll / n
+        self._cal_n = 0
+        return self.yaw0, self.lean0, self.roll0
+
+    # ------------------------------------------------------------
+    # Per-frame logic
+    # ------------------------------------------------------------
+    def detect_right_hand_gesture(self, f, now):
+        """
+        Returns: G_NONE, G_A or G_B
+        A = right hand raised
+        B = right hand forward (deliberate push)
+        """
+        # Right arm: elevation (points UP), forward (points TOWARD CAMERA)
+        elev, fwd = f[ELEV], f[FWD]
+
+        if self.verbose:
+            LOG.sample("arm", "BodyControl", "elev={:.1f}°  fwd={:.1f}°  elbow={:.1f}°",
+                       elev, fwd, f[ELBOW])
+
+        # Gesture A: RAISE (wins)
+        if elev > self.ELEV_UP_MIN and fwd > self.FWD_MIN:
+            self._last_raise_time = now
+            return G_A
+
+        # Ignore forward shortly after a raise motion
+        if (now - self._last_raise_time) < self.RAISE_LOCK:
+            return G_NONE
+
+        # Gesture B: FORWARD (deliberate push)
+        if elev < self.ELEV_DOWN_MAX and fwd > self.FWD_MIN:
+            return G_B
+
+        return G_NONE
+
+    def update_walk_in_place(self, f, now):
+        # Ankle lift over torso length; NaN when the torso is degenerate
+        liftL = f[LIFT_L]
+        if liftL != liftL:
+            return False
+
+        s = self.wip_d_s = self._wip_f(now, liftL - f[LIFT_R])
+
+        # Each step flips the sign of the left-right lift difference
+        self._amps.push(now, s if s >= 0.0 else -s)
+        self._flips.push(now, s)
+
+        flips = self._flips.count
+        amp_peak = self._amps.value()
+
+        if self.wip_active:
+            if flips < 2 or amp_peak < self.WIP_AMP_OFF:
+                self.wip_active = False
+        else:
+            if flips >= self.WIP_MIN_FLIPS and amp_peak >= self.WIP_AMP_ON:
+                self.wip_active = True
+
+        return self.wip_active
+
+    def _update_gesture(self, g, now, weight):
+        # Seconds of presence (visibility-weighted) / absence (full rate)
+        ev_a, ev_b = self._ev_a, self._ev_b
+        ev_a.update(now, g == G_A, weight)
+        ev_b.update(now, g == G_B, weight)
+
+        # Activate gesture if held long enough
+        on_s = self.GESTURE_ON_MS / 1000.0
+        off_s = self.GESTURE_OFF_MS / 1000.0
+        active = self.active_gesture
+        if active == G_NONE:
+            if ev_a.on >= on_s:
+                active = G_A
+            elif ev_b.on >= on_s:
+                active = G_B
+        # Release gesture when gone long enough
+        elif active == G_A:
+            if ev_a.off >= off_s:
+                active = G_NONE
+        elif ev_b.off >= off_s:
+            active = G_NONE
+        self.active_gesture = active
+        return active
+
+    def _update_state(self, wip):
+        state = self.state
+        yaw_s, roll_s = self.yaw_s, self.roll_s
+
+        # Decide state (priority: yaw > roll > WIP > lean(if enabled))
+        # 1) Turning
+        if state == TURN_L or state == TURN_R:
+            if abs(yaw_s) < self.YAW_OFF:
+                return NEUTRAL
+            return TURN_R if yaw_s > 0 else TURN_L
+        if abs(yaw_s) > self.YAW_ON:
+            return TURN_R if yaw_s > 0 else TURN_L
+
+        # 2) Roll (lean left/right)
+        if state == LEAN_L or state == LEAN_R:
+            if abs(roll_s) < self.ROLL_OFF:
+                return NEUTRAL
+            return LEAN_R if roll_s > 0 else LEAN_L
+        if abs(roll_s) > self.ROLL_ON:
+            return LEAN_R if roll_s > 0 else LEAN_L
+
+        # 3) Walk-in-place
+        if wip:
+            return FWD_STATE
+
+        # 4) Lean forward/back (optional)
+        if not self.lean_enabled:
+            return NEUTRAL
+        lean_s = self.lean_s
+        if state == FWD_STATE or state == BACK:
+            if abs(lean_s) < self.LEAN_OFF:
+                return NEUTRAL
+            return BACK if lean_s > 0 else FWD_STATE
+        if abs(lean_s) > self.LEAN_ON:
+            return BACK if lean_s > 0 else FWD_STATE
+        return NEUTRAL
+
+    def step(self, f, now):
+        """
+        One frame: f is a pose_features vector (list or array), now the frame
+        time in seconds. Returns (codeL, codeR); names are in .commands.
+        """
+        # Right-hand gesture override (A,A / B,B) skips locomotion
+        vis = visibility_weight(f[VIS_ARM], self.VIS_MIN, self.VIS_FULL)
+        g = self._update_gesture(self.detect_right_hand_gesture(f, now), now, vis)
+        if g != G_NONE:
+            self.output = OUT_A if g == G_A else OUT_B
+            return CODES[self.output]
+
+        # Locomotion (yaw / wip / optional lean)
+        self.yaw_s = self._yaw_f(now, f[YAW] - self.yaw0)
+        self.lean_s = self._lean_f(now, f[LEAN] - self.lean0)
+        self.roll_s = self._roll_f(now, f[ROLL] - self.roll0)
+
+        wip = self.update_walk_in_place(f, now)
+        vis = visibility_weight(f[VIS_TORSO], self.VIS_MIN, self.VIS_FULL)
+        self.state = self.output = self._hold.update(now, self._update_state(wip), vis)
+        return CODES[self.state]
@@ -0,0 +1,131 @@
+"""
+Low-latency camera capture.
+
+OpenCV's default VideoCapture keeps a few frames queued in the driver, so a
+plain read() can hand out an image that is several frame intervals old.
+CameraCapture asks for a 1-frame buffer where the backend supports it and
+drains whatever is still queued with grab() before retrieve()-ing the
+newest image, stamping it with the time the grab returned.
+"""
+import time
+
+import cv2
+
+FOURCCS = ("MJPG", "YUYV")
+
+
+class CaptureConfig:
+    def __init__(self, device=0, width=640, height=360, fps=30,
+                 fourcc="MJPG", buffer_size=1, drain=True, api=cv2.CAP_ANY):
+        self.device = device            # 0 = built-in, 1 = external, ...
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc            # "MJPG", "YUYV" or None (driver default)
+        self.buffer_size = buffer_size  # driver queue length, None = leave it
+        self.drain = drain              # grab() stale frames before retrieve()
+        self.api = api                  # cv2.CAP_V4L2 / CAP_DSHOW / CAP_MSMF ...
+
+    @classmethod
+    def from_env(cls, env, **defaults):
+        """CAMERA_INDEX / CAMERA_WIDTH / ... override the given defaults."""
+        cfg = cls(**defaults)
+        if "CAMERA_INDEX" in env:
+            cfg.device = int(env["CAMERA_INDEX"])
+        if "CAMERA_WIDTH" in env:
+            cfg.width = int(env["CAMERA_WIDTH"])
+        if "CAMERA_HEIGHT" in env:
+            cfg.height = int(env["CAMERA_HEIGHT"])
+        if "CAMERA_FPS" in env:
+            cfg.fps = float(env["CAMERA_FPS"])
+        if "CAMERA_FOURCC" in env:
+            cfg.fourcc = env["CAMERA_FOURCC"].upper() or None
+        if "CAMERA_BUFFER" in env:
+            cfg.buffer_size = int(env["CAMERA_BUFFER"]) or None
+        return cfg
+
+    def __repr__(self):
+        return (f"CaptureConfig(device={self.device}, {self.width}x{self.height}"
+                f"@{self.fps}, fourcc={self.fourcc}, buffer={self.buffer_size}, "
+                f"drain={self.drain})")
+
+
+def _fourcc_str(v):
+    v = int(v)
+    return "".join(chr((v >> (8 * i)) & 0xFF) for i in range(4)).strip("\0")
+
+
+class CameraCapture:
+    # A grab() that returns faster than this fraction of the frame interval
+    # came out of the driver queue instead of waiting for the sensor
+    QUEUED_FRACTION = 0.25
+    MAX_DRAIN = 4
+
+    def __init__(self, config):
+        self.config = config
+        self.cap = None
+        self.actual = {}
+        self.drained = 0
+        self._frame_interval = 1.0 / config.fps if config.fps else 1.0 / 30
+
+    def open(self):
+        cfg = self.config
+        self.cap = cv2.VideoCapture(cfg.device, cfg.api)
+        if not self.cap.isOpened():
+            return False
+
+        # FOURCC first: some drivers only accept the size/fps after it
+        if cfg.fourcc:
+            if cfg.fourcc not in FOURCCS:
+                raise ValueError(f"unsupported fourcc {cfg.fourcc!r}, use one of {FOURCCS}")
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*cfg.fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, cfg.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cfg.height)
+        if cfg.fps:
+            self.cap.set(cv2.CAP_PROP_FPS, cfg.fps)
+        if cfg.buffer_size:
+            # Not every backend honours it; the drain below covers the rest
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, cfg.buffer_size)
+
+        self.actual = {
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": self.cap.get(cv2.CAP_PROP_FPS),
+            "fourcc": _fourcc_str(self.cap.get(cv2.CAP_PROP_FOURCC)),
+            "buffer": int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+        if self.actual["fps"] and self.actual["fps"] > 0:
+            self._frame_interval = 1.0 / self.actual["fps"]
+        return True
+
+    def read(self, out=None):
+        """
+        Returns (ok, frame, t_capture). frame is `out` when the backend could
+        decode into it. t_capture is time.monotonic() when the newest frame
+        was grabbed.
+        """
+        cap = self.cap
+        t0 = time.monotonic()
+        if not cap.grab():
+            return False, None, 0.0
+        t_capture = time.monotonic()
+
+        if self.config.drain:
+            threshold = self._frame_interval * self.QUEUED_FRACTION
+            n = 0
+            # Fast grab = it was queued; keep grabbing until one has to wait
+            while t_capture - t0 < threshold and n < self.MAX_DRAIN:
+                t0 = t_capture
+                if not cap.grab():
+                    break
+                t_capture = time.monotonic()
+                n += 1
+            self.drained += n
+
+        ok, frame = cap.retrieve(out) if out is not None else cap.retrieve()
+        return ok, frame, t_capture
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
@@ -0,0 +1,107 @@
+"""
+Time-based debouncing for the body classifier.
+
+Evidence is counted in seconds of capture time, not frames, so a gesture
+needs the same sustained hold at 10 FPS as at 60 FPS. Each frame credits
+the time since the previous frame, capped at max_dt so a stalled camera
+cannot activate anything in one jump. The first frame after a reset has
+no predecessor and credits the last interval seen (first_dt before any),
+so N frames always count as N intervals.
+
+Only activation is scaled by the 0..1 confidence weight (landmark
+visibility): a poorly seen limb is slow to trigger something, but release
+always runs at full speed, so losing sight of an arm can't latch a gesture.
+
+Evidence        seconds a boolean condition has been continuously present
+                (.on, weighted) or absent (.off)
+StateHold       a multi-valued state that changes only after the new
+                candidate has been sustained for enter_s (weighted), or
+                exit_s when going back to neutral
+"""
+
+
+def visibility_weight(vis, lo=0.3, hi=0.8):
+    """0 below `lo`, 1 above `hi`, linear in between."""
+    if vis <= lo:
+        return 0.0
+    if vis >= hi:
+        return 1.0
+    return (vis - lo) / (hi - lo)
+
+
+def _step(t, last_t, last_dt, max_dt):
+    """Seconds to credit for a frame at t: (dt, dt to remember)."""
+    if last_t is None:
+        return last_dt, last_dt
+    dt = t - last_t
+    if dt > max_dt:
+        dt = max_dt
+    elif dt < 0.0:
+        dt = 0.0
+    return dt, dt
+
+
+class Evidence:
+    __slots__ = ("max_dt", "on", "off", "_t", "_dt")
+
+    def __init__(self, max_dt=0.2, first_dt=1.0 / 30.0):
+        self.max_dt = max_dt
+        self._dt = first_dt
+        self.reset()
+
+    def reset(self):
+        self.on = 0.0
+        self.off = 0.0
+        self._t = None
+
+    def update(self, t, present, weight=1.0):
+        dt, self._dt = _step(t, self._t, self._dt, self.max_dt)
+        self._t = t
+        if present:
+            self.on += dt * weight
+            self.off = 0.0
+        else:
+            self.off += dt
+            self.on = 0.0
+
+
+class StateHold:
+    __slots__ = ("enter_s", "exit_s", "neutral", "max_dt", "state", "_cand", "_ev",
+                 "_t", "_dt")
+
+    def __init__(self, enter_s=0.0, exit_s=0.0, neutral=0, max_dt=0.2, first_dt=1.0 / 30.0):
+        self.enter_s = enter_s
+        self.exit_s = exit_s
+        self.neutral = neutral
+        self.max_dt = max_dt
+        self._dt = first_dt
+        self.reset()
+
+    def reset(self):
+        self.state = self.neutral
+        self._cand = self.neutral
+        self._ev = 0.0
+        self._t = None
+
+    def update(self, t, candidate, weight=1.0):
+        """Returns the (possibly unchanged) held state."""
+        dt, self._dt = _step(t, self._t, self._dt, self.max_dt)
+        self._t = t
+
+        if candidate == self.state:
+            self._cand = candidate
+            self._ev = 0.0
+            return self.state
+        if candidate != self._cand:
+            self._cand = candidate
+            self._ev = 0.0
+        if candidate == self.neutral:
+            self._ev += dt
+            hold = self.exit_s
+        else:
+            self._ev += dt * weight
+            hold = self.enter_s
+        if self._ev >= hold:
+            self.state = candidate
+            self._ev = 0.0
+        return self.state
@@ -0,0 +1,486 @@
+"""
+Asyncio link manager for the ESP32 avatar.
+
+One event loop (running on its own daemon thread) owns the socket:
+  - publish() wakes the sender immediately, no poll tick
+  - lost links are retried with jittered exponential backoff
+  - state changes are delivered to listeners as LinkEvent objects
+  - the binary frame protocol is negotiated per connection, text otherwise
+  - with v2 frames every command is acked and RTT lands in self.rtt
+  - transport="udp" sends the same frames as datagrams: latest-wins, the
+    current state is resent periodically and the board drops stale seqs
+  - an optional tracer (latency_trace.LatencyTracer) gets every new
+    command's send time and its ack, for glass-to-servo latency
+
+Several robots: link_pool.LinkPool runs one LinkManager per board.
+"""
+import asyncio
+import random
+import socket
+import threading
+import time
+from enum import Enum
+
+import protocol
+from hotlog import LOG
+from rtt_stats import RttTracker
+
+
+class LinkState(Enum):
+    OFFLINE = "OFFLINE"
+    CONNECTING = "CONNECTING"
+    ONLINE = "ONLINE"
+    BACKOFF = "BACKOFF"
+
+
+class LinkEvent:
+    __slots__ = ("state", "attempt", "delay", "error", "t", "link")
+
+    def __init__(self, state, attempt=0, delay=0.0, error=None, link=None):
+        self.state = state
+        self.attempt = attempt
+        self.delay = delay
+        self.error = error
+        self.t = time.monotonic()
+        self.link = link             # the LinkManager that emitted it
+
+    def __repr__(self):
+        return (f"LinkEvent({self.state.value}, attempt={self.attempt}, "
+                f"delay={self.delay:.2f}, error={self.error!r})")
+
+
+def backoff_delay(attempt, base=0.1, cap=3.0):
+    """
+    "Full jitter" backoff: uniform in [base/2, min(cap, base * 2^attempt)].
+    Keeps the first retries fast (Wi-Fi blips) without synchronising
+    several GUIs hammering the same board.
+    """
+    hi = min(cap, base * (2 ** attempt))
+    return random.uniform(base * 0.5, max(hi, base * 0.5))
+
+
+class LinkManager:
+    def __init__(self, host, port, connect_timeout=2.0,
+                 backoff_base=0.1, backoff_cap=3.0, name="ESP32",
+                 binary=True, acks=True, hello_timeout=1.0,
+                 transport="tcp", udp_resend_interval=0.1, udp_timeout=1.0,
+                 tracer=None):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.name = name
+        self.binary = binary
+        self.acks = acks
+        self.hello_timeout = hello_timeout
+        self.transport = transport            # "tcp" | "udp"
+        self.udp_resend_interval = udp_resend_interval
+        self.udp_timeout = udp_timeout
+        self.rtt = RttTracker()
+        self.tracer = tracer         # .sent(trace, seq, t, labels, expect_ack) / .acked(seq, rtt)
+
+        self._loop = None
+        self._thread = None
+        self._task = None
+        self._cancelled = False
+        self._wake = None            # asyncio.Event, created on the loop
+        self._started = threading.Event()
+
+        self._cmd_lock = threading.Lock()
+        self._latest = ("1", "1")    # (L, R)
+        self._latest_trace = None    # what produced _latest (tracer only)
+
+        self._listeners = []
+        self._want_connected = False
+        self.state = LinkState.OFFLINE
+
+        # None = not negotiated yet. Only a peer that answered HELLO with
+        # "OK TEXT" or something else is text-only for good; a timeout may
+        # just be a Wi-Fi stall, so the next connection offers frames again.
+        self._peer_binary = None
+        self.frame_version = 0       # 0 = text protocol
+        self._seq = 0
+        self._last_ack_t = 0.0
+
+        # Written by the link thread only; read by the metrics exporter
+        self.sends = 0               # frames / lines handed to the socket
+        self.send_errors = 0         # failed writes, ICMP errors on UDP
+
+    # ------------------------------------------------------------
+    # Public API (thread-safe)
+    # ------------------------------------------------------------
+    @property
+    def connected(self):
+        return self.state is LinkState.ONLINE
+
+    @property
+    def mode(self):
+        proto = f"binary v{self.frame_version}" if self.frame_version else "text"
+        return f"udp {proto}" if self.transport == "udp" else proto
+
+    @property
+    def wanted(self):
+        """True while the user asked for a link (even during backoff)."""
+        return self._want_connected
+
+    def add_listener(self, callback):
+        """callback(LinkEvent) is called from the link thread; keep it short."""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._thread_main,
+                                        name=f"{self.name.lower()}-link", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._want_connected = False
+        self._loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join(timeout=2.0)
+
+    def connect(self):
+        self.start()
+        self._want_connected = True
+        self._loop.call_soon_threadsafe(self._ensure_running)
+
+    def disconnect(self):
+        self._want_connected = False
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cancel_running)
+
+    def reconnect(self):
+        """Drop the current link and dial again (e.g. after changing transport)."""
+        if self._loop is None or not self._want_connected:
+            return
+
+        def restart():
+            self._cancel_running()
+            self._ensure_running()
+
+        self._loop.call_soon_threadsafe(restart)
+
+    def publish(self, L, R, trace=None):
+        """
+        Latest-wins command update. Wakes the sender only on change.
+        `trace` is handed to the tracer when this command goes out.
+        """
+        with self._cmd_lock:
+            if self._latest == (L, R):
+                return
+            self._latest = (L, R)
+            self._latest_trace = trace
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # ------------------------------------------------------------
+    # Loop thread
+    # ------------------------------------------------------------
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._wake = asyncio.Event()
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def _shutdown(self):
+        self._cancel_running()
+        self._loop.call_later(0.05, self._loop.stop)
+
+    def _ensure_running(self):
+        task = self._task
+        if task is not None and not task.done():
+            if self._cancelled:
+                # Still unwinding a disconnect: dial again once it is gone
+                task.add_done_callback(lambda _: self._ensure_running())
+            return
+        if self._want_connected:
+            self._cancelled = False
+            self._task = self._loop.create_task(self._run())
+
+    def _cancel_running(self):
+        if self._task is not None and not self._task.done():
+            self._cancelled = True
+            self._task.cancel()
+
+    def _trace_reported(self, trace):
+        """
+        A trace is reported once. The first send of a new session repeats
+        the last command, and its frame may predate the whole outage.
+        """
+        with self._cmd_lock:
+            if self._latest_trace is trace:
+                self._latest_trace = None
+
+    def _emit(self, state, **info):
+        self.state = state
+        ev = LinkEvent(state, link=self, **info)
+        for cb in list(self._listeners):
+            try:
+                cb(ev)
+            except Exception as e:
+                LOG.warning("LINK", "Listener error: {}", e)
+
+    async def _run(self):
+        try:
+            if self.transport == "udp":
+                await self._run_udp()
+            else:
+                await self._run_tcp()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._emit(LinkState.OFFLINE)
+
+    async def _run_tcp(self):
+        attempt = 0
+        while self._want_connected:
+            self._emit(LinkState.CONNECTING, attempt=attempt + 1)
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port),
+                    timeout=self.connect_timeout,
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                attempt += 1
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                self._emit(LinkState.BACKOFF, attempt=attempt, delay=delay,
+                           error=e)
+                await asyncio.sleep(delay)
+                continue
+
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            attempt = 0
+            try:
+                self.frame_version = await self._negotiate(reader, writer)
+            except OSError as e:
+                err = e
+                writer.close()
+            else:
+                self._emit(LinkState.ONLINE)
+                err = await self._session(reader, writer)
+
+            if self._want_connected:
+                attempt = 1
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                self._emit(LinkState.BACKOFF, attempt=attempt, delay=delay,
+                           error=err)
+                await asyncio.sleep(delay)
+
+    async def _negotiate(self, reader, writer):
+        """
+        Offer binary frames (v2 = with acks). Returns the frame version the
+        peer picked, 0 for text. Without an answer in time (old firmware,
+        or a stalled link) this connection stays text: the board only
+        switches to frames once we confirm, so a late "OK BIN" is harmless.
+        """
+        if not self.binary or self._peer_binary is False:
+            return 0
+
+        versions = [protocol.FRAME_V2, protocol.FRAME_V1] if self.acks else [protocol.FRAME_V1]
+        writer.write(protocol.hello(versions))
+        await writer.drain()
+        try:
+            reply = await asyncio.wait_for(reader.readline(), self.hello_timeout)
+        except asyncio.TimeoutError:
+            reply = None
+
+        if reply == b"":
+            raise ConnectionError("closed during protocol negotiation")
+        if reply is None:
+            LOG.info("LINK", "{}: no answer to HELLO in {:.1f}s, text protocol for now",
+                     self.name, self.hello_timeout)
+            return 0
+        version = protocol.parse_hello_ok(reply)
+        if version not in versions:
+            self._peer_binary = False       # "OK TEXT", or not a HELLO answer
+            return 0
+        self._peer_binary = True
+        writer.write(protocol.hello_use(version))
+        return version
+
+    async def _session(self, reader, writer):
+        """Runs sender + receiver until either fails. Returns the error (or None)."""
+        sender = asyncio.ensure_future(self._sender(writer))
+        receiver = asyncio.ensure_future(self._receiver(reader))
+        err = None
+        try:
+            done, _ = await asyncio.wait({sender, receiver},
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if not t.cancelled() and t.exception() is not None:
+                    err = t.exception()
+        finally:
+            for t in (sender, receiver):
+                t.cancel()
+            self.rtt.link_lost()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, asyncio.CancelledError):
+                pass
+        return err
+
+    async def _sender(self, writer):
+        prev = None
+        while True:
+            # Clear before snapshotting so a publish() racing with the
+            # write below re-arms the event instead of being lost.
+            self._wake.clear()
+            with self._cmd_lock:
+                cur = self._latest
+                trace = self._latest_trace
+
+            # Always send on a fresh link, then only on change
+            if cur != prev:
+                try:
+                    if self.frame_version == protocol.FRAME_V2:
+                        self._seq = (self._seq + 1) & 0xFFFF
+                        t = time.monotonic()
+                        writer.write(protocol.encode_frame(
+                            self._seq, *cur, version=protocol.FRAME_V2,
+                            t_us=int(t * 1e6)))
+                        self.rtt.sent(self._seq, t)
+                    elif self.frame_version:
+                        self._seq = (self._seq + 1) & 0xFFFF
+                        writer.write(protocol.encode_frame(self._seq, *cur))
+                    else:
+                        writer.write(protocol.encode_text(*cur))
+                    await writer.drain()
+                except OSError:
+                    self.send_errors += 1
+                    raise
+                self.sends += 1
+                if self.tracer is not None and trace is not None:
+                    self.tracer.sent(trace, self._seq if self.frame_version else None,
+                                     time.monotonic(), cur,
+                                     self.frame_version == protocol.FRAME_V2)
+                    self._trace_reported(trace)
+                prev = cur
+
+            await self._wake.wait()
+
+    async def _receiver(self, reader):
+        acks = protocol.AckDecoder() if self.frame_version == protocol.FRAME_V2 else None
+        while True:
+            data = await reader.read(1024)
+            if not data:
+                LOG.info("LINK", "{} closed the connection", self.name)
+                return
+            if acks is None:
+                continue
+            now_us = int(time.monotonic() * 1e6)
+            for ack in acks.feed(data):
+                rtt_us = (now_us - ack.t_us) & 0xFFFFFFFF
+                self.rtt.acked(ack.seq, rtt_us / 1e6)
+                if self.tracer is not None:
+                    self.tracer.acked(ack.seq, rtt_us / 1e6)
+
+    # ------------------------------------------------------------
+    # UDP transport
+    # ------------------------------------------------------------
+    async def _run_udp(self):
+        """
+        No handshake: frames are self-describing. With acks (v2) the link is
+        ONLINE while acks keep coming; without them it is ONLINE as soon as
+        the socket exists, since there is nothing to listen to.
+        """
+        self.frame_version = protocol.FRAME_V2 if self.acks else protocol.FRAME_V1
+        attempt = 0
+        while self._want_connected:
+            self._emit(LinkState.CONNECTING, attempt=attempt + 1)
+            try:
+                transport, _ = await self._loop.create_datagram_endpoint(
+                    lambda: _AckDatagramProtocol(self),
+                    remote_addr=(self.host, self.port),
+                )
+            except OSError as e:
+                attempt += 1
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                self._emit(LinkState.BACKOFF, attempt=attempt, delay=delay, error=e)
+                await asyncio.sleep(delay)
+                continue
+
+            attempt = 0
+            if self.frame_version == protocol.FRAME_V1:
+                self._emit(LinkState.ONLINE)
+            try:
+                await self._udp_sender(transport)
+            finally:
+                transport.close()
+                self.rtt.link_lost()
+
+    async def _udp_sender(self, transport):
+        cur = None
+        while True:
+            self._wake.clear()
+            with self._cmd_lock:
+                latest = self._latest
+                trace = self._latest_trace
+
+            # A changed command gets a new seq; a periodic resend repeats the
+            # seq so the board treats it as a duplicate (no second A press)
+            new = latest != cur
+            if new:
+                cur = latest
+                self._seq = (self._seq + 1) & 0xFFFF
+
+            t = time.monotonic()
+            if self.frame_version == protocol.FRAME_V2:
+                transport.sendto(protocol.encode_frame(
+                    self._seq, *cur, version=protocol.FRAME_V2, t_us=int(t * 1e6)))
+                self.rtt.sent(self._seq, t)
+            else:
+                transport.sendto(protocol.encode_frame(self._seq, *cur))
+            self.sends += 1
+            if new and self.tracer is not None and trace is not None:
+                self.tracer.sent(trace, self._seq, t, cur,
+                                 self.frame_version == protocol.FRAME_V2)
+                self._trace_reported(trace)
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.udp_resend_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            if (self.frame_version == protocol.FRAME_V2
+                    and self.state is LinkState.ONLINE
+                    and time.monotonic() - self._last_ack_t > self.udp_timeout):
+                self._emit(LinkState.CONNECTING, error=TimeoutError("no acks"))
+
+    def _on_udp_ack(self, data):
+        try:
+            ack = protocol.decode_ack(data)
+        except protocol.FrameError:
+            return
+        now = time.monotonic()
+        rtt = ((int(now * 1e6) - ack.t_us) & 0xFFFFFFFF) / 1e6
+        self.rtt.acked(ack.seq, rtt)
+        if self.tracer is not None:
+            self.tracer.acked(ack.seq, rtt)
+        self._last_ack_t = now
+        if self.state is not LinkState.ONLINE:
+            self._emit(LinkState.ONLINE)
+
+
+class _AckDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, link):
+        self.link = link
+
+    def datagram_received(self, data, addr):
+        self.link._on_udp_ack(data)
+
+    def error_received(self, exc):
+        # ICMP unreachable while the board reboots: the resend loop and the
+        # ack timeout already cover it, don't spam the console at 10 Hz
+        self.link.send_errors += 1
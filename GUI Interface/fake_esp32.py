@@ -0,0 +1,398 @@
+"""
+Pure-Python stand-in for Esp32Server.ino.
+
+Speaks the same protocols (TCP: text lines, HELLO negotiation, v1/v2
+binary frames and v2 acks; UDP: one frame per datagram on the same port)
+and emulates what the board does with each command:
+  - parseRL semantics (String::toInt, codes 0 leave the arm alone)
+  - handleGestureCommand: A presses every time, B presses on both edges
+  - GestureSequencer: presses are ignored while the 1000 ms press runs
+  - pktCount / pktRate, refreshed every second like serviceUI()
+
+Every servo write is reported to apply listeners with a monotonic
+timestamp, which is what bench_link.py measures against.
+
+Run standalone:  python fake_esp32.py --port 12345
+and point the GUI at it with ESP32_IP=127.0.0.1.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import protocol
+
+# Same presets as the firmware
+LEFT_PRESETS = {1: (90, 90), 2: (65, 55), 3: (140, 40), 4: (40, 140), 5: (135, 115)}
+RIGHT_PRESETS = {1: (90, 90), 2: (125, 125), 3: (160, 30), 4: (30, 160), 5: (65, 65)}
+
+G_HOME = (90, 150)
+G_A = (70, 180)
+G_B = (110, 180)
+
+GESTURE_PRESS_MS = 1000
+
+
+def clamp_deg(x):
+    return max(0, min(180, x))
+
+
+class ApplyEvent:
+    __slots__ = ("kind", "value", "t")
+
+    def __init__(self, kind, value, t):
+        self.kind = kind      # "left", "right", "gesture", "release"
+        self.value = value    # preset code, or "A" / "B" for gestures
+        self.t = t
+
+    def __repr__(self):
+        return f"ApplyEvent({self.kind}, {self.value!r}, t={self.t:.6f})"
+
+
+class GestureSequencer:
+    """Non-blocking press/release, evaluated lazily against the clock."""
+
+    def __init__(self, board, press_ms=GESTURE_PRESS_MS):
+        self.board = board
+        self.press_s = press_ms / 1000.0
+        self.t0 = None
+
+    def start_press(self, angles, value):
+        self.board.move_gesture(angles, value)
+        self.t0 = time.monotonic()
+
+    def update(self):
+        if self.t0 is not None and time.monotonic() - self.t0 >= self.press_s:
+            self.board.move_gesture(G_HOME, None)
+            self.t0 = None
+
+    def busy(self):
+        self.update()
+        return self.t0 is not None
+
+
+class FakeBoard:
+    """Servo / gesture / stats state of one ESP32, no networking."""
+
+    def __init__(self, press_ms=GESTURE_PRESS_MS):
+        self.left = LEFT_PRESETS[1]
+        self.right = RIGHT_PRESETS[1]
+        self.gesture = G_HOME
+        self.gseq = GestureSequencer(self, press_ms)
+
+        self.last_cmd = "-"
+        self.last_gesture_info = "-"
+        self._last_b = False
+
+        self.pkt_count = 0
+        self.pkt_rate = 0
+        self._pkt_count_last = 0
+        self._last_rate_tick = time.monotonic()
+        self.last_pkt_t = 0.0
+
+        self._listeners = []
+
+    def add_apply_listener(self, callback):
+        """callback(ApplyEvent), called from the server thread."""
+        self._listeners.append(callback)
+
+    def _applied(self, kind, value):
+        ev = ApplyEvent(kind, value, time.monotonic())
+        for cb in self._listeners:
+            cb(ev)
+
+    # ------------------------------------------------------------
+    # Servo helpers (applyLeftGesture / applyRightGesture / moveGesture)
+    # ------------------------------------------------------------
+    def apply_left(self, g):
+        if g in LEFT_PRESETS:
+            self.left = tuple(clamp_deg(a) for a in LEFT_PRESETS[g])
+            self._applied("left", g)
+
+    def apply_right(self, g):
+        if g in RIGHT_PRESETS:
+            self.right = tuple(clamp_deg(a) for a in RIGHT_PRESETS[g])
+            self._applied("right", g)
+
+    def move_gesture(self, angles, value):
+        self.gesture = tuple(clamp_deg(a) for a in angles)
+        self._applied("gesture" if value else "release", value)
+
+    # ------------------------------------------------------------
+    # Command handling
+    # ------------------------------------------------------------
+    def service(self):
+        """serviceUI() + gseq.update() from the firmware loop."""
+        now = time.monotonic()
+        if now - self._last_rate_tick >= 1.0:
+            self._last_rate_tick = now
+            self.pkt_rate = self.pkt_count - self._pkt_count_last
+            self._pkt_count_last = self.pkt_count
+        self.gseq.update()
+
+    def handle_gesture(self, is_a, is_b):
+        if is_a:
+            self.last_gesture_info = "A"
+        elif is_b:
+            self.last_gesture_info = "B"
+        else:
+            self.last_gesture_info = "-"
+
+        if self.gseq.busy():
+            self._last_b = is_b
+            return
+
+        if is_a:
+            self.gseq.start_press(G_A, "A")
+            return
+
+        if is_b != self._last_b:
+            self.gseq.start_press(G_B, "B")
+            self.last_gesture_info = "B(edge)"
+
+        self._last_b = is_b
+
+    def handle_line(self, line):
+        """One trimmed, non-empty text command (already past negotiation)."""
+        self.last_cmd = line
+        self.pkt_count += 1
+        self.last_pkt_t = time.monotonic()
+
+        self.handle_gesture(line == "A,A", line == "B,B")
+
+        parsed = protocol.decode_text(line)
+        if parsed is not None and parsed[0] not in ("A", "B"):
+            gL, gR = int(parsed[0]), int(parsed[1])
+            if gL != 0:
+                self.apply_left(gL)
+            if gR != 0:
+                self.apply_right(gR)
+
+    def handle_frame(self, cmd):
+        is_a = bool(cmd.flags & protocol.FLAG_GESTURE_A)
+        is_b = bool(cmd.flags & protocol.FLAG_GESTURE_B)
+        if is_a:
+            self.last_cmd = "A,A"
+        elif is_b:
+            self.last_cmd = "B,B"
+        else:
+            self.last_cmd = f"R{cmd.right},L{cmd.left}"
+        self.pkt_count += 1
+        self.last_pkt_t = time.monotonic()
+
+        self.handle_gesture(is_a, is_b)
+        if cmd.left != 0:
+            self.apply_left(cmd.left)
+        if cmd.right != 0:
+            self.apply_right(cmd.right)
+
+    def status_line(self, gui_connected):
+        return (f"GUI: {'ON ' if gui_connected else 'OFF'} {self.pkt_rate}/s  "
+                f"CMD: {self.last_cmd}  GEST: {self.last_gesture_info}  "
+                f"S5:{self.gesture[0]} S6:{self.gesture[1]}")
+
+
+class FakeEsp32:
+    """
+    TCP server around a FakeBoard. Like the firmware it serves one GUI at a
+    time; later clients wait until the current one disconnects.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, binary=True, acks=True,
+                 press_ms=GESTURE_PRESS_MS, udp=True, udp_loss=0.0, hello_delay=0.0):
+        self.host = host
+        self.port = port
+        self.binary = binary
+        self.acks = acks
+        self.hello_delay = hello_delay    # simulated stall before "OK BIN<n>"
+        self.board = FakeBoard(press_ms)
+        self.gui_connected = False
+
+        self.udp = udp
+        self.udp_loss = udp_loss      # simulated datagram loss, 0..1
+        self.udp_stale = 0
+        self.udp_dups = 0
+        self._udp_peer = None
+        self._udp_last_seq = None
+        self._udp_last_t = 0.0
+        self._udp_transport = None
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._client_lock = None
+
+    def start(self):
+        """Start on a background thread; returns once the port is bound."""
+        self._thread = threading.Thread(target=self._thread_main,
+                                        name="fake-esp32", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2.0)
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._client_lock = asyncio.Lock()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_client, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.udp:
+            self._udp_transport, _ = self._loop.run_until_complete(
+                self._loop.create_datagram_endpoint(
+                    lambda: _FakeUdpProtocol(self), local_addr=(self.host, self.port))
+            )
+        self._loop.create_task(self._service_task())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            if self._udp_transport is not None:
+                self._udp_transport.close()
+            pending = asyncio.all_tasks(self._loop)
+            for t in pending:
+                t.cancel()
+            self._loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    async def _service_task(self):
+        while True:
+            self.board.service()
+            await asyncio.sleep(0.01)
+
+    async def _handle_client(self, reader, writer):
+        async with self._client_lock:
+            self.gui_connected = True
+            try:
+                await self._serve(reader, writer)
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                self.gui_connected = False
+                writer.close()
+
+    def _supported_versions(self):
+        if not self.binary:
+            return ()
+        if self.acks:
+            return (protocol.FRAME_V2, protocol.FRAME_V1)
+        return (protocol.FRAME_V1,)
+
+    async def _serve(self, reader, writer):
+        board = self.board
+        offered = 0
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            board.service()
+            line = line.decode(errors="ignore").strip()
+            if not line:
+                continue
+            hello = protocol.parse_hello(line) if self.binary else None
+            if hello is not None:
+                supported = self._supported_versions()
+                offered = next((v for v in hello if v in supported), 0)
+                if self.hello_delay:
+                    await asyncio.sleep(self.hello_delay)
+                writer.write(protocol.hello_ok(offered))
+                await writer.drain()
+                continue
+            # Frames only once the GUI confirms the version we offered
+            if offered and protocol.parse_hello_use(line) == offered:
+                break
+            board.handle_line(line)
+
+        decoder = protocol.FrameDecoder()
+        while True:
+            data = await reader.read(256)
+            if not data:
+                return
+            board.service()
+            for cmd in decoder.feed(data):
+                board.handle_frame(cmd)
+                if cmd.version == protocol.FRAME_V2:
+                    writer.write(protocol.encode_ack(cmd.seq, cmd.t_us))
+
+
+    def _on_datagram(self, data, addr):
+        if self.udp_loss and random.random() < self.udp_loss:
+            return
+        try:
+            cmd = protocol.decode_frame(data)
+        except protocol.FrameError:
+            return
+
+        # New sender (GUI restarted / new socket) or long silence: its seq
+        # numbering starts over
+        now = time.monotonic()
+        if addr != self._udp_peer or now - self._udp_last_t > 2.0:
+            self._udp_peer = addr
+            self._udp_last_seq = None
+        self._udp_last_t = now
+
+        last = self._udp_last_seq
+        if last is None or protocol.seq_newer(cmd.seq, last):
+            self._udp_last_seq = cmd.seq
+            self.board.service()
+            self.board.handle_frame(cmd)
+        elif cmd.seq == last:
+            self.udp_dups += 1          # periodic resend: ack, don't re-apply
+        else:
+            self.udp_stale += 1
+            return
+
+        if cmd.version == protocol.FRAME_V2:
+            self._udp_transport.sendto(protocol.encode_ack(cmd.seq, cmd.t_us), addr)
+
+
+class _FakeUdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, fake):
+        self.fake = fake
+
+    def datagram_received(self, data, addr):
+        self.fake._on_datagram(data, addr)
+
+
+# ================================================================
+# Standalone
+# ================================================================
+def main():
+    ap = argparse.ArgumentParser(description="ESP32 avatar stand-in server")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=12345)
+    ap.add_argument("--text-only", action="store_true",
+                    help="behave like firmware without binary frames")
+    ap.add_argument("--no-acks", action="store_true",
+                    help="only offer v1 frames (no ack channel)")
+    ap.add_argument("--udp-loss", type=float, default=0.0,
+                    help="drop this fraction of incoming datagrams")
+    ap.add_argument("--hello-delay", type=float, default=0.0,
+                    help="answer HELLO this many seconds late (Wi-Fi stall)")
+    args = ap.parse_args()
+
+    fake = FakeEsp32(args.host, args.port, binary=not args.text_only,
+                     acks=not args.no_acks, udp_loss=args.udp_loss,
+                     hello_delay=args.hello_delay).start()
+    print(f"[FAKE-ESP32] Listening on {args.host}:{fake.port}")
+    try:
+        while True:
+            time.sleep(1.0)
+            print("[FAKE-ESP32]", fake.board.status_line(fake.gui_connected))
+    except KeyboardInterrupt:
+        pass
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
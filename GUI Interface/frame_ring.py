@@ -0,0 +1,162 @@
+"""
+Preallocated ring of camera frames shared by camera_thread and its consumers.
+
+Producer:
+    buf = ring.claim()                          # writable slot (or None)
+    ret, img = cap.read(buf) if buf is not None else cap.read()
+    if ret:
+        ring.commit(img, t_capture)             # no copy when img is buf
+
+Consumers get read-only views with a frame id, the capture timestamp and
+the time the frame was committed (both time.monotonic() by default). The
+slot is pinned while the FrameRef is held, so the producer never writes
+into an image someone is still reading — release it (or use `with`) as soon
+as the pixels have been consumed.
+
+    with ring.wait_newer(last_id, timeout=0.1) as f:   # blocks for a new id
+        ...
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class FrameRef:
+    __slots__ = ("frame_id", "t_capture", "t_commit", "image", "_ring", "_slot", "_gen")
+
+    def __init__(self, ring, slot, gen, frame_id, t_capture, t_commit, image):
+        self._ring = ring
+        self._slot = slot
+        self._gen = gen
+        self.frame_id = frame_id
+        self.t_capture = t_capture
+        self.t_commit = t_commit
+        self.image = image          # read-only view into the ring
+
+    def release(self):
+        if self._ring is not None:
+            self._ring._unpin(self._slot, self._gen)
+            self._ring = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class FrameRing:
+    def __init__(self, slots=4):
+        if slots < 3:
+            raise ValueError("need at least 3 slots (latest + writer + reader)")
+        self.slots = slots
+        self._cond = threading.Condition()
+        self._gen = 0
+        self._bufs = []
+        self._views = []
+        self._ids = [0] * slots
+        self._times = [0.0] * slots
+        self._commits = [0.0] * slots
+        self._pins = [0] * slots
+        self._latest = -1
+        self._claimed = -1
+        self._frame_id = 0
+        self.dropped = 0
+
+    @property
+    def frame_id(self):
+        """Id of the newest committed frame (0 = none yet)."""
+        return self._frame_id
+
+    @property
+    def shape(self):
+        return self._bufs[0].shape if self._bufs else None
+
+    # ------------------------------------------------------------
+    # Producer
+    # ------------------------------------------------------------
+    def _allocate(self, shape, dtype):
+        self._gen += 1
+        self._bufs = [np.empty(shape, dtype) for _ in range(self.slots)]
+        self._views = []
+        for b in self._bufs:
+            v = b.view()
+            v.flags.writeable = False
+            self._views.append(v)
+        self._pins = [0] * self.slots
+        self._latest = -1
+        self._claimed = -1
+
+    def _free_slot(self):
+        start = (self._latest + 1) % self.slots
+        for k in range(self.slots):
+            i = (start + k) % self.slots
+            if i != self._latest and self._pins[i] == 0:
+                return i
+        return -1
+
+    def claim(self):
+        """Writable buffer for the next frame, None before the first commit."""
+        with self._cond:
+            if not self._bufs:
+                return None
+            self._claimed = self._free_slot()
+            return self._bufs[self._claimed] if self._claimed >= 0 else None
+
+    def commit(self, image, t_capture=None):
+        """Publish a frame; returns its id (0 if it had to be dropped)."""
+        t_commit = time.monotonic()
+        if t_capture is None:
+            t_capture = t_commit
+        with self._cond:
+            slot, self._claimed = self._claimed, -1
+            if slot < 0 or not self._bufs or image is not self._bufs[slot]:
+                # First frame, resolution change, or read into a fresh array
+                if (not self._bufs or image.shape != self._bufs[0].shape
+                        or image.dtype != self._bufs[0].dtype):
+                    self._allocate(image.shape, image.dtype)
+                slot = self._free_slot()
+                if slot < 0:
+                    self.dropped += 1
+                    return 0
+                np.copyto(self._bufs[slot], image)
+
+            self._frame_id += 1
+            self._ids[slot] = self._frame_id
+            self._times[slot] = t_capture
+            self._commits[slot] = t_commit
+            self._latest = slot
+            self._cond.notify_all()
+            return self._frame_id
+
+    # ------------------------------------------------------------
+    # Consumers
+    # ------------------------------------------------------------
+    def _ref(self, slot):
+        self._pins[slot] += 1
+        return FrameRef(self, slot, self._gen, self._ids[slot],
+                        self._times[slot], self._commits[slot], self._views[slot])
+
+    def _unpin(self, slot, gen):
+        with self._cond:
+            if gen == self._gen and self._pins[slot] > 0:
+                self._pins[slot] -= 1
+
+    def latest(self, newer_than=0):
+        """Newest frame without blocking, or None if nothing newer exists."""
+        with self._cond:
+            if self._latest < 0 or self._ids[self._latest] <= newer_than:
+                return None
+            return self._ref(self._latest)
+
+    def wait_newer(self, last_id, timeout=None):
+        """Block until a frame with id > last_id exists; None on timeout."""
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: self._latest >= 0 and self._ids[self._latest] > last_id,
+                timeout,
+            )
+            if not ok:
+                return None
+            return self._ref(self._latest)
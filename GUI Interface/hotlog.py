@@ -0,0 +1,208 @@
+"""
+Logging for the hot paths (pose loop, link thread, governor).
+
+A call records (seq, time, level, tag, format, args) into a preallocated
+ring of slots and returns; formatting and console I/O happen on a
+background flush thread, so a slow or redirected terminal never stalls the
+control loop. Any thread may log: slots are claimed with an atomic counter
+and each slot is written with a single list store, no locks.
+
+    LOG.info("CONNECT", "Attempt {} failed: {}", attempt, err)
+    LOG.sample("arm", "BodyControl", "elev={:.1f}", elev)   # rate-limited debug
+
+The ring keeps every level, the console only gets records at or above
+`console_level`. On an uncaught exception (install_excepthook) or an
+explicit dump() the whole ring goes to stderr, including the sampled debug
+records that never reached the console.
+
+Env: LOG_LEVEL (DEBUG / INFO / WARNING / ERROR, default INFO),
+LOG_SAMPLE_HZ (per-key rate of sampled debug records, default 2, 0 = off),
+LOG_RING (slots, default 4096).
+"""
+import atexit
+import itertools
+import os
+import sys
+import threading
+import time
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+_NAMES = {v: k for k, v in LEVELS.items()}
+
+
+def _format(rec, show_level=True):
+    _, t, level, tag, fmt, args = rec
+    try:
+        msg = fmt.format(*args) if args else fmt
+    except Exception as e:
+        msg = f"{fmt!r} {args!r} ({e!r})"
+    prefix = f"[{tag}] " if tag else ""
+    if show_level and level >= WARNING:
+        prefix += f"{_NAMES[level]}: "
+    return prefix + msg
+
+
+class HotLog:
+    def __init__(self, capacity=4096, console_level=INFO, sample_hz=2.0,
+                 stream=None, flush_interval=0.1):
+        self.capacity = capacity
+        self.console_level = console_level
+        self.sample_hz = sample_hz
+        self.stream = stream            # None = sys.stdout at flush time
+        self.flush_interval = flush_interval
+        self.dropped = 0                # overwritten before the flush thread saw them
+
+        self._ring = [None] * capacity
+        self._seq = itertools.count()   # next() is atomic under the GIL
+        self._next = 0                  # first seq the flusher has not handled
+        self._last_sample = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()     # consumers only
+        self._running = False
+
+    # ------------------------------------------------------------
+    # Producers (any thread)
+    # ------------------------------------------------------------
+    def log(self, level, tag, fmt, *args):
+        seq = next(self._seq)
+        self._ring[seq % self.capacity] = (seq, time.time(), level, tag, fmt, args)
+        if self._thread is None:
+            self.start()
+        if level >= WARNING:
+            self._wake.set()
+
+    def debug(self, tag, fmt, *args):
+        self.log(DEBUG, tag, fmt, *args)
+
+    def info(self, tag, fmt, *args):
+        self.log(INFO, tag, fmt, *args)
+
+    def warning(self, tag, fmt, *args):
+        self.log(WARNING, tag, fmt, *args)
+
+    def error(self, tag, fmt, *args):
+        self.log(ERROR, tag, fmt, *args)
+
+    def sample(self, key, tag, fmt, *args):
+        """Per-frame debug data: recorded at most sample_hz times per second per key."""
+        if not self.sample_hz:
+            return
+        now = time.monotonic()
+        if now - self._last_sample.get(key, -1e9) < 1.0 / self.sample_hz:
+            return
+        self._last_sample[key] = now
+        self.log(DEBUG, tag, fmt, *args)
+
+    # ------------------------------------------------------------
+    # Flush thread
+    # ------------------------------------------------------------
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="hotlog", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything recorded so far (flush thread, or at exit)."""
+        with self._flush_lock:
+            lines = self._drain()
+            if not lines:
+                return
+            stream = self.stream or sys.stdout
+            try:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _drain(self):
+        lines = []
+        ring, cap = self._ring, self.capacity
+        while True:
+            rec = ring[self._next % cap]
+            if rec is None or rec[0] < self._next:
+                break                           # not written yet
+            if rec[0] > self._next:
+                # Lapped: the producers wrapped around before we got here
+                lost = rec[0] - self._next
+                self.dropped += lost
+                lines.append(f"[LOG] {lost} records dropped (ring full)")
+                self._next = rec[0]
+            self._next += 1
+            if rec[2] >= self.console_level:
+                lines.append(_format(rec))
+        return lines
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self.flush()
+
+    # ------------------------------------------------------------
+    # Post-mortem
+    # ------------------------------------------------------------
+    def records(self):
+        """Every record still in the ring, oldest first."""
+        recs = [r for r in list(self._ring) if r is not None]
+        recs.sort(key=lambda r: r[0])
+        return recs
+
+    def dump(self, reason="", stream=None):
+        """The whole ring (all levels) with timestamps, e.g. after an error."""
+        stream = stream or sys.stderr
+        recs = self.records()
+        out = [f"----- log ring: last {len(recs)} records{': ' + reason if reason else ''} -----"]
+        for rec in recs:
+            t = rec[1]
+            stamp = time.strftime("%H:%M:%S", time.localtime(t)) + f".{int(t % 1 * 1000):03d}"
+            out.append(f"{stamp} {_NAMES.get(rec[2], rec[2]):<7} {_format(rec, False)}")
+        out.append("----- end of log ring -----")
+        try:
+            stream.write("\n".join(out) + "\n")
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+
+
+def from_env(env=os.environ):
+    return HotLog(capacity=int(env.get("LOG_RING", "4096")),
+                  console_level=LEVELS.get(env.get("LOG_LEVEL", "INFO").upper(), INFO),
+                  sample_hz=float(env.get("LOG_SAMPLE_HZ", "2")))
+
+
+LOG = from_env()
+
+
+def install_excepthook(log=LOG):
+    """Dump the ring on any uncaught exception, main thread or not."""
+    prev_sys, prev_thread = sys.excepthook, threading.excepthook
+
+    def sys_hook(exc_type, exc, tb):
+        log.error("CRASH", "{}: {}", exc_type.__name__, exc)
+        log.flush()
+        log.dump(f"uncaught {exc_type.__name__}")
+        prev_sys(exc_type, exc, tb)
+
+    def thread_hook(args):
+        name = args.thread.name if args.thread is not None else "?"
+        log.error("CRASH", "{} in thread {}: {}", args.exc_type.__name__, name, args.exc_value)
+        log.flush()
+        log.dump(f"uncaught {args.exc_type.__name__} in thread {name}")
+        prev_thread(args)
+
+    sys.excepthook = sys_hook
+    threading.excepthook = thread_hook
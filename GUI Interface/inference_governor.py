@@ -0,0 +1,237 @@
+"""
+Adaptive quality for pose inference.
+
+InferenceGovernor watches per-frame inference time against a budget (e.g.
+1000/30 ms for 30 FPS) and walks a ladder of (model_complexity, input
+width) levels: down as soon as the p90 of a window blows the budget, up
+only after a quiet hold period with plenty of headroom. A level that had
+to be abandoned is not retried for a while, and that penalty doubles each
+time it fails again, so a machine that sits at a boundary does not flap.
+
+GovernedPose wraps a backend factory (mp_pose.Pose or PoseWorker). A
+resolution change applies on the next frame; a complexity change builds
+and warms up the new graph on a background thread while the current one
+keeps serving frames, then swaps it in. The control loop never waits for
+a graph to load.
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from hotlog import LOG
+
+# (model_complexity, input width in px; None = camera resolution)
+# MediaPipe resamples to its own model size internally, so the width steps
+# mostly trim preprocessing; complexity is the big lever.
+LEVELS = (
+    (0, 256),
+    (0, 384),
+    (0, None),
+    (1, None),
+    (2, None),
+)
+DEFAULT_LEVEL = 2       # complexity 0 at full resolution, the old fixed setting
+
+
+class InferenceGovernor:
+    def __init__(self, budget_ms=1000.0 / 30, levels=LEVELS, start=DEFAULT_LEVEL,
+                 window=30, min_samples=15, up_load=0.55, down_load=1.0,
+                 hold_s=3.0, penalty_s=20.0, max_penalty_s=300.0):
+        self.budget_ms = budget_ms
+        self.levels = tuple(levels)
+        self.level = max(0, min(start, len(self.levels) - 1))
+        self.min_samples = min_samples
+        self.up_load = up_load          # step up below this p90/budget
+        self.down_load = down_load      # step down above this p90/budget
+        self.hold_s = hold_s
+        self.penalty_s = penalty_s
+        self.max_penalty_s = max_penalty_s
+
+        self._samples = deque(maxlen=window)
+        self._changed_at = time.monotonic()
+        self._blocked_until = [0.0] * len(self.levels)
+        self._penalty = [penalty_s] * len(self.levels)
+        self.p90_ms = 0.0
+        self.changes = 0
+
+    @property
+    def setting(self):
+        """(model_complexity, width) for the current level."""
+        return self.levels[self.level]
+
+    def _p90(self):
+        s = sorted(self._samples)
+        return s[min(len(s) - 1, int(len(s) * 0.9))]
+
+    def settle(self, now=None):
+        """Start a fresh window, e.g. once a rebuilt graph is actually serving."""
+        self._changed_at = time.monotonic() if now is None else now
+        self._samples.clear()
+
+    def _set_level(self, level, now):
+        self.level = level
+        self.settle(now)
+        self.changes += 1
+
+    def observe(self, infer_ms, now=None):
+        """Feed one frame's inference time; returns True when the level changed."""
+        if now is None:
+            now = time.monotonic()
+        self._samples.append(infer_ms)
+        if len(self._samples) < self.min_samples:
+            return False
+
+        self.p90_ms = self._p90()
+        load = self.p90_ms / self.budget_ms
+
+        if load > self.down_load and self.level > 0:
+            failed = self.level
+            self._blocked_until[failed] = now + self._penalty[failed]
+            self._penalty[failed] = min(self._penalty[failed] * 2, self.max_penalty_s)
+            self._set_level(failed - 1, now)
+            return True
+
+        nxt = self.level + 1
+        if (load < self.up_load and nxt < len(self.levels)
+                and now - self._changed_at >= self.hold_s
+                and now >= self._blocked_until[nxt]):
+            self._set_level(nxt, now)
+            return True
+        return False
+
+    def describe(self):
+        complexity, width = self.setting
+        res = f"{width}px" if width else "full"
+        p90 = f"{self.p90_ms:.1f}" if self.p90_ms else "--"
+        return (f"POSE: level {self.level + 1}/{len(self.levels)}  "
+                f"complexity {complexity}  {res}  "
+                f"p90 {p90}/{self.budget_ms:.0f} ms")
+
+
+class GovernedPose:
+    """
+    Same .process(rgb) interface as the wrapped backend. `factory` is called
+    as factory(model_complexity=..., **pose_kwargs) and must return a
+    context manager (mp_pose.Pose, PoseWorker).
+    """
+
+    def __init__(self, factory, governor=None, **pose_kwargs):
+        self.factory = factory
+        self.governor = governor or InferenceGovernor()
+        self.pose_kwargs = pose_kwargs
+
+        self.pose = None
+        self.complexity = None
+        self._lock = threading.Lock()
+        self._building = None           # complexity being built
+        self._ready = None              # (complexity, pose) waiting to be swapped in
+        self._small = None
+        self._full_shape = None         # largest frame seen (the camera's, not an ROI crop)
+
+    def _open(self, complexity):
+        pose = self.factory(model_complexity=complexity, **self.pose_kwargs)
+        return pose.__enter__()
+
+    def __enter__(self):
+        self.complexity = self.governor.setting[0]
+        self.pose = self._open(self.complexity)
+        return self
+
+    def warm_up(self, shape):
+        """Load the model with one dummy frame; not counted by the governor."""
+        self._note_shape(shape)
+        self.pose.process(np.zeros(shape, np.uint8))
+
+    def _note_shape(self, shape):
+        # New graphs are warmed (and PoseWorker buffers sized) on this, so a
+        # rebuild never meets a frame bigger than the one it was loaded with
+        shape = tuple(shape)
+        if self._full_shape is None or np.prod(shape) > np.prod(self._full_shape):
+            self._full_shape = shape
+
+    def __exit__(self, *exc):
+        with self._lock:
+            ready, self._ready = self._ready, None
+        if ready is not None:
+            ready[1].__exit__(None, None, None)
+        if self.pose is not None:
+            self.pose.__exit__(None, None, None)
+            self.pose = None
+        return False
+
+    # ------------------------------------------------------------
+    # Background rebuild
+    # ------------------------------------------------------------
+    def _build(self, complexity, shape):
+        try:
+            pose = self._open(complexity)
+            # First process() loads the model; pay for it here, not in the loop
+            pose.process(np.zeros(shape, np.uint8))
+        except Exception as e:
+            LOG.error("GOVERNOR", "Could not build complexity {}: {}", complexity, e)
+            pose = None
+        with self._lock:
+            self._building = None
+            if pose is not None:
+                self._ready = (complexity, pose)
+
+    def _maybe_rebuild(self):
+        want = self.governor.setting[0]
+        with self._lock:
+            ready, self._ready = self._ready, None
+            busy = self._building is not None
+
+        if ready is not None:
+            complexity, pose = ready
+            if complexity == want:
+                old, self.pose, self.complexity = self.pose, pose, complexity
+                self.governor.settle()
+                LOG.info("GOVERNOR", "Switched to model complexity {}", complexity)
+                threading.Thread(target=old.__exit__, args=(None, None, None),
+                                 daemon=True).start()
+            else:
+                # The governor moved on while it was loading
+                pose.__exit__(None, None, None)
+
+        if want != self.complexity and not busy and self._full_shape is not None:
+            with self._lock:
+                self._building = want
+            threading.Thread(target=self._build, args=(want, self._full_shape),
+                             daemon=True).start()
+
+    # ------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------
+    def _resize(self, rgb):
+        width = self.governor.setting[1]
+        h, w = rgb.shape[:2]
+        if not width or width >= w:
+            return rgb
+        size = (width, max(1, round(h * width / w)))
+        if self._small is None or self._small.shape[1::-1] != size:
+            self._small = np.empty((size[1], size[0], 3), np.uint8)
+        cv2.resize(rgb, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        return self._small
+
+    def process(self, rgb):
+        self._note_shape(rgb.shape)
+        self._maybe_rebuild()
+        img = self._resize(rgb)
+
+        t0 = time.perf_counter()
+        res = self.pose.process(img)
+        infer_ms = (time.perf_counter() - t0) * 1000.0
+        # Times from the old graph say nothing about the level being loaded
+        if (self.complexity == self.governor.setting[0]
+                and self.governor.observe(infer_ms)):
+            LOG.info("GOVERNOR", "{}", self.governor.describe())
+        return res
+
+    def describe(self):
+        text = self.governor.describe()
+        if self._building is not None:
+            text += f"  (loading complexity {self._building})"
+        return text
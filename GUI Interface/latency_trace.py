@@ -0,0 +1,153 @@
+"""
+Glass-to-servo latency: how old was the camera frame behind each command
+the ESP32 received, and where did that time go.
+
+A FrameTrace rides along with a frame from the ring to the published
+command; the link calls sent() when the command goes out and acked() when
+the board acknowledges it. All stamps are time.monotonic() seconds, the
+clock CameraCapture stamps frames with.
+
+    capture         grab() returned -> frame committed to the ring (decode)
+    queue           committed -> picked up by the pose loop
+    inference       picked up -> landmarks (BGR->RGB + pose.process)
+    classification  landmarks -> command published
+    network         published -> sent, plus RTT/2 when the link acks (v2)
+                    (without acks only the local part is known)
+
+Every finished command lands in one histogram per segment plus the total,
+and, with `path` set, in a Chrome trace file (chrome://tracing, Perfetto)
+with one slice per segment.
+
+With several robots (link_pool.LinkPool) each link gets a view from
+for_link(): its own row in the trace file and its own seq space, the
+histograms are shared.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+SEGMENTS = ("capture", "queue", "inference", "classification", "network")
+
+# ms: glass-to-servo totals run from tens to a few hundred ms
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 33, 50, 75, 100, 150, 200, 300, 500, 1000)
+
+
+class FrameTrace:
+    __slots__ = ("frame_id", "t_capture", "t_commit", "t_dequeue",
+                 "t_inferred", "t_published")
+
+    def __init__(self, frame_id, t_capture, t_commit, t_dequeue):
+        self.frame_id = frame_id
+        self.t_capture = t_capture
+        self.t_commit = t_commit
+        self.t_dequeue = t_dequeue
+        self.t_inferred = t_dequeue
+        self.t_published = t_dequeue
+
+
+class LatencyTracer:
+    def __init__(self, registry=REGISTRY, path=None, max_pending=64, prefix="eva_latency_"):
+        self.hist = {seg: registry.histogram(f"{prefix}{seg}_ms",
+                                             f"Glass-to-servo {seg} segment (ms)",
+                                             LATENCY_BUCKETS)
+                     for seg in SEGMENTS}
+        self.total = registry.histogram(f"{prefix}total_ms",
+                                        "Glass-to-servo latency, capture to board (ms)",
+                                        LATENCY_BUCKETS)
+        self.max_pending = max_pending
+        self._pending = OrderedDict()       # (tid, seq) -> (trace, t_sent, labels)
+        self._pending_lock = threading.Lock()   # link threads, when several share us
+        self._lock = threading.Lock()       # trace file only
+        self._tids = 1
+        self._file = None
+        if path:
+            self._file = open(path, "w")
+            # JSON array format: the closing bracket is optional, so the file
+            # stays loadable even if the process dies mid-session
+            self._file.write('[{"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, '
+                             '"args": {"name": "glass-to-servo"}}')
+            self._file.flush()
+
+    # ------------------------------------------------------------
+    # Link thread
+    # ------------------------------------------------------------
+    def sent(self, trace, seq, t_sent, labels=None, expect_ack=False, tid=1):
+        """The command produced by `trace` was written to the link."""
+        if not expect_ack or seq is None:
+            self._finish(trace, t_sent, t_sent, labels, seq, tid)
+            return
+        with self._pending_lock:
+            self._pending[(tid, seq)] = (trace, t_sent, labels)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def acked(self, seq, rtt_s, tid=1):
+        with self._pending_lock:
+            item = self._pending.pop((tid, seq), None)
+        if item is not None:
+            trace, t_sent, labels = item
+            self._finish(trace, t_sent, t_sent + rtt_s / 2.0, labels, seq, tid)
+
+    def for_link(self, name):
+        """Tracer for one of several links sharing these histograms."""
+        with self._lock:
+            self._tids += 1
+            tid = self._tids
+            if self._file is not None:
+                self._file.write(",\n" + json.dumps({"name": "thread_name", "ph": "M", "pid": 1,
+                                                     "tid": tid, "args": {"name": name}}))
+        return _LinkTracer(self, tid)
+
+    # ------------------------------------------------------------
+    def _finish(self, trace, t_sent, t_end, labels, seq, tid=1):
+        bounds = (trace.t_capture, trace.t_commit, trace.t_dequeue,
+                  trace.t_inferred, trace.t_published, t_end)
+        # Histograms have one writer per link thread; serialise when shared
+        with self._pending_lock:
+            for seg, t0, t1 in zip(SEGMENTS, bounds, bounds[1:]):
+                self.hist[seg].observe((t1 - t0) * 1000.0)
+            self.total.observe((t_end - trace.t_capture) * 1000.0)
+        if self._file is not None:
+            self._write(bounds, trace, labels, seq, tid)
+
+    def _write(self, bounds, trace, labels, seq, tid=1):
+        args = {"frame_id": trace.frame_id, "seq": seq}
+        if labels is not None:
+            args["L"], args["R"] = labels
+        events = [{"name": seg, "ph": "X", "pid": 1, "tid": tid,
+                   "ts": round(t0 * 1e6), "dur": round((t1 - t0) * 1e6), "args": args}
+                  for seg, t0, t1 in zip(SEGMENTS, bounds, bounds[1:])]
+        text = "".join(",\n" + json.dumps(ev) for ev in events)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(text)
+
+    def describe(self):
+        p50, p90 = self.total.quantile(0.5), self.total.quantile(0.9)
+        if p50 is None:
+            return "GLASS-TO-SERVO: --"
+        return f"GLASS-TO-SERVO p50 {p50:.0f} / p90 {p90:.0f} ms"
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.write("]\n")
+                self._file.close()
+                self._file = None
+
+
+class _LinkTracer:
+    """LatencyTracer.for_link(): the link-side API, tagged with a trace row."""
+    __slots__ = ("tracer", "tid")
+
+    def __init__(self, tracer, tid):
+        self.tracer = tracer
+        self.tid = tid
+
+    def sent(self, trace, seq, t_sent, labels=None, expect_ack=False):
+        self.tracer.sent(trace, seq, t_sent, labels, expect_ack, self.tid)
+
+    def acked(self, seq, rtt_s):
+        self.tracer.acked(seq, rtt_s, self.tid)
@@ -0,0 +1,121 @@
+"""
+Fan-out of one command stream to several ESP32 avatars.
+
+Every robot gets its own LinkManager: its own event loop thread, socket,
+reconnect backoff, RTT tracker and latest-wins command slot (the per-robot
+send queue). publish() only stores the command in each slot and wakes each
+loop, so a board that is slow, lossy or down never holds up the others,
+and pose inference runs once however many robots are listening.
+
+    pool = LinkPool(parse_targets("192.168.10.140,192.168.10.141:12346", 12345))
+    pool.connect()
+    pool.publish("3", "1", trace)
+
+The pool has the LinkManager surface the GUI uses (start / stop / connect /
+disconnect / reconnect / publish / add_listener / wanted / transport);
+per-robot state, RTT and counters stay on pool.links.
+"""
+from esp32_link import LinkManager, LinkState
+
+
+def parse_targets(spec, default_port):
+    """'host[:port],host[:port],...' -> [(host, port), ...]"""
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, sep, port = item.rpartition(":")
+        if not sep:
+            host, port = item, default_port
+        targets.append((host, int(port)))
+    if not targets:
+        raise ValueError(f"no robot address in {spec!r}")
+    return targets
+
+
+class LinkPool:
+    def __init__(self, targets, tracer=None, **link_kwargs):
+        """
+        targets: [(host, port), ...], one per robot.
+        tracer: a LatencyTracer shared by all links (each gets a for_link view).
+        link_kwargs go to every LinkManager (transport, timeouts, backoff...).
+        """
+        if not targets:
+            raise ValueError("LinkPool needs at least one target")
+        single = len(targets) == 1
+        self.links = []
+        for i, (host, port) in enumerate(targets):
+            name = "ESP32" if single else f"ESP32-{i + 1}"
+            link_tracer = tracer
+            if tracer is not None and not single:
+                link_tracer = tracer.for_link(f"{name} {host}:{port}")
+            self.links.append(LinkManager(host, port, name=name, tracer=link_tracer,
+                                          **link_kwargs))
+
+    def __len__(self):
+        return len(self.links)
+
+    def __iter__(self):
+        return iter(self.links)
+
+    # ------------------------------------------------------------
+    # LinkManager surface, applied to every robot
+    # ------------------------------------------------------------
+    @property
+    def wanted(self):
+        return any(link.wanted for link in self.links)
+
+    @property
+    def transport(self):
+        return self.links[0].transport
+
+    @transport.setter
+    def transport(self, value):
+        for link in self.links:
+            link.transport = value
+
+    def add_listener(self, callback):
+        """callback(LinkEvent) from each link's thread; ev.link tells which."""
+        for link in self.links:
+            link.add_listener(callback)
+
+    def start(self):
+        for link in self.links:
+            link.start()
+
+    def stop(self):
+        for link in self.links:
+            link.stop()
+
+    def connect(self):
+        for link in self.links:
+            link.connect()
+
+    def disconnect(self):
+        for link in self.links:
+            link.disconnect()
+
+    def reconnect(self):
+        for link in self.links:
+            link.reconnect()
+
+    def publish(self, L, R, trace=None):
+        """Latest-wins on every link; never waits on any of them."""
+        for link in self.links:
+            link.publish(L, R, trace)
+
+    # ------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------
+    @property
+    def online(self):
+        return sum(link.state is LinkState.ONLINE for link in self.links)
+
+    @property
+    def sends(self):
+        return sum(link.sends for link in self.links)
+
+    @property
+    def send_errors(self):
+        return sum(link.send_errors for link in self.links)
@@ -0,0 +1,220 @@
+"""
+Low-overhead per-stage metrics, readable over HTTP in the Prometheus text
+format and as a short summary for the on-screen stats panel.
+
+Counter     monotonically increasing count
+Gauge       last value set, or a callback read at scrape time
+Histogram   fixed buckets (upper bounds), plus sum and count
+
+Every metric has a single writer, the thread that owns the stage, so
+updates are plain attribute / list-slot increments without locks. Readers
+(HTTP thread, Tk panel) may see a value one update old, never a torn one.
+
+    frames = REGISTRY.counter("eva_frames_captured_total", "Frames read from the camera")
+    pose_ms = REGISTRY.histogram("eva_pose_ms", "pose.process() time (ms)")
+    frames.inc()
+    pose_ms.observe(12.5)
+    server = serve_metrics(REGISTRY, port=9108)     # GET /metrics
+
+Counters and gauges may carry labels in the name, one metric per label
+set, registered next to each other:
+
+    REGISTRY.gauge('eva_robot_online{robot="ESP32-1"}', "1 while online", fn=...)
+"""
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Millisecond buckets for per-frame stage timings (33 ms = one 30 FPS frame)
+MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 33, 50, 100, 200, 500, 1000)
+
+
+def _fmt(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    __slots__ = ("name", "help", "value")
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def samples(self):
+        yield self.name, self.value
+
+    def summary(self):
+        return f"{self.value}"
+
+
+class Gauge:
+    """A value set by its owner, or read from `fn` at scrape time."""
+    __slots__ = ("name", "help", "value", "fn", "kind")
+
+    def __init__(self, name, help="", fn=None, kind="gauge"):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+        self.fn = fn
+        self.kind = kind            # "counter" for a callback over a running total
+
+    def set(self, v):
+        self.value = v
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+    def samples(self):
+        yield self.name, self.get()
+
+    def summary(self):
+        v = self.get()
+        return f"{v:.3g}" if isinstance(v, float) else f"{v}"
+
+
+class Histogram:
+    __slots__ = ("name", "help", "bounds", "counts", "sum")
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=MS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)      # last = above all bounds
+        self.sum = 0.0
+
+    def observe(self, v):
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.sum += v
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """Estimate from the buckets (linear within a bucket); None when empty."""
+        counts = list(self.counts)
+        n = sum(counts)
+        if n == 0:
+            return None
+        rank = q * n
+        cum = 0
+        lo = 0.0
+        for i, c in enumerate(counts):
+            if c and cum + c >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                hi = self.bounds[i]
+                return lo + (hi - lo) * (rank - cum) / c
+            cum += c
+            if i < len(self.bounds):
+                lo = self.bounds[i]
+        return self.bounds[-1]
+
+    def samples(self):
+        counts = list(self.counts)
+        cum = 0
+        for bound, c in zip(self.bounds + (float("inf"),), counts):
+            cum += c
+            yield f'{self.name}_bucket{{le="{_fmt(bound)}"}}', cum
+        yield f"{self.name}_sum", self.sum
+        yield f"{self.name}_count", cum
+
+    def summary(self):
+        p50, p90 = self.quantile(0.5), self.quantile(0.9)
+        if p50 is None:
+            return "--"
+        return f"p50 {p50:.1f}  p90 {p90:.1f}  n {self.count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()   # registration only, never on updates
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"metric {metric.name!r} already registered "
+                                     f"as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help=""):
+        return self._add(Counter(name, help))
+
+    def gauge(self, name, help="", fn=None, kind="gauge"):
+        return self._add(Gauge(name, help, fn, kind))
+
+    def histogram(self, name, help="", buckets=MS_BUCKETS):
+        return self._add(Histogram(name, help, buckets))
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._metrics.values()))
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        out = []
+        family = None
+        for m in self:
+            base = m.name.split("{", 1)[0]
+            if base != family:
+                family = base
+                if m.help:
+                    out.append(f"# HELP {base} {m.help}")
+                out.append(f"# TYPE {base} {m.kind}")
+            try:
+                out.extend(f"{name} {_fmt(v)}" for name, v in m.samples())
+            except Exception as e:
+                out.append(f"# {m.name}: {e!r}")
+        return "\n".join(out) + "\n"
+
+    def summary(self, prefix=""):
+        """One line per metric for the stats panel, prefix stripped from names."""
+        lines = []
+        for m in self:
+            name = m.name[len(prefix):] if m.name.startswith(prefix) else m.name
+            try:
+                lines.append(f"{name:<28} {m.summary()}")
+            except Exception as e:
+                lines.append(f"{name:<28} {e!r}")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+
+def serve_metrics(registry=REGISTRY, port=9108, host="127.0.0.1"):
+    """GET /metrics on a daemon thread; returns the server (call shutdown())."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http",
+                     daemon=True).start()
+    return server
@@ -0,0 +1,102 @@
+"""
+Skeleton + status overlay for the camera preview.
+
+Replaces mp_drawing.draw_landmarks, which rebuilds its style dict and
+draws every joint and bone with its own OpenCV call. Connections, joint
+groups and colours are precomputed once; per frame the pose costs one
+cv2.polylines call for all bones and one per joint colour (a zero-length
+segment with a thick round cap is a filled dot).
+
+    overlay = SkeletonOverlay()
+    overlay.draw(frame_bgr, landmarks, ("L: Neutral (1)", "R: Neutral (1)"))
+
+`landmarks` is the (33, 4) array from pose_features.landmarks_of
+(normalized x, y, z, visibility), so drawing works at any resolution,
+including a downscaled preview.
+"""
+import cv2
+import numpy as np
+
+# Same topology as mp.solutions.pose.POSE_CONNECTIONS
+POSE_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+)
+
+# Joint groups and BGR colours of mediapipe's default pose style
+LEFT_JOINTS = (1, 2, 3, 7, 9, 11, 13, 15, 17, 19, 21, 23, 25, 27, 29, 31)
+RIGHT_JOINTS = (4, 5, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30, 32)
+CENTER_JOINTS = (0,)
+LEFT_COLOR = (0, 138, 255)
+RIGHT_COLOR = (231, 217, 0)
+CENTER_COLOR = (224, 224, 224)
+BONE_COLOR = (224, 224, 224)
+
+
+class SkeletonOverlay:
+    def __init__(self, n_landmarks=33, connections=POSE_CONNECTIONS,
+                 min_visibility=0.5, bone_thickness=2, joint_radius=3,
+                 text_color=(0, 0, 0), font_scale=0.7, line_height=25):
+        conn = np.asarray(connections, np.intp)
+        self._a = conn[:, 0]
+        self._b = conn[:, 1]
+        self._groups = tuple(
+            (np.asarray(idx, np.intp), color)
+            for idx, color in ((LEFT_JOINTS, LEFT_COLOR),
+                               (RIGHT_JOINTS, RIGHT_COLOR),
+                               (CENTER_JOINTS, CENTER_COLOR))
+        )
+        self.min_visibility = min_visibility
+        self.bone_thickness = bone_thickness
+        self.joint_radius = joint_radius
+        self.text_color = text_color
+        self.font_scale = font_scale
+        self.line_height = line_height
+
+        # Per-frame scratch
+        self._scale = np.empty(2, np.float32)
+        self._xy = np.empty((n_landmarks, 2), np.float32)
+        self._px = np.empty((n_landmarks, 2), np.int32)
+        self._ok = np.empty(n_landmarks, bool)
+
+    def draw_skeleton(self, frame, lm):
+        h, w = frame.shape[:2]
+        self._scale[0] = w
+        self._scale[1] = h
+        xy, px, ok = self._xy, self._px, self._ok
+        np.multiply(lm[:, :2], self._scale, out=xy)
+        np.rint(xy, out=xy)
+        np.copyto(px, xy, casting="unsafe")
+
+        # Visible and inside the image, like draw_landmarks
+        np.greater_equal(lm[:, 3], self.min_visibility, out=ok)
+        ok &= (lm[:, 0] >= 0.0) & (lm[:, 0] <= 1.0) & (lm[:, 1] >= 0.0) & (lm[:, 1] <= 1.0)
+
+        seg = ok[self._a] & ok[self._b]
+        if seg.any():
+            bones = np.stack((px[self._a[seg]], px[self._b[seg]]), axis=1)
+            cv2.polylines(frame, bones, False, BONE_COLOR, self.bone_thickness)
+
+        dot = 2 * self.joint_radius
+        for idx, color in self._groups:
+            sel = idx[ok[idx]]
+            if sel.size:
+                p = px[sel]
+                cv2.polylines(frame, np.stack((p, p), axis=1), False, color, dot)
+
+    def draw_text(self, frame, lines, origin=(10, 30)):
+        x, y = origin
+        for line in lines:
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX,
+                        self.font_scale, self.text_color, 2)
+            y += self.line_height
+
+    def draw(self, frame, lm=None, lines=()):
+        """Skeleton (when lm is not None), then the text lines on top."""
+        if lm is not None:
+            self.draw_skeleton(frame, lm)
+        if lines:
+            self.draw_text(frame, lines)
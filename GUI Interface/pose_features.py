@@ -0,0 +1,127 @@
+"""
+Vectorized body features from MediaPipe Pose landmarks.
+
+Landmarks are handled as a (33, 4) float32 array of x, y, z, visibility
+(see pose_worker.proto_to_landmarks), converted once per frame. A
+single compute_features() call derives every feature the body controller
+needs, and works the same on an (N, 33, 4) batch of recorded frames:
+
+    f = compute_features(lm)                  # (N_FEATURES,) = (10,)
+    F = compute_features(session)             # (N, 10)
+    yaw, lean, roll = F[:, YAW], F[:, LEAN], F[:, ROLL]
+
+Angles are in degrees. lift_l / lift_r are NaN when the torso is too small
+to normalize by (no usable walk-in-place sample). vis_arm / vis_torso are
+the lowest MediaPipe visibility among the right-arm / torso landmarks.
+
+    column     index      meaning
+    yaw        YAW        turning proxy
+    lean       LEAN       forward / back lean
+    roll       ROLL       side lean
+    elev       ELEV       right arm elevation (deg)
+    fwd        FWD        right arm toward the camera (deg)
+    elbow      ELBOW      right elbow angle (deg)
+    lift_l     LIFT_L     left hip-to-ankle height / torso length
+    lift_r     LIFT_R     right hip-to-ankle height / torso length
+    vis_arm    VIS_ARM    min visibility of shoulder / elbow / wrist (right)
+    vis_torso  VIS_TORSO  min visibility of both shoulders and hips
+"""
+import numpy as np
+
+from pose_worker import N_LANDMARKS, PoseResult, proto_to_landmarks
+
+# MediaPipe Pose landmark indices used here
+SHOULDER_L, SHOULDER_R = 11, 12
+ELBOW_R = 14
+WRIST_R = 16
+HIP_L, HIP_R = 23, 24
+ANKLE_L, ANKLE_R = 27, 28
+
+FEATURES = ("yaw", "lean", "roll", "elev", "fwd", "elbow", "lift_l", "lift_r",
+            "vis_arm", "vis_torso")
+(YAW, LEAN, ROLL, ELEV, FWD, ELBOW, LIFT_L, LIFT_R,
+ VIS_ARM, VIS_TORSO) = range(len(FEATURES))
+N_FEATURES = len(FEATURES)
+
+_ARM = [SHOULDER_R, ELBOW_R, WRIST_R]
+_TORSO = [SHOULDER_L, SHOULDER_R, HIP_L, HIP_R]
+
+_EPS = 1e-9
+
+
+def landmarks_of(results, out=None):
+    """(33, 4) array from a PoseResult or an mp_pose result, None without a pose."""
+    if isinstance(results, PoseResult):
+        return results.landmarks
+    if not results.pose_landmarks:
+        return None
+    return proto_to_landmarks(results.pose_landmarks, out)
+
+
+def compute_features(lm, yaw_sign=1.0, lean_sign=-1.0, roll_sign=-1.0, out=None):
+    """
+    lm: (..., 33, 4) landmarks. Returns (..., N_FEATURES) float32:
+
+      yaw    right-minus-left shoulder depth (turning proxy)
+      lean   hip-minus-shoulder centre depth (forward/back lean)
+      roll   shoulder tilt minus hip tilt over shoulder width (side lean)
+      elev   right arm elevation above the horizontal plane
+      fwd    right arm angle toward the camera
+      elbow  right elbow angle (180 = straight)
+      lift_l, lift_r  hip-to-ankle height over torso length
+      vis_arm, vis_torso  lowest landmark visibility in the group
+    """
+    lm = np.asarray(lm, dtype=np.float32)
+    if lm.shape[-2:] != (N_LANDMARKS, 4):
+        raise ValueError(f"expected (..., {N_LANDMARKS}, 4) landmarks, got {lm.shape}")
+    if out is None:
+        out = np.empty(lm.shape[:-2] + (N_FEATURES,), np.float32)
+
+    x, y, z = lm[..., 0], lm[..., 1], lm[..., 2]
+
+    sh_cx = (x[..., SHOULDER_L] + x[..., SHOULDER_R]) * 0.5
+    sh_cy = (y[..., SHOULDER_L] + y[..., SHOULDER_R]) * 0.5
+    sh_cz = (z[..., SHOULDER_L] + z[..., SHOULDER_R]) * 0.5
+    hip_cx = (x[..., HIP_L] + x[..., HIP_R]) * 0.5
+    hip_cy = (y[..., HIP_L] + y[..., HIP_R]) * 0.5
+    hip_cz = (z[..., HIP_L] + z[..., HIP_R]) * 0.5
+
+    # Torso orientation
+    out[..., YAW] = (z[..., SHOULDER_R] - z[..., SHOULDER_L]) * yaw_sign
+    out[..., LEAN] = (hip_cz - sh_cz) * lean_sign
+
+    shoulder_w = np.abs(x[..., SHOULDER_R] - x[..., SHOULDER_L])
+    tilt = ((y[..., SHOULDER_L] - y[..., SHOULDER_R])
+            - (y[..., HIP_L] - y[..., HIP_R]))
+    roll = np.zeros_like(tilt)
+    np.divide(tilt, shoulder_w, out=roll, where=shoulder_w >= 1e-6)
+    out[..., ROLL] = roll * roll_sign
+
+    # Right arm: shoulder -> wrist direction
+    sh = lm[..., SHOULDER_R, :3]
+    el = lm[..., ELBOW_R, :3]
+    wr = lm[..., WRIST_R, :3]
+    arm = wr - sh
+    dx, dy, dz = arm[..., 0], arm[..., 1], arm[..., 2]
+    out[..., ELEV] = np.degrees(np.arctan2(-dy, np.hypot(dx, dz) + _EPS))
+    out[..., FWD] = np.degrees(np.arctan2(-dz, np.hypot(dx, dy) + _EPS))
+
+    ab = sh - el
+    cb = wr - el
+    nab = np.sqrt((ab * ab).sum(axis=-1)) + _EPS
+    ncb = np.sqrt((cb * cb).sum(axis=-1)) + _EPS
+    cos = (ab * cb).sum(axis=-1) / (nab * ncb)
+    out[..., ELBOW] = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+    # Ankle lift normalized by torso length (walk-in-place)
+    scale = np.hypot(sh_cx - hip_cx, sh_cy - hip_cy)
+    ok = scale >= 1e-6
+    for col, ank in ((LIFT_L, ANKLE_L), (LIFT_R, ANKLE_R)):
+        lift = np.full_like(scale, np.nan)
+        np.divide(hip_cy - y[..., ank], scale, out=lift, where=ok)
+        out[..., col] = lift
+
+    vis = lm[..., 3]
+    out[..., VIS_ARM] = vis[..., _ARM].min(axis=-1)
+    out[..., VIS_TORSO] = vis[..., _TORSO].min(axis=-1)
+    return out
@@ -0,0 +1,280 @@
+"""
+Record and replay body_control_thread sessions.
+
+A recording is a small JSON header followed by fixed-size little-endian
+records (RECORD_DTYPE): capture timestamp, frame id, the (33, 4) float32
+landmarks, flags (pose present / calibrating / calibration start / lean
+enabled), the classifier state and the R/L codes that were sent. The
+record area is read back with np.memmap, so a session of any length opens
+instantly and the landmarks come out as one (N, 33, 4) array.
+
+    python pose_recording.py session.posrec                 # max speed
+    python pose_recording.py session.posrec --speed 1       # real time
+    python pose_recording.py session.posrec --check         # exit 1 on diffs
+    python pose_recording.py session.posrec --set YAW_ON=0.1
+
+Replay runs the recorded landmarks through BodyClassifier and compares the
+emitted codes with the recorded ones. Calibration windows are replayed
+too, so the baselines match the live session. Each window opens with a
+calibration-start record, written even when no frame follows (a
+recalibration in manual mode still resets the classifier).
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from body_classifier import BodyClassifier, DEFAULTS, NEUTRAL, G_NONE, NO_POSE_CODES
+from pose_features import compute_features
+
+MAGIC = b"POSEREC1"
+_HDR = struct.Struct("<8sI")        # magic, total header size
+_HDR_ALIGN = 64
+
+FLAG_POSE = 0x01
+FLAG_CALIBRATING = 0x02
+FLAG_LEAN = 0x04
+FLAG_CALIB_START = 0x08              # begin_calibration() ran before this record
+
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),                    # capture time (time.monotonic, s)
+    ("landmarks", "<f4", (33, 4)),   # x, y, z, visibility
+    ("frame_id", "<u4"),
+    ("flags", "u1"),
+    ("state", "u1"),                 # body_classifier.STATES index
+    ("gesture", "u1"),               # body_classifier.G_NONE / G_A / G_B
+    ("code_l", "S1"),
+    ("code_r", "S1"),
+    ("_pad", "V7"),
+])
+
+
+class PoseRecorder:
+    """Appends records to `path`. Not thread-safe: one writer (the body thread)."""
+
+    def __init__(self, path, params=None, flush_every=30):
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        self._rec = np.zeros(1, RECORD_DTYPE)
+        self._f = open(path, "wb")
+
+        meta = {
+            "version": 1,
+            "record_size": RECORD_DTYPE.itemsize,
+            "created": time.time(),
+            "params": params or {},
+        }
+        body = json.dumps(meta).encode()
+        size = _HDR.size + len(body)
+        size += (-size) % _HDR_ALIGN
+        self._f.write(_HDR.pack(MAGIC, size) + body.ljust(size - _HDR.size, b" "))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, t, frame_id, landmarks, commands, state=NEUTRAL,
+               gesture=G_NONE, calibrating=False, lean_enabled=False,
+               calib_start=False):
+        """
+        commands: ((codeL, nameL), (codeR, nameR)) as passed to set_commands.
+        calib_start marks the record written when a calibration begins
+        (landmarks=None if no frame goes with it).
+        """
+        r = self._rec[0]
+        r["t"] = t
+        r["frame_id"] = frame_id & 0xFFFFFFFF
+        flags = 0
+        if landmarks is not None:
+            r["landmarks"] = landmarks
+            flags |= FLAG_POSE
+        else:
+            r["landmarks"] = 0.0
+        if calibrating:
+            flags |= FLAG_CALIBRATING
+        if calib_start:
+            flags |= FLAG_CALIBRATING | FLAG_CALIB_START
+        if lean_enabled:
+            flags |= FLAG_LEAN
+        r["flags"] = flags
+        r["state"] = state
+        r["gesture"] = gesture
+        r["code_l"] = commands[0][0].encode()
+        r["code_r"] = commands[1][0].encode()
+        self._f.write(self._rec.tobytes())
+
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class PoseRecording:
+    """Memory-mapped view of a recording. A torn last record is ignored."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, size = _HDR.unpack(f.read(_HDR.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a pose recording")
+            self.meta = json.loads(f.read(size - _HDR.size))
+        if self.meta.get("record_size") != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path}: record size {self.meta.get('record_size')}, "
+                             f"expected {RECORD_DTYPE.itemsize}")
+
+        n = (os.path.getsize(path) - size) // RECORD_DTYPE.itemsize
+        if n > 0:
+            self.records = np.memmap(path, RECORD_DTYPE, mode="r", offset=size,
+                                     shape=(n,))
+        else:
+            self.records = np.zeros(0, RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def t(self):
+        return self.records["t"]
+
+    @property
+    def landmarks(self):
+        return self.records["landmarks"]
+
+    @property
+    def params(self):
+        """Recorded classifier params this version still knows about."""
+        return {k: v for k, v in self.meta.get("params", {}).items() if k in DEFAULTS}
+
+
+class ReplayResult:
+    def __init__(self, frames, mismatches, elapsed, first_mismatch):
+        self.frames = frames
+        self.mismatches = mismatches
+        self.elapsed = elapsed
+        self.first_mismatch = first_mismatch    # record index or None
+
+    @property
+    def fps(self):
+        return self.frames / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def summary(self):
+        return (f"frames={self.frames}  {self.fps:.0f} frames/s  "
+                f"mismatches={self.mismatches}")
+
+
+def recording_features(recording, classifier):
+    """Feature lists for every record, in one vectorized pass."""
+    clf = classifier
+    return compute_features(recording.landmarks, clf.YAW_SIGN, clf.LEAN_SIGN,
+                            clf.ROLL_SIGN).tolist()
+
+
+def replay(recording, classifier=None, speed=None, on_step=None, features=None):
+    """
+    Feed a PoseRecording through `classifier` (a fresh BodyClassifier with
+    the recorded params by default). speed=None runs flat out, 1.0 is real
+    time. on_step(i, (codeL, codeR)) is called for every non-calibration frame.
+    `features` reuses the output of recording_features() across replays.
+    """
+    rec = recording.records
+    if classifier is None:
+        classifier = BodyClassifier(**recording.params)
+    clf = classifier
+
+    feats = features if features is not None else recording_features(recording, clf)
+    ts = rec["t"].tolist()
+    flags = rec["flags"].tolist()
+    codes_l = [c.decode() for c in rec["code_l"].tolist()]
+    codes_r = [c.decode() for c in rec["code_r"].tolist()]
+
+    mismatches = 0
+    first = None
+    calibrating = False
+    t_start = time.perf_counter()
+    for i, f in enumerate(feats):
+        fl = flags[i]
+        if speed:
+            delay = (ts[i] - ts[0]) / speed - (time.perf_counter() - t_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        if fl & FLAG_CALIBRATING:
+            # Recordings made before FLAG_CALIB_START open a window on its first frame
+            if calibrating and fl & FLAG_CALIB_START:
+                clf.end_calibration()
+            if not calibrating or fl & FLAG_CALIB_START:
+                clf.begin_calibration()
+                calibrating = True
+            if fl & FLAG_POSE:
+                clf.add_calibration(f)
+            continue
+        if calibrating:
+            clf.end_calibration()
+            calibrating = False
+
+        clf.lean_enabled = bool(fl & FLAG_LEAN)
+        codes = clf.step(f, ts[i]) if fl & FLAG_POSE else NO_POSE_CODES
+        if on_step is not None:
+            on_step(i, codes)
+        if codes[0] != codes_l[i] or codes[1] != codes_r[i]:
+            mismatches += 1
+            if first is None:
+                first = i
+
+    return ReplayResult(len(feats), mismatches, time.perf_counter() - t_start, first)
+
+
+def _parse_set(items):
+    params = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        for conv in (int, float, str):
+            try:
+                params[name.strip()] = conv(value)
+                break
+            except ValueError:
+                pass
+    return params
+
+
+def main():
+    ap = argparse.ArgumentParser(description="replay a recorded pose session")
+    ap.add_argument("path")
+    ap.add_argument("--speed", type=float, default=None,
+                    help="1.0 = real time (default: as fast as possible)")
+    ap.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                    help="override a classifier parameter")
+    ap.add_argument("--check", action="store_true",
+                    help="exit 1 when replayed codes differ from the recording")
+    args = ap.parse_args()
+
+    rec = PoseRecording(args.path)
+    params = dict(rec.params)
+    params.update(_parse_set(args.set))
+    res = replay(rec, BodyClassifier(**params), speed=args.speed)
+
+    duration = float(rec.t[-1] - rec.t[0]) if len(rec) > 1 else 0.0
+    print(f"[REPLAY] {args.path}: {len(rec)} records, {duration:.1f} s recorded")
+    print(f"[REPLAY] {res.summary()}")
+    if res.first_mismatch is not None:
+        print(f"[REPLAY] first mismatch at record {res.first_mismatch} "
+              f"(frame {int(rec.records['frame_id'][res.first_mismatch])})")
+    if args.check and res.mismatches:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""
+MediaPipe Pose in a separate process.
+
+The parent copies each RGB frame into a shared-memory buffer and sends the
+frame id and size over a localhost socket; the worker runs pose.process()
+on that part of the shared buffer and writes the landmarks into a
+seqlock-protected result slot (also shared memory), then echoes the id
+back. Only 16-byte requests cross the socket, so the Tk thread and the
+capture thread never share a GIL with inference.
+
+The input buffer is sized for the largest frame seen so far: ROI crops,
+full-frame retries and governor resolution changes reuse the running
+worker, only a larger frame than ever before respawns it.
+
+PoseWorker.process(rgb) returns an object with `.pose_landmarks`, just like
+mp_pose.Pose.process(), so body_control_thread can use either. If the
+worker dies or stops answering it is killed and restarted, and that frame
+simply yields no landmarks.
+
+The worker is launched with subprocess (not multiprocessing) on purpose:
+spawn would re-import GUI.py in the child and build a second Tk window.
+"""
+import argparse
+import socket
+import struct
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from hotlog import LOG
+
+N_LANDMARKS = 33
+
+_ID = struct.Struct("<q")
+_REQ = struct.Struct("<qii")        # frame id, height, width
+_READY = -1
+_QUIT = -2
+
+# Result slot: seq, frame_id, has_pose (int64) | infer_ms (float64) | 33x4 float32
+_HDR_I64 = 3
+_HDR_BYTES = _HDR_I64 * 8 + 8
+_RESULT_BYTES = _HDR_BYTES + N_LANDMARKS * 4 * 4
+
+
+class ResultSlot:
+    """
+    Single-writer seqlock over a shared buffer: the writer makes seq odd,
+    writes, makes it even again; readers retry until they see the same even
+    seq before and after copying. No locks shared between processes.
+    """
+
+    def __init__(self, buf):
+        self._hdr = np.ndarray((_HDR_I64,), np.int64, buffer=buf)
+        self._ms = np.ndarray((1,), np.float64, buffer=buf, offset=_HDR_I64 * 8)
+        self._lm = np.ndarray((N_LANDMARKS, 4), np.float32, buffer=buf,
+                              offset=_HDR_BYTES)
+
+    def write(self, frame_id, landmarks, infer_ms):
+        """landmarks: (33, 4) array-like of x, y, z, visibility, or None."""
+        hdr = self._hdr
+        hdr[0] += 1
+        hdr[1] = frame_id
+        hdr[2] = landmarks is not None
+        self._ms[0] = infer_ms
+        if landmarks is not None:
+            self._lm[:] = landmarks
+        hdr[0] += 1
+
+    def read(self, out=None, spins=1000):
+        """Returns (frame_id, has_pose, infer_ms) and fills `out` (33, 4)."""
+        if out is None:
+            out = np.empty((N_LANDMARKS, 4), np.float32)
+        hdr = self._hdr
+        for _ in range(spins):
+            s1 = int(hdr[0])
+            if s1 & 1:
+                continue
+            frame_id, has_pose = int(hdr[1]), bool(hdr[2])
+            infer_ms = float(self._ms[0])
+            out[:] = self._lm
+            if int(hdr[0]) == s1:
+                return frame_id, has_pose, infer_ms
+        raise RuntimeError("result slot kept changing under the reader")
+
+
+def proto_to_landmarks(landmark_list, out=None):
+    """NormalizedLandmarkList -> (33, 4) float32 array of x, y, z, visibility."""
+    if out is None:
+        out = np.empty((N_LANDMARKS, 4), np.float32)
+    for i, p in enumerate(landmark_list.landmark):
+        out[i] = (p.x, p.y, p.z, p.visibility)
+    return out
+
+
+def landmarks_to_proto(arr):
+    """(33, 4) array -> NormalizedLandmarkList, for mp_drawing and old code."""
+    from mediapipe.framework.formats import landmark_pb2
+
+    lst = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, v in arr.tolist():
+        lm = lst.landmark.add()
+        lm.x, lm.y, lm.z, lm.visibility = x, y, z, v
+    return lst
+
+
+class PoseResult:
+    __slots__ = ("frame_id", "landmarks", "infer_ms", "_proto")
+
+    def __init__(self, frame_id, landmarks, infer_ms):
+        self.frame_id = frame_id
+        self.landmarks = landmarks      # (33, 4) float32 or None
+        self.infer_ms = infer_ms
+        self._proto = None
+
+    @property
+    def pose_landmarks(self):
+        if self.landmarks is None:
+            return None
+        if self._proto is None:
+            self._proto = landmarks_to_proto(self.landmarks)
+        return self._proto
+
+
+def _recv_exact(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class PoseWorker:
+    def __init__(self, model_complexity=0, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, timeout=2.0, startup_timeout=60.0):
+        self.options = (model_complexity, min_detection_confidence,
+                        min_tracking_confidence)
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.restarts = 0
+
+        self._capacity = 0              # bytes in the input buffer
+        self._shm_in = None
+        self._shm_out = None
+        self._slot = None
+        self._proc = None
+        self._sock = None
+        self._next_id = 0
+
+    # Same context-manager shape as mp_pose.Pose
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def _alloc(self, nbytes):
+        self._free_shm()
+        self._capacity = nbytes
+        self._shm_in = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._shm_out = shared_memory.SharedMemory(create=True, size=_RESULT_BYTES)
+        self._slot = ResultSlot(self._shm_out.buf)
+
+    def _free_shm(self):
+        self._slot = None
+        for shm in (self._shm_in, self._shm_out):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._shm_in = self._shm_out = None
+        self._capacity = 0
+
+    def _spawn(self):
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(1)
+        listener.settimeout(self.startup_timeout)
+        complexity, det, track = self.options
+        self._proc = subprocess.Popen([
+            sys.executable, __file__, "--worker",
+            "--port", str(listener.getsockname()[1]),
+            "--shm-in", self._shm_in.name, "--shm-out", self._shm_out.name,
+            "--complexity", str(complexity),
+            "--det", str(det), "--track", str(track),
+        ])
+        try:
+            self._sock, _ = listener.accept()
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock.settimeout(self.startup_timeout)
+            msg = _recv_exact(self._sock, _ID.size)
+            if msg is None or _ID.unpack(msg)[0] != _READY:
+                raise ConnectionError("pose worker failed to start")
+            self._sock.settimeout(self.timeout)
+        finally:
+            listener.close()
+        LOG.info("POSE-WORKER", "Started pid={} input buffer={} bytes",
+                 self._proc.pid, self._capacity)
+
+    def _kill(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.sendall(_REQ.pack(_QUIT, 0, 0))
+                self._proc.wait(timeout=2.0)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self._kill()
+        self._free_shm()
+
+    def _restart(self, reason):
+        self.restarts += 1
+        LOG.warning("POSE-WORKER", "Restarting ({}), restarts={}", reason, self.restarts)
+        self._kill()
+
+    # ------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------
+    def process(self, rgb):
+        """Blocking round trip to the worker. Never raises on worker death."""
+        h, w = rgb.shape[:2]
+        if rgb.nbytes > self._capacity:
+            # Only ever grows: smaller frames (ROI crops) reuse the buffer
+            self._kill()
+            self._alloc(rgb.nbytes)
+        if self._proc is None or self._proc.poll() is not None:
+            if self._proc is not None:
+                self._restart(f"exit code {self._proc.returncode}")
+            try:
+                self._spawn()
+            except (OSError, ConnectionError) as e:
+                self._restart(f"start failed: {e}")
+                return PoseResult(0, None, 0.0)
+
+        self._next_id += 1
+        frame_id = self._next_id
+        frame = np.ndarray((h, w, 3), np.uint8, buffer=self._shm_in.buf)
+        np.copyto(frame, rgb)
+        del frame                       # no view may outlive the segment
+        try:
+            self._sock.sendall(_REQ.pack(frame_id, h, w))
+            msg = _recv_exact(self._sock, _ID.size)
+        except OSError as e:            # includes socket.timeout
+            self._restart(str(e) or type(e).__name__)
+            return PoseResult(frame_id, None, 0.0)
+        if msg is None:
+            self._restart("worker closed the socket")
+            return PoseResult(frame_id, None, 0.0)
+
+        lm = np.empty((N_LANDMARKS, 4), np.float32)
+        got_id, has_pose, infer_ms = self._slot.read(lm)
+        if got_id != frame_id:
+            return PoseResult(frame_id, None, infer_ms)
+        return PoseResult(frame_id, lm if has_pose else None, infer_ms)
+
+
+# ================================================================
+# Worker process
+# ================================================================
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # Python < 3.13 registers attached segments with the resource tracker,
+    # which would unlink them when the worker exits; the parent owns them.
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _worker_main(args):
+    shm_in = _attach(args.shm_in)
+    shm_out = _attach(args.shm_out)
+    slot = ResultSlot(shm_out.buf)
+    lm = np.empty((N_LANDMARKS, 4), np.float32)
+
+    sock = socket.create_connection(("127.0.0.1", args.port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    import mediapipe as mp
+
+    with mp.solutions.pose.Pose(
+        model_complexity=args.complexity,
+        min_detection_confidence=args.det,
+        min_tracking_confidence=args.track,
+    ) as pose:
+        sock.sendall(_ID.pack(_READY))
+        while True:
+            msg = _recv_exact(sock, _REQ.size)
+            if msg is None:
+                break
+            frame_id, h, w = _REQ.unpack(msg)
+            if frame_id == _QUIT:
+                break
+
+            frame = np.ndarray((h, w, 3), np.uint8, buffer=shm_in.buf)
+            t0 = time.perf_counter()
+            results = pose.process(frame)
+            del frame
+            infer_ms = (time.perf_counter() - t0) * 1000.0
+
+            if results.pose_landmarks:
+                slot.write(frame_id, proto_to_landmarks(results.pose_landmarks, lm),
+                           infer_ms)
+            else:
+                slot.write(frame_id, None, infer_ms)
+            sock.sendall(_ID.pack(frame_id))
+
+    sock.close()
+    del slot
+    shm_in.close()
+    shm_out.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MediaPipe pose worker process")
+    ap.add_argument("--worker", action="store_true", required=True)
+    ap.add_argument("--port", type=int, required=True)
+    ap.add_argument("--shm-in", required=True)
+    ap.add_argument("--shm-out", required=True)
+    ap.add_argument("--complexity", type=int, default=0)
+    ap.add_argument("--det", type=float, default=0.5)
+    ap.add_argument("--track", type=float, default=0.5)
+    _worker_main(ap.parse_args())
+
+
+if __name__ == "__main__":
+    main()
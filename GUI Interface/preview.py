@@ -0,0 +1,132 @@
+"""
+Camera preview rendering off the Tk thread.
+
+PreviewRenderer waits on the FrameRing for a new frame id (never redraws
+the same frame), at most `max_fps` times per second, and composes the
+overlay in its own thread:
+
+    ring slot --copy / resize--> BGR work buffer --compose()--> --cvtColor--> RGB buffer
+
+With `width` set, frames are downscaled first so the overlay is drawn at
+preview resolution instead of camera resolution.
+
+The RGB result alternates between two preallocated buffers. The Tk side
+only pastes the newest one into a persistent PhotoImage:
+
+    renderer = PreviewRenderer(frame_ring, compose=draw_overlay, max_fps=20)
+    renderer.start()
+    ...
+    shown_id = renderer.show(shown_id, paste)   # in the Tk loop, cheap when
+                                                # nothing new was rendered
+
+`show` holds the publish lock while paste(rgb) runs, so the buffer being
+pasted is never the one the renderer is writing.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from hotlog import LOG
+
+
+class PreviewRenderer:
+    def __init__(self, ring, compose=None, max_fps=20.0, width=0):
+        self.ring = ring
+        self.compose = compose          # compose(bgr) draws in place
+        self.max_fps = max_fps          # <= 0: every camera frame
+        self.width = width              # preview width in px, 0 = camera size
+        self.rendered = 0               # frames composed
+        self._lock = threading.Lock()
+        self._work = None
+        self._rgb = [None, None]
+        self._front = 0
+        self._front_id = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="preview", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def frame_id(self):
+        """Id of the newest composed frame (0 = none yet)."""
+        return self._front_id
+
+    # ------------------------------------------------------------
+    # Renderer thread
+    # ------------------------------------------------------------
+    def _render(self, f):
+        with f:
+            img = f.image
+            h, w = img.shape[:2]
+            if self.width and self.width < w:
+                shape = (round(h * self.width / w), self.width) + img.shape[2:]
+            else:
+                shape = img.shape
+            if self._work is None or self._work.shape != shape:
+                with self._lock:
+                    self._work = np.empty(shape, img.dtype)
+                    self._rgb = [np.empty(shape, img.dtype), np.empty(shape, img.dtype)]
+                    self._front_id = 0
+            # Copy out and give the camera its slot back right away
+            if shape == img.shape:
+                np.copyto(self._work, img)
+            else:
+                cv2.resize(img, (shape[1], shape[0]), dst=self._work,
+                           interpolation=cv2.INTER_AREA)
+            frame_id = f.frame_id
+
+        if self.compose is not None:
+            self.compose(self._work)
+
+        # Write the back buffer; show() only ever reads the front one
+        back = 1 - self._front
+        cv2.cvtColor(self._work, cv2.COLOR_BGR2RGB, dst=self._rgb[back])
+        with self._lock:
+            self._front = back
+            self._front_id = frame_id
+        self.rendered += 1
+
+    def _run(self):
+        last_id = 0
+        next_t = 0.0
+        while self._running:
+            if self.max_fps > 0:
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            f = self.ring.wait_newer(last_id, timeout=0.1)
+            if f is None:
+                continue
+            last_id = f.frame_id
+            next_t = time.monotonic() + (1.0 / self.max_fps if self.max_fps > 0 else 0.0)
+            try:
+                self._render(f)
+            except Exception as e:
+                f.release()
+                LOG.error("PREVIEW", "render failed: {!r}", e)
+                time.sleep(0.1)
+
+    # ------------------------------------------------------------
+    # Tk thread
+    # ------------------------------------------------------------
+    def show(self, last_id, paste):
+        """
+        Calls paste(rgb) with the newest composed frame if its id is newer
+        than last_id. Returns the id now on screen.
+        """
+        if self._front_id <= last_id:
+            return last_id
+        with self._lock:
+            paste(self._rgb[self._front])
+            return self._front_id
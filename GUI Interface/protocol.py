@@ -0,0 +1,347 @@
+"""
+GUI <-> ESP32 command protocol.
+
+Text (fallback, what every firmware understands):
+    "R<r>,L<l>\\n"  |  "A,A\\n"  |  "B,B\\n"
+
+Binary (negotiated per connection): the GUI sends "HELLO BIN2 BIN1\\n"
+(versions it speaks, preferred first). A firmware that supports frames
+answers "OK BIN<n>\\n" (or "OK TEXT\\n") but keeps reading text until the
+GUI confirms with "USE BIN<n>\\n"; from then on it reads fixed size frames
+of that version. A GUI whose hello timed out never confirms and just
+sends text, so a late answer can't leave the two ends in different modes.
+
+    v1 (8 bytes)                      v2 (12 bytes) = v1 + timestamp + acks
+    0  version                        0  version
+    1  flags (GESTURE_A|GESTURE_B)    1  flags
+    2  seq lo  (uint16 LE, wraps)     2  seq lo
+    3  seq hi                         3  seq hi
+    4  left code  0..5 (0 = as is)    4  left code
+    5  right code 0..5                5  right code
+    6  reserved (0)                   6  reserved (0)
+    7  crc8                           7-10  t_us (uint32 LE, sender clock)
+                                      11 crc8
+
+With v2 the firmware answers every applied frame with an 8-byte ack that
+echoes seq and t_us, so the GUI gets the RTT without keeping send times:
+
+    0  ACK_MAGIC | 1-2 seq | 3-6 t_us | 7 crc8
+
+crc8 is poly 0x07 over every byte before it. Gestures travel as flags with
+both arm codes at 0, which matches how the firmware treats "A,A" / "B,B"
+(parseRL fails, arms untouched). Keep this file in sync with Esp32Server.ino.
+"""
+import struct
+
+FRAME_V1 = 1
+FRAME_V2 = 2
+FRAME_SIZES = {FRAME_V1: 8, FRAME_V2: 12}
+
+ACK_MAGIC = 0xAC
+ACK_SIZE = 8
+
+FLAG_GESTURE_A = 0x01
+FLAG_GESTURE_B = 0x02
+
+_HEAD = struct.Struct("<BBHBBB")    # v1/v2 common part, without crc
+_TS = struct.Struct("<I")
+_ACK = struct.Struct("<BHI")
+
+
+class FrameError(ValueError):
+    pass
+
+
+# ================================================================
+# CRC-8 (poly 0x07, init 0x00) — same loop as the firmware
+# ================================================================
+def _make_crc8_table():
+    table = []
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = ((c << 1) ^ 0x07) & 0xFF if c & 0x80 else (c << 1) & 0xFF
+        table.append(c)
+    return bytes(table)
+
+
+_CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(data):
+    c = 0
+    for b in data:
+        c = _CRC8_TABLE[c ^ b]
+    return c
+
+
+# ================================================================
+# Negotiation
+# ================================================================
+def hello(versions):
+    """versions: frame versions the GUI speaks, preferred first."""
+    return ("HELLO " + " ".join(f"BIN{v}" for v in versions) + "\n").encode()
+
+
+def parse_hello(line):
+    """Versions offered in a HELLO line, or None if it is not a HELLO."""
+    if isinstance(line, bytes):
+        line = line.decode(errors="ignore")
+    tokens = line.split()
+    if not tokens or tokens[0] != "HELLO":
+        return None
+    out = []
+    for tok in tokens[1:]:
+        if tok.startswith("BIN") and tok[3:].isdigit():
+            out.append(int(tok[3:]))
+    return out
+
+
+def hello_ok(version):
+    return b"OK TEXT\n" if not version else f"OK BIN{version}\n".encode()
+
+
+def hello_use(version):
+    """The GUI's confirmation after "OK BIN<n>": switch to frames now."""
+    return f"USE BIN{version}\n".encode()
+
+
+def parse_hello_use(line):
+    """Confirmed frame version, None if the line is not a "USE BIN<n>"."""
+    if isinstance(line, bytes):
+        line = line.decode(errors="ignore")
+    tokens = line.split()
+    if len(tokens) != 2 or tokens[0] != "USE" or not tokens[1].startswith("BIN"):
+        return None
+    v = tokens[1][3:]
+    return int(v) if v.isdigit() and int(v) in FRAME_SIZES else None
+
+
+def parse_hello_ok(line):
+    """Chosen frame version, 0 for "OK TEXT", None for anything else."""
+    if isinstance(line, bytes):
+        line = line.decode(errors="ignore")
+    tokens = line.split()
+    if len(tokens) != 2 or tokens[0] != "OK":
+        return None
+    if tokens[1] == "TEXT":
+        return 0
+    if tokens[1].startswith("BIN") and tokens[1][3:].isdigit():
+        v = int(tokens[1][3:])
+        return v if v in FRAME_SIZES else None
+    return None
+
+
+# ================================================================
+# Text protocol
+# ================================================================
+def encode_text(L, R):
+    """Same wire format the firmware's parseRL / handleGestureCommand expect."""
+    if L == "A" and R == "A":
+        return b"A,A\n"
+    if L == "B" and R == "B":
+        return b"B,B\n"
+    return f"R{R},L{L}\n".encode()
+
+
+def decode_text(line):
+    """
+    Mirrors the firmware: returns (L, R) codes as strings, or None when the
+    line is neither a gesture nor a valid "R..,L.." command.
+    """
+    if isinstance(line, bytes):
+        line = line.decode(errors="ignore")
+    line = line.strip()
+    if line == "A,A":
+        return "A", "A"
+    if line == "B,B":
+        return "B", "B"
+
+    right, sep, left = line.partition(",")
+    if not sep:
+        return None
+    right, left = right.strip(), left.strip()
+    if not right.startswith("R") or not left.startswith("L"):
+        return None
+    return str(_to_int(left[1:])), str(_to_int(right[1:]))
+
+
+def _to_int(s):
+    # Arduino String::toInt(): leading digits, 0 if none
+    digits = ""
+    for ch in s.strip():
+        if ch.isdigit() or (ch == "-" and not digits):
+            digits += ch
+        else:
+            break
+    try:
+        return int(digits)
+    except ValueError:
+        return 0
+
+
+# ================================================================
+# Binary protocol
+# ================================================================
+class Command:
+    __slots__ = ("version", "seq", "flags", "left", "right", "t_us")
+
+    def __init__(self, version, seq, flags, left, right, t_us=0):
+        self.version = version
+        self.seq = seq
+        self.flags = flags
+        self.left = left
+        self.right = right
+        self.t_us = t_us
+
+    @property
+    def codes(self):
+        """(L, R) as the GUI writes them ("A"/"B" for gestures)."""
+        if self.flags & FLAG_GESTURE_A:
+            return "A", "A"
+        if self.flags & FLAG_GESTURE_B:
+            return "B", "B"
+        return str(self.left), str(self.right)
+
+    def __repr__(self):
+        return (f"Command(v{self.version}, seq={self.seq}, flags={self.flags:#04x}, "
+                f"L={self.left}, R={self.right}, t_us={self.t_us})")
+
+
+class Ack:
+    __slots__ = ("seq", "t_us")
+
+    def __init__(self, seq, t_us):
+        self.seq = seq
+        self.t_us = t_us
+
+    def __repr__(self):
+        return f"Ack(seq={self.seq}, t_us={self.t_us})"
+
+
+def _code_to_int(code):
+    try:
+        v = int(code)
+    except (TypeError, ValueError):
+        return 0
+    return v if 0 <= v <= 255 else 0
+
+
+def encode_frame(seq, L, R, version=FRAME_V1, t_us=0):
+    if L == "A" and R == "A":
+        flags, left, right = FLAG_GESTURE_A, 0, 0
+    elif L == "B" and R == "B":
+        flags, left, right = FLAG_GESTURE_B, 0, 0
+    else:
+        flags, left, right = 0, _code_to_int(L), _code_to_int(R)
+
+    body = _HEAD.pack(version, flags, seq & 0xFFFF, left, right, 0)
+    if version == FRAME_V2:
+        body += _TS.pack(t_us & 0xFFFFFFFF)
+    elif version != FRAME_V1:
+        raise FrameError(f"unsupported frame version {version}")
+    return body + bytes((crc8(body),))
+
+
+def decode_frame(buf):
+    if not buf or buf[0] not in FRAME_SIZES:
+        raise FrameError(f"unsupported frame version {buf[0] if buf else None}")
+    size = FRAME_SIZES[buf[0]]
+    if len(buf) != size:
+        raise FrameError(f"v{buf[0]} frame must be {size} bytes, got {len(buf)}")
+    if crc8(buf[:size - 1]) != buf[size - 1]:
+        raise FrameError("crc mismatch")
+    version, flags, seq, left, right, _ = _HEAD.unpack_from(buf)
+    t_us = _TS.unpack_from(buf, _HEAD.size)[0] if version == FRAME_V2 else 0
+    return Command(version, seq, flags, left, right, t_us)
+
+
+def encode_ack(seq, t_us):
+    body = _ACK.pack(ACK_MAGIC, seq & 0xFFFF, t_us & 0xFFFFFFFF)
+    return body + bytes((crc8(body),))
+
+
+def decode_ack(buf):
+    if len(buf) != ACK_SIZE or buf[0] != ACK_MAGIC:
+        raise FrameError("not an ack frame")
+    if crc8(buf[:ACK_SIZE - 1]) != buf[ACK_SIZE - 1]:
+        raise FrameError("crc mismatch")
+    _, seq, t_us = _ACK.unpack_from(buf)
+    return Ack(seq, t_us)
+
+
+def seq_newer(seq, last):
+    """Serial-number arithmetic on uint16 (RFC 1982 style)."""
+    d = (seq - last) & 0xFFFF
+    return d != 0 and d < 0x8000
+
+
+class _StreamDecoder:
+    """Fixed-size records found by their lead byte, resync on corruption."""
+
+    sizes = {}
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.crc_errors = 0
+
+    def _decode(self, buf):
+        raise NotImplementedError
+
+    def _accept(self, rec):
+        return True
+
+    def feed(self, data):
+        self._buf += data
+        out = []
+        buf = self._buf
+        while buf:
+            size = self.sizes.get(buf[0])
+            if size is None:
+                del buf[:1]
+                continue
+            if len(buf) < size:
+                break
+            try:
+                rec = self._decode(bytes(buf[:size]))
+            except FrameError:
+                self.crc_errors += 1
+                del buf[:1]          # resync on the next lead byte
+                continue
+            del buf[:size]
+            if self._accept(rec):
+                out.append(rec)
+        return out
+
+
+class FrameDecoder(_StreamDecoder):
+    """
+    Command frames (GUI -> ESP32). feed() returns the new, in-order
+    commands; corrupt and stale/reordered frames are counted and dropped.
+    """
+
+    sizes = FRAME_SIZES
+
+    def __init__(self):
+        super().__init__()
+        self.last_seq = None
+        self.stale = 0
+
+    def _decode(self, buf):
+        return decode_frame(buf)
+
+    def _accept(self, cmd):
+        if self.last_seq is not None and not seq_newer(cmd.seq, self.last_seq):
+            self.stale += 1
+            return False
+        self.last_seq = cmd.seq
+        return True
+
+
+class AckDecoder(_StreamDecoder):
+    """Ack frames (ESP32 -> GUI)."""
+
+    sizes = {ACK_MAGIC: ACK_SIZE}
+
+    def _decode(self, buf):
+        return decode_ack(buf)
@@ -0,0 +1,156 @@
+"""
+Region-of-interest tracking for pose inference.
+
+The operator stays in a stable part of the image, so instead of feeding the
+whole frame to MediaPipe every time, RoiTracker derives a padded square box
+from the last landmarks, warps that box into a small input_size x
+input_size image (one cv2.warpAffine, black borders when the box leaves the
+frame, no aspect distortion) and maps the resulting landmarks back to
+full-frame normalized coordinates. When the pose is lost it falls back to
+full-frame detection.
+
+The box only moves when the body drifts out of its inner margin or changes
+size noticeably: MediaPipe's own tracker assumes a steady image, so a crop
+that jitters every frame would fight its smoothing.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from pose_worker import PoseResult, proto_to_landmarks
+
+
+class RoiTracker:
+    def __init__(self, input_size=256, pad=0.25, min_visibility=0.5,
+                 min_points=8, inner_margin=0.10, resize_tolerance=0.20):
+        self.input_size = input_size
+        self.pad = pad
+        self.min_visibility = min_visibility
+        self.min_points = min_points
+        self.inner_margin = inner_margin
+        self.resize_tolerance = resize_tolerance
+
+        self.roi = None          # (x0, y0, side) in full-frame pixels
+        self._frame_wh = None
+        self._active = None      # ROI used for the image handed out last
+        self._dst = np.empty((input_size, input_size, 3), np.uint8)
+        self.full_frames = 0
+        self.roi_frames = 0
+
+    def reset(self):
+        self.roi = None
+
+    def prepare(self, rgb):
+        """Image to run inference on: the warped ROI, or the full frame."""
+        h, w = rgb.shape[:2]
+        if self._frame_wh != (w, h):
+            self._frame_wh = (w, h)
+            self.roi = None
+
+        self._active = self.roi
+        if self.roi is None:
+            self.full_frames += 1
+            return rgb
+
+        x0, y0, side = self.roi
+        s = self.input_size / side
+        m = np.array([[s, 0.0, -x0 * s], [0.0, s, -y0 * s]], np.float32)
+        cv2.warpAffine(rgb, m, (self.input_size, self.input_size), dst=self._dst,
+                       flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+        self.roi_frames += 1
+        return self._dst
+
+    def map_back(self, lm):
+        """
+        lm: (33, 4) landmarks relative to the image from prepare(), modified
+        in place to full-frame normalized coordinates. Also updates the ROI
+        for the next frame. None (no pose) drops back to full-frame.
+        """
+        if lm is None:
+            self.roi = None
+            return None
+
+        w, h = self._frame_wh
+        if self._active is not None:
+            x0, y0, side = self._active
+            lm[:, 0] = (lm[:, 0] * side + x0) / w
+            lm[:, 1] = (lm[:, 1] * side + y0) / h
+            # MediaPipe z uses the same scale as x (image width)
+            lm[:, 2] *= side / w
+
+        self._update_roi(lm)
+        return lm
+
+    def _update_roi(self, lm):
+        w, h = self._frame_wh
+        vis = lm[:, 3] >= self.min_visibility
+        if int(vis.sum()) < self.min_points:
+            self.roi = None
+            return
+
+        xs = lm[vis, 0] * w
+        ys = lm[vis, 1] * h
+        bx0, bx1 = float(xs.min()), float(xs.max())
+        by0, by1 = float(ys.min()), float(ys.max())
+        side = max(bx1 - bx0, by1 - by0) * (1.0 + 2.0 * self.pad)
+        if side < 1.0:
+            # Degenerate box (all points on one pixel): nothing to crop to
+            self.roi = None
+            return
+        if side >= 0.9 * max(w, h):
+            # Body fills the frame: cropping would not save anything
+            self.roi = None
+            return
+
+        if self.roi is not None:
+            x0, y0, cur = self.roi
+            m = cur * self.inner_margin
+            inside = (bx0 >= x0 + m and bx1 <= x0 + cur - m and
+                      by0 >= y0 + m and by1 <= y0 + cur - m)
+            ratio = side / cur
+            tol = self.resize_tolerance
+            if inside and (1.0 - tol) <= ratio <= (1.0 + tol):
+                return
+
+        cx = (bx0 + bx1) * 0.5
+        cy = (by0 + by1) * 0.5
+        self.roi = (cx - side * 0.5, cy - side * 0.5, side)
+
+
+class RoiPose:
+    """
+    Wraps a pose backend (mp_pose.Pose or PoseWorker) with a RoiTracker.
+    process(rgb) returns a PoseResult in full-frame coordinates.
+    """
+
+    def __init__(self, pose, tracker=None):
+        self.pose = pose
+        self.tracker = tracker or RoiTracker()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def process(self, rgb):
+        img = self.tracker.prepare(rgb)
+        t0 = time.perf_counter()
+        res = self.pose.process(img)
+        infer_ms = (time.perf_counter() - t0) * 1000.0
+
+        if isinstance(res, PoseResult):
+            lm = res.landmarks
+            frame_id = res.frame_id
+            infer_ms = res.infer_ms or infer_ms
+        else:
+            lm = proto_to_landmarks(res.pose_landmarks) if res.pose_landmarks else None
+            frame_id = 0
+
+        if lm is None and self.tracker._active is not None:
+            # Lost inside the crop: retry this same frame on the full image
+            self.tracker.reset()
+            return self.process(rgb)
+
+        return PoseResult(frame_id, self.tracker.map_back(lm), infer_ms)
@@ -0,0 +1,113 @@
+"""
+Round-trip statistics for the ESP32 ack channel (v2 frames).
+
+The link thread calls sent() / acked(); the Tk thread reads snapshot().
+Percentiles come from a window of recent samples, the histogram counts
+every sample since the last reset().
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from protocol import seq_newer
+
+# Histogram bucket upper bounds in ms; the last bucket is everything above
+RTT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _pct(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+class RttSnapshot:
+    __slots__ = ("count", "lost", "p50", "p95", "p99", "buckets")
+
+    def __init__(self, count, lost, p50, p95, p99, buckets):
+        self.count = count
+        self.lost = lost
+        self.p50 = p50          # ms, None until the first ack
+        self.p95 = p95
+        self.p99 = p99
+        self.buckets = buckets  # counts per RTT_BUCKETS_MS (+ overflow)
+
+    def summary(self):
+        if self.p50 is None:
+            return f"RTT: --  lost {self.lost}"
+        return (f"RTT p50 {self.p50:.1f} / p95 {self.p95:.1f} / "
+                f"p99 {self.p99:.1f} ms  lost {self.lost}")
+
+
+class RttTracker:
+    def __init__(self, window=256, ack_timeout=1.0):
+        self.ack_timeout = ack_timeout
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self._pending = OrderedDict()       # seq -> monotonic send time
+        self._buckets = [0] * (len(RTT_BUCKETS_MS) + 1)
+        self._count = 0
+        self._lost = 0
+        self._cached = None
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._pending.clear()
+            self._buckets = [0] * (len(RTT_BUCKETS_MS) + 1)
+            self._count = 0
+            self._lost = 0
+            self._cached = None
+
+    def sent(self, seq, t):
+        with self._lock:
+            self._pending[seq] = t
+
+    def acked(self, seq, rtt_s):
+        ms = rtt_s * 1000.0
+        with self._lock:
+            # Acks arrive in order: anything older still pending was dropped
+            while self._pending:
+                oldest = next(iter(self._pending))
+                if oldest == seq or not seq_newer(seq, oldest):
+                    break
+                self._pending.popitem(last=False)
+                self._lost += 1
+            self._pending.pop(seq, None)
+
+            self._recent.append(ms)
+            self._count += 1
+            i = 0
+            while i < len(RTT_BUCKETS_MS) and ms > RTT_BUCKETS_MS[i]:
+                i += 1
+            self._buckets[i] += 1
+            self._cached = None
+
+    def link_lost(self):
+        """Connection dropped: whatever is still in flight will never be acked."""
+        with self._lock:
+            self._lost += len(self._pending)
+            self._pending.clear()
+            self._cached = None
+
+    def _expire(self, now):
+        while self._pending:
+            seq, t = next(iter(self._pending.items()))
+            if now - t < self.ack_timeout:
+                break
+            self._pending.popitem(last=False)
+            self._lost += 1
+            self._cached = None
+
+    def snapshot(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            if self._cached is None:
+                vals = sorted(self._recent)
+                self._cached = RttSnapshot(self._count, self._lost,
+                                           _pct(vals, 50), _pct(vals, 95),
+                                           _pct(vals, 99), list(self._buckets))
+            return self._cached
@@ -0,0 +1,174 @@
+"""
+Pluggable smoothing for body signals or whole landmark arrays.
+
+Every smoother is called as `y = s(t, x)` with t in seconds and x a float
+or a NumPy array (filtered element-wise, e.g. the (33, 4) landmarks), and
+has reset(). All but FrameEma are parameterized in time, so they behave
+the same at 15 or 60 FPS:
+
+FrameEma                fixed alpha per frame (the original EMA_ALPHA behaviour)
+TimeEma                 exponential smoothing with a time constant in seconds
+OneEuro                 cutoff rises with speed: steady at rest, little lag
+                        on fast, deliberate moves (Casiez et al., CHI 2012)
+ConstantVelocityKalman  position + velocity per channel
+
+OneEuro and ConstantVelocityKalman track velocity and can extrapolate
+`lead` seconds ahead to hide part of the pipeline latency.
+"""
+import math
+
+
+def tau_from_alpha(alpha, fps=30.0):
+    """Time constant equivalent to a per-frame EMA alpha at `fps`."""
+    return -1.0 / (fps * math.log(1.0 - alpha))
+
+
+def _alpha(dt, cutoff):
+    """EMA weight for a first-order low-pass at `cutoff` Hz over dt."""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class FrameEma:
+    __slots__ = ("alpha", "y")
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.y = None
+
+    def reset(self):
+        self.y = None
+
+    def __call__(self, t, x):
+        a = self.alpha
+        if self.y is None:
+            self.y = x + 0.0            # copies arrays
+        else:
+            self.y = a * x + (1.0 - a) * self.y
+        return self.y
+
+
+class TimeEma:
+    __slots__ = ("tau", "y", "t")
+
+    def __init__(self, tau):
+        self.tau = tau
+        self.y = None
+        self.t = 0.0
+
+    def reset(self):
+        self.y = None
+
+    def __call__(self, t, x):
+        if self.y is None:
+            self.y = x + 0.0            # copies arrays
+        else:
+            dt = t - self.t
+            if dt > 0:
+                a = 1.0 - math.exp(-dt / self.tau)
+                self.y = a * x + (1.0 - a) * self.y
+        self.t = t
+        return self.y
+
+
+class OneEuro:
+    __slots__ = ("min_cutoff", "beta", "d_cutoff", "lead", "y", "dy", "t")
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0, lead=0.0):
+        self.min_cutoff = min_cutoff    # Hz at rest
+        self.beta = beta                # extra Hz per unit/s of speed
+        self.d_cutoff = d_cutoff        # Hz for the speed estimate
+        self.lead = lead                # s of extrapolation
+        self.reset()
+
+    def reset(self):
+        self.y = None
+        self.dy = 0.0
+        self.t = 0.0
+
+    def __call__(self, t, x):
+        if self.y is None:
+            self.y = x + 0.0
+            self.t = t
+            return self.y
+        dt = t - self.t
+        if dt > 0:
+            a_d = _alpha(dt, self.d_cutoff)
+            self.dy = a_d * ((x - self.y) / dt) + (1.0 - a_d) * self.dy
+            cutoff = self.min_cutoff + self.beta * abs(self.dy)
+            # Scalar or element-wise: 1 / (1 + tau/dt) with tau = 1/(2 pi fc)
+            a = 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+            self.y = a * x + (1.0 - a) * self.y
+            self.t = t
+        if self.lead:
+            return self.y + self.dy * self.lead
+        return self.y
+
+
+class ConstantVelocityKalman:
+    """
+    q: acceleration noise density (units/s^2)^2/Hz, how quickly the motion
+    can change; r: measurement variance (units^2), how noisy the input is.
+    """
+    __slots__ = ("q", "r", "lead", "x", "v", "p00", "p01", "p11", "t")
+
+    def __init__(self, q=1.0, r=4e-4, lead=0.0):
+        self.q = q
+        self.r = r
+        self.lead = lead
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = 0.0
+        self.t = 0.0
+
+    def __call__(self, t, z):
+        if self.x is None:
+            self.x = z + 0.0
+            self.v = z * 0.0
+            self.p00, self.p01, self.p11 = self.r, 0.0, 1.0
+            self.t = t
+            return self.x
+
+        dt = t - self.t
+        if dt > 0:
+            q = self.q
+            p00, p01, p11 = self.p00, self.p01, self.p11
+            # Predict
+            self.x = self.x + self.v * dt
+            p00 = p00 + dt * (2.0 * p01 + dt * p11) + q * dt * dt * dt / 3.0
+            p01 = p01 + dt * p11 + q * dt * dt / 2.0
+            p11 = p11 + q * dt
+            # Update
+            s = p00 + self.r
+            k0 = p00 / s
+            k1 = p01 / s
+            y = z - self.x
+            self.x = self.x + k0 * y
+            self.v = self.v + k1 * y
+            self.p00 = (1.0 - k0) * p00
+            self.p01 = (1.0 - k0) * p01
+            self.p11 = p11 - k1 * p01
+            self.t = t
+
+        if self.lead:
+            return self.x + self.v * self.lead
+        return self.x
+
+
+SMOOTHERS = ("ema", "time_ema", "one_euro", "kalman")
+
+
+def make_smoother(kind, alpha=0.35, fps=30.0, min_cutoff=1.0, beta=10.0,
+                  q=1.0, r=4e-4, lead=0.0):
+    """Smoother by name; `alpha`/`fps` define the EMA variants."""
+    if kind == "ema":
+        return FrameEma(alpha)
+    if kind == "time_ema":
+        return TimeEma(tau_from_alpha(alpha, fps))
+    if kind == "one_euro":
+        return OneEuro(min_cutoff, beta, lead=lead)
+    if kind == "kalman":
+        return ConstantVelocityKalman(q, r, lead=lead)
+    raise ValueError(f"unknown smoother {kind!r}, use one of {SMOOTHERS}")
@@ -0,0 +1,66 @@
+"""
+Cold-start profiling: where the time goes between launching GUI.py and the
+first command the body tracker sends.
+
+Phases are timed from any thread relative to a common origin (normally the
+first line of GUI.py), events mark one-off moments like the first camera
+frame:
+
+    startup = StartupProfile(t0)
+    with startup.phase("camera_open"):
+        cam.open()
+    if startup.mark("first_command"):
+        print(startup.report())
+
+Phases that run in parallel (warm-up in the background while the window is
+up) show up with overlapping start / end times.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self._lock = threading.Lock()
+        self.phases = []        # (name, start, end, thread), seconds since t0
+        self.events = {}        # name -> (t, thread), first occurrence only
+        self.reported = False
+
+    def add(self, name, start, end):
+        """Record a phase from perf_counter() timestamps."""
+        with self._lock:
+            self.phases.append((name, start - self.t0, end - self.t0,
+                                threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Record an event once; returns True the first time."""
+        with self._lock:
+            if name in self.events:
+                return False
+            self.events[name] = (time.perf_counter() - self.t0,
+                                 threading.current_thread().name)
+            return True
+
+    def report(self):
+        """Per-phase breakdown, phases and events in time order."""
+        with self._lock:
+            self.reported = True
+            rows = [(start, name, f"{start:7.3f}  {end - start:7.3f}", thread)
+                    for name, start, end, thread in self.phases]
+            rows += [(t, name, f"{t:7.3f}  {'':>7}", thread)
+                     for name, (t, thread) in self.events.items()]
+        rows.sort()
+        lines = ["[STARTUP] cold start, seconds since launch",
+                 f"  {'phase':<20} {'start':>7}  {'dur':>7}  thread"]
+        lines += [f"  {name:<20} {times}  {thread}" for _, name, times, thread in rows]
+        return "\n".join(lines)
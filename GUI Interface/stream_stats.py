@@ -0,0 +1,146 @@
+"""
+Streaming statistics over timestamped samples, O(1) amortized per update.
+
+SlidingMax / SlidingMin   max / min over the last `window` seconds
+                          (monotonic deque: each sample enters and leaves once)
+RunningStats              mean / variance since the last reset (Welford)
+ZeroCrossings             sign flips in the last `window` seconds, their rate
+                          and the cadence implied by the flip spacing
+
+Windows are in seconds, not samples, so the cost per update stays constant
+and the results mean the same thing at 15 or 60 FPS. Times and values are
+kept in parallel deques to avoid building a tuple per sample.
+"""
+import math
+from collections import deque
+
+
+class SlidingMax:
+    __slots__ = ("window", "_t", "_v")
+
+    def __init__(self, window):
+        self.window = window
+        self._t = deque()
+        self._v = deque()
+
+    def clear(self):
+        self._t.clear()
+        self._v.clear()
+
+    def push(self, t, v):
+        """Add a sample and drop the ones older than `window` before t."""
+        tq, vq = self._t, self._v
+        # Anything not larger than v can never be the max again
+        while vq and vq[-1] <= v:
+            vq.pop()
+            tq.pop()
+        tq.append(t)
+        vq.append(v)
+        self.expire(t)
+
+    def expire(self, now):
+        tq, vq = self._t, self._v
+        while tq and (now - tq[0]) > self.window:
+            tq.popleft()
+            vq.popleft()
+
+    def value(self, default=0.0):
+        return self._v[0] if self._v else default
+
+
+class SlidingMin(SlidingMax):
+    __slots__ = ()
+
+    def push(self, t, v):
+        tq, vq = self._t, self._v
+        while vq and vq[-1] >= v:
+            vq.pop()
+            tq.pop()
+        tq.append(t)
+        vq.append(v)
+        self.expire(t)
+
+
+class RunningStats:
+    """Welford's running mean / variance."""
+    __slots__ = ("n", "mean", "_m2")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, v):
+        self.n += 1
+        d = v - self.mean
+        self.mean += d / self.n
+        self._m2 += d * (v - self.mean)
+
+    @property
+    def var(self):
+        """Sample variance (0 with fewer than two samples)."""
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+class ZeroCrossings:
+    """
+    Sign flips of a signal within a time window. Zero samples keep the
+    previous sign, and with a deadband the signal must leave
+    [-deadband, deadband] to count as a new sign.
+
+    For walk-in-place the signal is left-minus-right ankle lift, which flips
+    once per step, so cadence() is steps per second.
+    """
+    __slots__ = ("window", "deadband", "sign", "_flips")
+
+    def __init__(self, window, deadband=0.0):
+        self.window = window
+        self.deadband = deadband
+        self.sign = 0
+        self._flips = deque()
+
+    def clear(self):
+        self.sign = 0
+        self._flips.clear()
+
+    def push(self, t, v):
+        """Returns True when this sample flipped the sign."""
+        db = self.deadband
+        s = 1 if v > db else (-1 if v < -db else 0)
+        flipped = False
+        if s != 0:
+            if self.sign != 0 and s != self.sign:
+                self._flips.append(t)
+                flipped = True
+            self.sign = s
+        self.expire(t)
+        return flipped
+
+    def expire(self, now):
+        flips = self._flips
+        while flips and (now - flips[0]) > self.window:
+            flips.popleft()
+
+    @property
+    def count(self):
+        """Flips inside the window."""
+        return len(self._flips)
+
+    def rate(self):
+        """Flips per second over the window."""
+        return len(self._flips) / self.window
+
+    def cadence(self):
+        """Flips per second from their spacing (0 with fewer than two)."""
+        flips = self._flips
+        if len(flips) < 2:
+            return 0.0
+        span = flips[-1] - flips[0]
+        return (len(flips) - 1) / span if span > 0 else 0.0
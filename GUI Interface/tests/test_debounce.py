@@ -0,0 +1,111 @@
+import pytest
+
+from debounce import Evidence, StateHold, _step, visibility_weight
+
+FRAME = 1.0 / 30.0
+
+
+def frames_until(ev, present, weight, attr, target, fps=30.0, limit=500):
+    t = 0.0
+    for n in range(1, limit):
+        ev.update(t, present, weight)
+        t += 1.0 / fps
+        if getattr(ev, attr) >= target:
+            return n
+    return None
+
+
+def test_visibility_weight():
+    assert visibility_weight(0.1) == 0.0
+    assert visibility_weight(0.3) == 0.0
+    assert visibility_weight(0.55) == pytest.approx(0.5)
+    assert visibility_weight(0.9) == 1.0
+
+
+def test_default_holds_match_old_frame_counts():
+    # GESTURE_ON_MS / GESTURE_OFF_MS = 520 / 260 were 16 / 8 frames at 30 FPS
+    assert frames_until(Evidence(), True, 1.0, "on", 0.52) == 16
+    assert frames_until(Evidence(), False, 1.0, "off", 0.26) == 8
+
+
+def test_same_hold_at_any_frame_rate():
+    for fps in (10.0, 60.0):
+        n = frames_until(Evidence(first_dt=1.0 / fps), True, 1.0, "on", 0.52, fps)
+        assert (n - 1) / fps < 0.52 <= n / fps
+
+
+def test_weight_slows_activation_only():
+    assert frames_until(Evidence(), True, 0.0, "on", 0.52) is None
+    assert frames_until(Evidence(), True, 0.5, "on", 0.52) == 32
+    # An arm out of view must still release: 8 frames, as at full visibility
+    assert frames_until(Evidence(), False, 0.0, "off", 0.26) == 8
+
+
+def test_gap_is_capped():
+    ev = Evidence(max_dt=0.2)
+    ev.update(0.0, True)
+    ev.update(5.0, True)            # stalled camera
+    assert ev.on == pytest.approx(FRAME + 0.2)
+
+
+def test_step_clamps_dt():
+    assert _step(1.0, None, 0.05, 0.2) == (0.05, 0.05)     # first frame: last dt
+    assert _step(1.1, 1.0, 0.05, 0.2) == pytest.approx((0.1, 0.1))
+    assert _step(9.0, 1.0, 0.05, 0.2) == (0.2, 0.2)        # stall: capped
+    assert _step(0.5, 1.0, 0.05, 0.2) == (0.0, 0.0)        # clock went back
+
+
+def test_state_hold_gap_is_capped():
+    hold = StateHold(enter_s=0.3, max_dt=0.2)
+    hold.update(0.0, 1)
+    assert hold.update(5.0, 1) == 0     # FRAME + 0.2 < 0.3
+    assert hold.update(5.1, 1) == 1
+
+
+def test_reset_credits_last_interval():
+    ev = Evidence()
+    ev.update(0.0, True)
+    ev.update(0.1, True)
+    ev.reset()
+    ev.update(7.0, True)
+    assert ev.on == pytest.approx(0.1)
+
+
+def test_state_hold_enter_and_exit():
+    hold = StateHold(enter_s=0.09, exit_s=0.19, neutral=0)
+    t, states = 0.0, []
+    for _ in range(4):
+        states.append(hold.update(t, 1))
+        t += FRAME
+    assert states == [0, 0, 1, 1]           # 3 frames >= 90 ms
+    n = 0
+    while hold.update(t, 0) != 0:
+        n += 1
+        t += FRAME
+    assert n == 5                           # 6th frame reaches 190 ms
+
+
+def test_state_hold_exit_ignores_weight():
+    hold = StateHold(enter_s=0.0, exit_s=0.1, neutral=0)
+    hold.update(0.0, 2)
+    assert hold.state == 2
+    t = FRAME
+    for _ in range(3):
+        hold.update(t, 0, weight=0.0)
+        t += FRAME
+    assert hold.state == 0
+    # ...but entering a state with nothing visible never happens
+    hold = StateHold(enter_s=0.1, exit_s=0.1, neutral=0)
+    for _ in range(30):
+        hold.update(t, 1, weight=0.0)
+        t += FRAME
+    assert hold.state == 0
+
+
+def test_state_hold_candidate_change_restarts():
+    hold = StateHold(enter_s=0.1, neutral=0)
+    t = 0.0
+    for cand in (1, 1, 2, 2, 1, 1):
+        hold.update(t, cand)
+        t += FRAME
+    assert hold.state == 0
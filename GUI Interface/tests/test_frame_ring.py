@@ -0,0 +1,126 @@
+import random
+
+import numpy as np
+import pytest
+
+from frame_ring import FrameRing
+
+SHAPE = (4, 6, 3)
+
+
+def frame(value):
+    return np.full(SHAPE, value % 256, np.uint8)
+
+
+def produce(ring, n, t=0.0):
+    """n frames through claim/commit, each filled with its own id."""
+    ids = []
+    for _ in range(n):
+        buf = ring.claim()
+        img = frame(ring.frame_id + 1) if buf is None else buf
+        img[...] = (ring.frame_id + 1) % 256
+        ids.append(ring.commit(img, t))
+    return ids
+
+
+def test_claim_commit_is_zero_copy_after_the_first_frame():
+    ring = FrameRing(4)
+    assert ring.claim() is None
+    assert ring.commit(frame(1), 1.0) == 1
+    buf = ring.claim()
+    buf[...] = 2
+    assert ring.commit(buf, 2.0) == 2
+    with ring.latest() as f:
+        assert f.frame_id == 2 and f.t_capture == 2.0
+        assert np.shares_memory(f.image, buf)
+        assert not f.image.flags.writeable
+        with pytest.raises(ValueError):
+            f.image[0, 0, 0] = 9
+
+
+def test_pinned_and_latest_slots_are_never_claimed():
+    ring = FrameRing(4)
+    produce(ring, 1)
+    rng = random.Random(5)
+    held = []
+    last_id = 0
+    for _ in range(2000):
+        op = rng.random()
+        if op < 0.45:
+            buf = ring.claim()
+            with ring.latest() as newest:
+                busy = [newest.image] + [ref.image for ref in held]
+                pinned_others = {id(r.image.base) for r in held} - {id(newest.image.base)}
+            if buf is None:
+                # Only when every slot but the latest is pinned
+                assert len(pinned_others) == 3
+                assert ring.commit(frame(0)) == 0
+                continue
+            assert not any(np.shares_memory(buf, img) for img in busy)
+            buf[...] = (ring.frame_id + 1) % 256
+            assert ring.commit(buf) == ring.frame_id
+        elif op < 0.75 and len(held) < 6:
+            ref = ring.wait_newer(last_id, timeout=0)
+            if ref is None:
+                assert ring.frame_id == last_id
+                continue
+            assert ref.frame_id > last_id
+            last_id = ref.frame_id
+            held.append(ref)
+        elif held:
+            held.pop(rng.randrange(len(held))).release()
+
+        # Nobody wrote into a frame that is still being read
+        for ref in held:
+            assert (ref.image == ref.frame_id % 256).all()
+    for ref in held:
+        ref.release()
+    assert ring._pins == [0] * 4
+
+
+def test_wait_newer_never_returns_a_seen_frame():
+    ring = FrameRing(4)
+    assert ring.wait_newer(0, timeout=0) is None
+    produce(ring, 3)
+    with ring.wait_newer(0, timeout=0) as f:
+        assert f.frame_id == 3          # newest, not the next one in order
+    assert ring.wait_newer(3, timeout=0) is None
+    assert ring.latest(newer_than=3) is None
+    produce(ring, 1)
+    with ring.wait_newer(3, timeout=0) as f:
+        assert f.frame_id == 4
+
+
+def test_full_ring_drops_instead_of_overwriting():
+    ring = FrameRing(4)
+    held = []
+    for _ in range(3):
+        produce(ring, 1)
+        held.append(ring.latest())
+    produce(ring, 1)                    # goes into the last free slot
+    assert ring.claim() is None
+    assert ring.commit(frame(99)) == 0
+    assert ring.dropped == 1
+    assert [(r.image == r.frame_id).all() for r in held] == [True] * 3
+
+    held.pop(0).release()
+    assert ring.claim() is not None
+    for ref in held:
+        ref.release()
+
+
+def test_resolution_change_keeps_old_views_alive():
+    ring = FrameRing(4)
+    produce(ring, 2)
+    old = ring.latest()
+    assert ring.commit(np.full((8, 8, 3), 7, np.uint8)) == 3
+    assert ring.shape == (8, 8, 3)
+    assert (old.image == 2).all() and old.image.shape == SHAPE
+    old.release()                       # pin from the old buffers: ignored
+    assert ring._pins == [0] * 4
+    produce(ring, 5)
+
+
+def test_needs_three_slots():
+    with pytest.raises(ValueError):
+        FrameRing(2)
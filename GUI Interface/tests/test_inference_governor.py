@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+
+from inference_governor import GovernedPose, InferenceGovernor
+
+
+class FakePose:
+    built = []
+
+    def __init__(self, model_complexity, **kwargs):
+        self.complexity = model_complexity
+        self.shapes = []
+        FakePose.built.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def process(self, rgb):
+        self.shapes.append(rgb.shape)
+        return None
+
+
+def test_rebuild_warms_on_the_full_frame_not_the_last_crop():
+    FakePose.built = []
+    governor = InferenceGovernor(levels=((0, None), (1, 320)), start=0)
+    full = (480, 640, 3)
+    with GovernedPose(FakePose, governor=governor) as pose:
+        pose.warm_up(full)
+        # ROI crops are smaller than the camera frame
+        pose.process(np.zeros((120, 90, 3), np.uint8))
+        governor.level = 1
+        deadline = time.monotonic() + 2.0
+        while pose.complexity != 1 and time.monotonic() < deadline:
+            pose.process(np.zeros((120, 90, 3), np.uint8))
+            time.sleep(0.01)
+        assert pose.complexity == 1
+
+    rebuilt = FakePose.built[-1]
+    assert rebuilt.complexity == 1
+    assert rebuilt.shapes[0] == full
+
+
+def test_full_shape_tracks_the_largest_frame():
+    governor = InferenceGovernor(levels=((0, None),), start=0)
+    with GovernedPose(FakePose, governor=governor) as pose:
+        pose.process(np.zeros((120, 90, 3), np.uint8))
+        pose.process(np.zeros((480, 640, 3), np.uint8))
+        pose.process(np.zeros((60, 60, 3), np.uint8))
+        assert pose._full_shape == (480, 640, 3)
@@ -0,0 +1,105 @@
+import socket
+import time
+
+import pytest
+
+from fake_esp32 import FakeEsp32
+from latency_trace import FrameTrace, LatencyTracer
+from esp32_link import LinkState
+from link_pool import LinkPool, parse_targets
+from metrics import Registry
+
+
+def test_parse_targets():
+    assert parse_targets("192.168.10.140", 12345) == [("192.168.10.140", 12345)]
+    assert parse_targets(" 10.0.0.1:1000, 10.0.0.2 ,,", 7) == [("10.0.0.1", 1000),
+                                                              ("10.0.0.2", 7)]
+    with pytest.raises(ValueError):
+        parse_targets(" , ", 7)
+    with pytest.raises(ValueError):
+        parse_targets("host:port", 7)
+
+
+def test_labelled_families_render_one_header():
+    reg = Registry()
+    for name in ("A", "B"):
+        reg.gauge(f'eva_robot_online{{robot="{name}"}}', "online", fn=lambda: 1)
+    lines = reg.render().splitlines()
+    assert lines.count("# TYPE eva_robot_online gauge") == 1
+    assert 'eva_robot_online{robot="B"} 1' in lines
+
+
+def _wait(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _free_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def test_fan_out_isolates_dead_robot():
+    fakes = [FakeEsp32(port=0).start() for _ in range(2)]
+    dead = _free_port()
+    tracer = LatencyTracer(registry=Registry())
+    pool = LinkPool([("127.0.0.1", f.port) for f in fakes] + [("127.0.0.1", dead)],
+                    tracer=tracer, hello_timeout=0.2, backoff_cap=0.2)
+    applied = [[] for _ in fakes]
+    for f, log in zip(fakes, applied):
+        f.board.add_apply_listener(lambda ev, log=log: log.append(ev))
+    events = []
+    pool.add_listener(lambda ev: events.append((ev.link.name, ev.state)))
+    try:
+        assert [lk.name for lk in pool] == ["ESP32-1", "ESP32-2", "ESP32-3"]
+        pool.connect()
+        assert _wait(lambda: pool.online == 2)
+        assert pool.wanted
+
+        for i in range(20):
+            now = time.monotonic()
+            pool.publish(str(i % 5 + 1), "1", FrameTrace(i, now, now, now))
+            time.sleep(0.005)
+        pool.publish("2", "3")
+        assert _wait(lambda: all(lk.sends >= 2 for lk in pool.links[:2]))
+        assert _wait(lambda: all(log and log[-1].value == 3 for log in applied))
+        assert pool.links[2].sends == 0
+        assert {name for name, _ in events} == {"ESP32-1", "ESP32-2", "ESP32-3"}
+        # Per-link seq spaces: both robots' acks finish their own traces
+        assert _wait(lambda: tracer.total.count >= 2 * 2)
+    finally:
+        pool.stop()
+        for f in fakes:
+            f.stop()
+
+
+def test_reconnect_does_not_report_a_stale_trace():
+    fake = FakeEsp32(port=0).start()
+    tracer = LatencyTracer(registry=Registry())
+    pool = LinkPool([("127.0.0.1", fake.port)], tracer=tracer,
+                    hello_timeout=0.2, backoff_cap=0.2)
+    link = pool.links[0]
+    try:
+        pool.connect()
+        assert _wait(lambda: link.state is LinkState.ONLINE)
+        now = time.monotonic()
+        pool.publish("2", "2", FrameTrace(1, now, now, now))
+        assert _wait(lambda: tracer.total.count == 1)
+
+        time.sleep(0.3)                 # "outage": the trace only gets older
+        sends = link.sends
+        pool.reconnect()
+        assert _wait(lambda: link.sends > sends)    # last command resent
+        time.sleep(0.1)
+        assert tracer.total.count == 1
+        assert tracer.total.sum < 250.0
+    finally:
+        pool.stop()
+        fake.stop()
@@ -0,0 +1,83 @@
+import urllib.request
+
+import pytest
+
+from metrics import Histogram, Registry, serve_metrics
+
+
+def test_quantile_empty():
+    assert Histogram("h", buckets=(1, 2, 5)).quantile(0.5) is None
+
+
+def test_quantile_interpolates_within_bucket():
+    h = Histogram("h", buckets=(1, 2, 5))
+    for _ in range(4):
+        h.observe(1.5)              # all in (1, 2]
+    assert h.quantile(0.0) == pytest.approx(1.0)
+    assert h.quantile(0.5) == pytest.approx(1.5)
+    assert h.quantile(1.0) == pytest.approx(2.0)
+
+
+def test_quantile_across_buckets():
+    h = Histogram("h", buckets=(10, 20, 30))
+    for v in [5] * 50 + [15] * 30 + [25] * 20:
+        h.observe(v)
+    assert h.quantile(0.25) == pytest.approx(5.0)       # 25 of 50 in [0, 10]
+    assert h.quantile(0.5) == pytest.approx(10.0)
+    assert h.quantile(0.65) == pytest.approx(15.0)      # half of (10, 20]
+    assert h.quantile(0.9) == pytest.approx(25.0)
+
+
+def test_quantile_overflow_and_bounds():
+    h = Histogram("h", buckets=(1, 2))
+    h.observe(2.0)                  # upper bounds are inclusive
+    h.observe(100.0)
+    assert h.counts == [0, 1, 1]
+    assert h.quantile(0.99) == 2    # above every bound: clamp to the last one
+
+
+def test_quantile_matches_sample_percentile():
+    h = Histogram("h", buckets=tuple(range(1, 101)))
+    for v in range(1, 101):
+        h.observe(v - 0.5)
+    assert h.quantile(0.5) == pytest.approx(50.0, abs=1.0)
+    assert h.quantile(0.9) == pytest.approx(90.0, abs=1.0)
+
+
+def test_render_prometheus_text():
+    reg = Registry()
+    c = reg.counter("eva_frames_total", "Frames")
+    h = reg.histogram("eva_ms", "Stage time", buckets=(1, 10))
+    reg.gauge("eva_level", fn=lambda: 3)
+    c.inc(2)
+    h.observe(0.5)
+    h.observe(50)
+    lines = reg.render().splitlines()
+    assert "# HELP eva_frames_total Frames" in lines
+    assert "# TYPE eva_frames_total counter" in lines
+    assert "eva_frames_total 2" in lines
+    assert 'eva_ms_bucket{le="1"} 1' in lines
+    assert 'eva_ms_bucket{le="+Inf"} 2' in lines
+    assert "eva_ms_count 2" in lines
+    assert "eva_ms_sum 50.5" in lines
+    assert "# TYPE eva_level gauge" in lines
+    assert "eva_level 3" in lines
+
+
+def test_registry_dedupes_and_checks_kind():
+    reg = Registry()
+    assert reg.counter("x") is reg.counter("x")
+    with pytest.raises(ValueError):
+        reg.histogram("x")
+
+
+def test_serve_metrics():
+    reg = Registry()
+    reg.counter("eva_up_total").inc()
+    server = serve_metrics(reg, port=0)
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        assert "eva_up_total 1" in body
+    finally:
+        server.shutdown()
@@ -0,0 +1,121 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pose_features import (ELBOW, ELEV, FWD, LEAN, LIFT_L, LIFT_R, N_FEATURES, ROLL,
+                           VIS_ARM, VIS_TORSO, YAW, compute_features)
+
+YAW_SIGN, LEAN_SIGN, ROLL_SIGN = 1.0, -1.0, -1.0
+
+
+# ----------------------------------------------------------------
+# The per-landmark code compute_features replaced (GUI.py before
+# the vectorized pass), kept verbatim as the reference.
+# ----------------------------------------------------------------
+def avg3(a, b):
+    return ((a.x + b.x) * 0.5, (a.y + b.y) * 0.5, (a.z + b.z) * 0.5)
+
+
+def compute_yaw_lean_roll(lm):
+    shL, shR = lm[11], lm[12]
+    hipL, hipR = lm[23], lm[24]
+    sh_c = avg3(shL, shR)
+    hip_c = avg3(hipL, hipR)
+    yaw_raw = (shR.z - shL.z) * YAW_SIGN
+    lean_raw = (hip_c[2] - sh_c[2]) * LEAN_SIGN
+    shoulder_w = abs(shR.x - shL.x)
+    if shoulder_w < 1e-6:
+        roll_raw = 0.0
+    else:
+        shoulder_tilt = (shL.y - shR.y)
+        hip_tilt = (hipL.y - hipR.y)
+        roll_raw = ((shoulder_tilt - hip_tilt) / shoulder_w) * ROLL_SIGN
+    return yaw_raw, lean_raw, roll_raw, sh_c, hip_c
+
+
+def arm_angles(lm):
+    sh, el, wr = lm[12], lm[14], lm[16]
+    dx, dy, dz = wr.x - sh.x, wr.y - sh.y, wr.z - sh.z
+    elev = math.degrees(math.atan2(-dy, math.sqrt(dx*dx + dz*dz) + 1e-9))
+    fwd = math.degrees(math.atan2(-dz, math.sqrt(dx*dx + dy*dy) + 1e-9))
+
+    def angle_3pts(a, b, c):
+        ab = (a.x-b.x, a.y-b.y, a.z-b.z)
+        cb = (c.x-b.x, c.y-b.y, c.z-b.z)
+        dot = ab[0]*cb[0] + ab[1]*cb[1] + ab[2]*cb[2]
+        nab = math.sqrt(ab[0]**2 + ab[1]**2 + ab[2]**2) + 1e-9
+        ncb = math.sqrt(cb[0]**2 + cb[1]**2 + cb[2]**2) + 1e-9
+        cosang = max(-1.0, min(1.0, dot/(nab*ncb)))
+        return math.degrees(math.acos(cosang))
+
+    return elev, fwd, angle_3pts(sh, el, wr)
+
+
+def lifts(lm, sh_c, hip_c):
+    dx = sh_c[0] - hip_c[0]
+    dy = sh_c[1] - hip_c[1]
+    scale = (dx * dx + dy * dy) ** 0.5
+    if scale < 1e-6:
+        return math.nan, math.nan
+    return (hip_c[1] - lm[27].y) / scale, (hip_c[1] - lm[28].y) / scale
+
+
+def scalar_features(arr):
+    lm = [SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z, _ in arr]
+    yaw, lean, roll, sh_c, hip_c = compute_yaw_lean_roll(lm)
+    elev, fwd, elbow = arm_angles(lm)
+    lift_l, lift_r = lifts(lm, sh_c, hip_c)
+    return yaw, lean, roll, elev, fwd, elbow, lift_l, lift_r
+
+
+def random_poses(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lm = np.empty((n, 33, 4), np.float32)
+    lm[..., :2] = rng.uniform(0.0, 1.0, (n, 33, 2))
+    lm[..., 2] = rng.uniform(-0.5, 0.5, (n, 33))
+    lm[..., 3] = rng.uniform(0.0, 1.0, (n, 33))
+    return lm
+
+
+# ----------------------------------------------------------------
+def test_matches_scalar_code():
+    batch = random_poses(500)
+    F = compute_features(batch)
+    assert F.shape == (500, N_FEATURES) and F.dtype == np.float32
+    for arr, f in zip(batch, F):
+        ref = scalar_features(arr)
+        np.testing.assert_allclose(f[[YAW, LEAN, ROLL, LIFT_L, LIFT_R]],
+                                   np.array(ref)[[0, 1, 2, 6, 7]], rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(f[[ELEV, FWD, ELBOW]], ref[3:6], atol=0.05)   # degrees
+
+
+def test_single_frame_equals_batch_row():
+    batch = random_poses(8, seed=1)
+    F = compute_features(batch)
+    for i in range(len(batch)):
+        np.testing.assert_array_equal(compute_features(batch[i]), F[i])
+
+
+def test_degenerate_torso():
+    lm = random_poses(1, seed=2)[0]
+    lm[[11, 12, 23, 24], :2] = 0.5          # shoulders and hips on one point
+    f = compute_features(lm)
+    assert f[ROLL] == 0.0
+    assert np.isnan(f[LIFT_L]) and np.isnan(f[LIFT_R])
+
+
+def test_visibility_columns():
+    lm = random_poses(1, seed=3)[0]
+    lm[:, 3] = 1.0
+    lm[14, 3] = 0.2         # right elbow
+    lm[23, 3] = 0.4         # left hip
+    f = compute_features(lm)
+    assert f[VIS_ARM] == pytest.approx(0.2)
+    assert f[VIS_TORSO] == pytest.approx(0.4)
+
+
+def test_rejects_wrong_shape():
+    with pytest.raises(ValueError):
+        compute_features(np.zeros((33, 3), np.float32))
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from body_classifier import G_A, NO_POSE_COMMANDS, BodyClassifier
+from pose_features import compute_features
+from pose_recording import PoseRecorder, PoseRecording, replay
+
+FPS = 30.0
+CALIBRATING = ("1", "Calibrating...")
+
+
+def pose(turn=0.0, raise_arm=False, arm_vis=0.95, rng=None):
+    lm = np.zeros((33, 4), np.float32)
+    lm[:, 3] = 0.95
+    lm[11, :3] = (0.40, 0.40, 0.0)
+    lm[12, :3] = (0.60, 0.40, turn)
+    lm[23, :3] = (0.42, 0.70, 0.0)
+    lm[24, :3] = (0.58, 0.70, 0.0)
+    lm[27, :3] = (0.43, 0.95, 0.0)
+    lm[28, :3] = (0.57, 0.95, 0.0)
+    lm[14, :3] = (0.62, 0.55, 0.0)
+    lm[16, :3] = (0.63, 0.30, -0.30) if raise_arm else (0.63, 0.68, 0.0)
+    lm[[12, 14, 16], 3] = arm_vis
+    if rng is not None:
+        lm[:, :3] += rng.normal(0.0, 0.002, (33, 3)).astype(np.float32)
+    return lm
+
+
+def session():
+    """(landmarks or None, calibrating) per frame: turns, gesture A, dropouts."""
+    rng = np.random.default_rng(7)
+    frames = [(pose(rng=rng), True) for _ in range(30)]
+    plan = [(60, {}), (60, {"turn": 0.15}), (30, {}), (40, {"raise_arm": True}),
+            (30, {}), (10, None), (40, {"raise_arm": True}),
+            (30, {"arm_vis": 0.1}), (20, {"turn": -0.15}), (30, {})]
+    for n, kw in plan:
+        frames += [(None if kw is None else pose(rng=rng, **kw), False) for _ in range(n)]
+    return frames
+
+
+def run_live(clf, path, manual_recal_at=()):
+    """
+    What body_control_thread does, recording every frame. At each index in
+    manual_recal_at the classifier is recalibrated without frames, as
+    calibrate() does in manual mode.
+    """
+    outputs = []
+    with PoseRecorder(str(path), params=clf.params()) as rec:
+        calibrating = False
+        for i, (lm, calib) in enumerate(session()):
+            t = 1000.0 + i / FPS
+            f = None if lm is None else compute_features(
+                lm, clf.YAW_SIGN, clf.LEAN_SIGN, clf.ROLL_SIGN).tolist()
+            if i in manual_recal_at:
+                clf.begin_calibration()
+                rec.append(t, i, None, (CALIBRATING, CALIBRATING), calib_start=True)
+                clf.end_calibration()
+            if calib:
+                if not calibrating:
+                    clf.begin_calibration()
+                    rec.append(t, i, None, (CALIBRATING, CALIBRATING), calib_start=True)
+                    calibrating = True
+                if f is not None:
+                    clf.add_calibration(f)
+                rec.append(t, i + 1, lm, (CALIBRATING, CALIBRATING), calibrating=True)
+                continue
+            if calibrating:
+                clf.end_calibration()
+                calibrating = False
+            if f is not None:
+                clf.step(f, t)
+                commands = clf.commands
+            else:
+                commands = NO_POSE_COMMANDS
+            outputs.append((commands[0][0], commands[1][0]))
+            rec.append(t, i + 1, lm, commands, clf.state, clf.active_gesture,
+                       lean_enabled=clf.lean_enabled)
+    return outputs
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"SMOOTHER": "one_euro", "SMOOTH_LEAD_S": 0.05, "GESTURE_ON_MS": 300},
+    {"SMOOTHER": "kalman", "STATE_ON_MS": 100, "STATE_OFF_MS": 60},
+])
+def test_replay_reproduces_live_session(tmp_path, params):
+    path = tmp_path / "s.posrec"
+    outputs = run_live(BodyClassifier(**params), path)
+    assert len(set(outputs)) >= 3           # neutral, a turn and gesture A at least
+
+    recording = PoseRecording(str(path))
+    assert recording.params == BodyClassifier(**params).params()
+    result = replay(recording)
+    assert result.frames == len(session()) + 1     # + the calibration-start record
+    assert result.mismatches == 0, result.first_mismatch
+
+
+def test_replay_resets_on_a_calibration_without_frames(tmp_path):
+    # Mid-turn and mid-gesture: the reset changes what is sent next
+    recal = (150, 210)
+    path = tmp_path / "s.posrec"
+    outputs = run_live(BodyClassifier(), path, manual_recal_at=recal)
+    assert outputs != run_live(BodyClassifier(), tmp_path / "plain.posrec")
+
+    result = replay(PoseRecording(str(path)))
+    assert result.frames == len(session()) + 1 + len(recal)
+    assert result.mismatches == 0, result.first_mismatch
+
+
+def test_replay_detects_different_params(tmp_path):
+    path = tmp_path / "s.posrec"
+    run_live(BodyClassifier(), path)
+    result = replay(PoseRecording(str(path)), BodyClassifier(GESTURE_ON_MS=2000))
+    assert result.mismatches > 0
+
+
+def test_gesture_released_with_arm_out_of_view():
+    clf = BodyClassifier()
+    clf.begin_calibration()
+    for _ in range(30):
+        clf.add_calibration(compute_features(pose()).tolist())
+    clf.end_calibration()
+    t = 0.0
+    for _ in range(30):
+        clf.step(compute_features(pose(raise_arm=True)).tolist(), t)
+        t += 1 / FPS
+    assert clf.active_gesture == G_A
+    for _ in range(10):
+        clf.step(compute_features(pose(arm_vis=0.1)).tolist(), t)
+        t += 1 / FPS
+    assert clf.active_gesture != G_A
+
+
+def test_params_are_the_instance_values():
+    clf = BodyClassifier(SMOOTHER="one_euro", SMOOTH_LEAD_S=0.05)
+    p = clf.params()
+    assert p["SMOOTHER"] == "one_euro" and p["SMOOTH_LEAD_S"] == 0.05
+    assert BodyClassifier.defaults()["SMOOTHER"] == "ema"
@@ -0,0 +1,180 @@
+import time
+
+import pytest
+
+import protocol
+from esp32_link import LinkManager, LinkState
+from fake_esp32 import FakeEsp32
+
+
+# ================================================================
+# CRC-8
+# ================================================================
+def test_crc8_vectors():
+    # CRC-8/SMBUS (poly 0x07, init 0, no reflection): check value 0xF4
+    assert protocol.crc8(b"123456789") == 0xF4
+    assert protocol.crc8(b"") == 0x00
+    assert protocol.crc8(b"\x00") == 0x00
+    assert protocol.crc8(b"\x01") == 0x07
+    assert protocol.crc8(b"\xff") == 0xF3
+
+
+# ================================================================
+# Frames
+# ================================================================
+@pytest.mark.parametrize("version", [protocol.FRAME_V1, protocol.FRAME_V2])
+@pytest.mark.parametrize("L, R", [("1", "1"), ("3", "5"), ("0", "2"), ("A", "A"), ("B", "B")])
+def test_frame_round_trip(version, L, R):
+    buf = protocol.encode_frame(65535 + 7, L, R, version, t_us=2 ** 32 + 123)
+    assert len(buf) == protocol.FRAME_SIZES[version]
+    cmd = protocol.decode_frame(buf)
+    assert cmd.version == version
+    assert cmd.seq == 6                 # uint16, wrapped
+    assert cmd.codes == (L, R)
+    assert cmd.t_us == (123 if version == protocol.FRAME_V2 else 0)
+
+
+def test_frame_rejects_corruption():
+    buf = bytearray(protocol.encode_frame(1, "2", "3", protocol.FRAME_V2, t_us=99))
+    buf[4] ^= 0x01
+    with pytest.raises(protocol.FrameError):
+        protocol.decode_frame(bytes(buf))
+    with pytest.raises(protocol.FrameError):
+        protocol.decode_frame(bytes(buf[:-1]))
+    with pytest.raises(protocol.FrameError):
+        protocol.encode_frame(1, "1", "1", version=9)
+
+
+def test_ack_round_trip():
+    buf = protocol.encode_ack(70000, 2 ** 32 + 5)
+    assert len(buf) == protocol.ACK_SIZE
+    ack = protocol.decode_ack(buf)
+    assert (ack.seq, ack.t_us) == (70000 & 0xFFFF, 5)
+    with pytest.raises(protocol.FrameError):
+        protocol.decode_ack(buf[:-1] + bytes((buf[-1] ^ 0xFF,)))
+
+
+def test_seq_newer_wraps():
+    assert protocol.seq_newer(1, 0)
+    assert protocol.seq_newer(0, 0xFFFF)
+    assert not protocol.seq_newer(5, 5)
+    assert not protocol.seq_newer(0xFFFF, 0)
+
+
+# ================================================================
+# Stream decoding
+# ================================================================
+def test_decoder_resyncs_after_corrupted_byte():
+    frames = [protocol.encode_frame(seq, str(seq % 5 + 1), "1", protocol.FRAME_V2, t_us=seq)
+              for seq in range(1, 6)]
+    stream = bytearray(b"".join(frames))
+    stream[len(frames[0]) * 2 + 5] ^= 0x40      # corrupt the third frame
+    dec = protocol.FrameDecoder()
+    got = []
+    for i in range(0, len(stream), 5):          # arbitrary chunking
+        got += dec.feed(bytes(stream[i:i + 5]))
+    assert [c.seq for c in got] == [1, 2, 4, 5]
+    assert dec.crc_errors >= 1
+
+
+def test_decoder_skips_garbage_and_drops_stale():
+    dec = protocol.FrameDecoder()
+    data = (b"\x00\xff" + protocol.encode_frame(10, "2", "2")
+            + protocol.encode_frame(9, "3", "3")          # reordered
+            + protocol.encode_frame(11, "A", "A"))
+    got = dec.feed(data)
+    assert [c.seq for c in got] == [10, 11]
+    assert dec.stale == 1
+
+
+def test_ack_decoder_split_reads():
+    dec = protocol.AckDecoder()
+    data = protocol.encode_ack(1, 10) + protocol.encode_ack(2, 20)
+    assert dec.feed(data[:3]) == []
+    got = dec.feed(data[3:])
+    assert [(a.seq, a.t_us) for a in got] == [(1, 10), (2, 20)]
+
+
+# ================================================================
+# Text protocol and negotiation
+# ================================================================
+@pytest.mark.parametrize("L, R", [("1", "1"), ("4", "2"), ("A", "A"), ("B", "B")])
+def test_text_round_trip(L, R):
+    assert protocol.decode_text(protocol.encode_text(L, R)) == (L, R)
+
+
+def test_text_decode_like_firmware():
+    assert protocol.decode_text("R3x,L") == ("0", "3")     # String::toInt
+    assert protocol.decode_text("HELLO BIN2") is None
+    assert protocol.decode_text("garbage") is None
+
+
+def test_hello_parsing():
+    assert protocol.parse_hello(protocol.hello([2, 1])) == [2, 1]
+    assert protocol.parse_hello("R1,L1") is None
+    assert protocol.parse_hello_ok(protocol.hello_ok(2)) == 2
+    assert protocol.parse_hello_ok(protocol.hello_ok(0)) == 0
+    assert protocol.parse_hello_ok(b"OK BIN7\n") is None
+    assert protocol.parse_hello_ok(b"ESP32 READY\n") is None
+    assert protocol.parse_hello_use(protocol.hello_use(2)) == 2
+    assert protocol.parse_hello_use(b"USE BIN9\n") is None
+    assert protocol.parse_hello_use(b"R1,L1\n") is None
+
+
+def _wait(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.mark.parametrize("binary, acks, expected", [
+    (True, True, protocol.FRAME_V2),
+    (True, False, protocol.FRAME_V1),
+    (False, False, 0),                  # old firmware: HELLO unanswered -> text
+])
+def test_link_negotiation_fallback(binary, acks, expected):
+    fake = FakeEsp32(port=0, binary=binary, acks=acks).start()
+    applied = []
+    fake.board.add_apply_listener(lambda ev: applied.append(ev))
+    link = LinkManager("127.0.0.1", fake.port, hello_timeout=0.2, backoff_cap=0.2)
+    try:
+        link.connect()
+        assert _wait(lambda: link.state is LinkState.ONLINE)
+        assert link.frame_version == expected
+        link.publish("3", "4")
+        assert _wait(lambda: len(applied) >= 2)
+        if expected == protocol.FRAME_V2:
+            assert _wait(lambda: link.rtt.snapshot().count >= 1)
+    finally:
+        link.stop()
+        fake.stop()
+
+
+def test_late_hello_answer_keeps_both_ends_on_text():
+    # A Wi-Fi stall delays "OK BIN2" past the GUI's hello timeout
+    fake = FakeEsp32(port=0, hello_delay=0.3).start()
+    applied = []
+    fake.board.add_apply_listener(lambda ev: applied.append(ev))
+    link = LinkManager("127.0.0.1", fake.port, hello_timeout=0.05, backoff_cap=0.2)
+    try:
+        link.connect()
+        assert _wait(lambda: link.state is LinkState.ONLINE)
+        assert link.frame_version == 0
+        time.sleep(0.4)                     # the late answer arrives
+        link.publish("2", "5")
+        assert _wait(lambda: [(e.kind, e.value) for e in applied][-2:]
+                     == [("left", 2), ("right", 5)])
+
+        # Not latched: once the link is quick again, frames are back
+        fake.hello_delay = 0.0
+        link.reconnect()
+        assert _wait(lambda: link.state is LinkState.ONLINE and link.frame_version == 2)
+        link.publish("3", "1")
+        assert _wait(lambda: [(e.kind, e.value) for e in applied][-2:]
+                     == [("left", 3), ("right", 1)])
+    finally:
+        link.stop()
+        fake.stop()
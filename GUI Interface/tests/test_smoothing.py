@@ -0,0 +1,100 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from smoothing import (ConstantVelocityKalman, FrameEma, OneEuro, TimeEma,
+                       make_smoother, tau_from_alpha, SMOOTHERS)
+
+FPS = 30.0
+
+
+def smoothers():
+    return [FrameEma(0.35), TimeEma(tau_from_alpha(0.35)), OneEuro(),
+            OneEuro(lead=0.05), ConstantVelocityKalman(),
+            ConstantVelocityKalman(lead=0.05)]
+
+
+@pytest.mark.parametrize("s", smoothers(), ids=lambda s: type(s).__name__)
+def test_converges_to_a_constant(s):
+    y = s(0.0, 0.0)
+    assert y == 0.0
+    for i in range(1, 91):            # 3 s of a step to 1
+        y = s(i / FPS, 1.0)
+    assert y == pytest.approx(1.0, abs=1e-3)
+
+
+@pytest.mark.parametrize("s", smoothers(), ids=lambda s: type(s).__name__)
+def test_arrays_are_filtered_element_wise_and_not_aliased(s):
+    x0 = np.zeros((33, 4))
+    y = s(0.0, x0)
+    x0 += 5.0                         # the caller reuses its buffer
+    assert not y.any()
+    target = np.arange(132.0).reshape(33, 4) / 132.0
+    for i in range(1, 91):
+        y = s(i / FPS, target)
+    np.testing.assert_allclose(y, target, atol=1e-3)
+
+
+def test_time_ema_matches_closed_form_with_variable_dt():
+    tau = 0.2
+    s = TimeEma(tau)
+    rng = random.Random(1)
+    y0, c = 2.0, -1.0
+    s(0.0, y0)
+    t = 0.0
+    for _ in range(50):
+        t += rng.uniform(0.005, 0.12)
+        y = s(t, c)
+        assert y == pytest.approx(c + (y0 - c) * math.exp(-t / tau), rel=1e-9)
+
+
+def test_time_ema_ignores_repeated_or_old_timestamps():
+    s = TimeEma(0.1)
+    s(1.0, 0.0)
+    assert s(1.0, 10.0) == 0.0
+    assert s(0.5, 10.0) == 0.0
+
+
+def test_time_ema_equals_frame_ema_at_its_frame_rate():
+    frame, timed = FrameEma(0.35), TimeEma(tau_from_alpha(0.35, FPS))
+    rng = random.Random(2)
+    for i in range(60):
+        x = rng.uniform(-1.0, 1.0)
+        assert timed(i / FPS, x) == pytest.approx(frame(i / FPS, x), rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("cls", [OneEuro, ConstantVelocityKalman])
+def test_lead_extrapolates_along_the_velocity(cls):
+    plain, ahead = cls(), cls(lead=0.05)
+    for i in range(120):              # ramp at 0.5 units/s
+        t = i / FPS
+        y, y_lead = plain(t, 0.5 * t), ahead(t, 0.5 * t)
+    slope = plain.dy if cls is OneEuro else plain.v
+    assert slope > 0.4
+    assert y_lead - y == pytest.approx(0.05 * slope)
+
+
+def test_kalman_tracks_a_ramp_without_lag():
+    s = ConstantVelocityKalman()
+    for i in range(120):
+        t = i / FPS
+        y = s(t, 0.5 * t)
+    assert s.v == pytest.approx(0.5, rel=1e-3)
+    assert y == pytest.approx(0.5 * t, abs=1e-3)
+
+
+def test_reset_starts_over():
+    for s in smoothers():
+        s(0.0, 0.0)
+        s(0.1, 1.0)
+        s.reset()
+        assert s(0.2, 7.0) == 7.0
+
+
+def test_make_smoother():
+    for kind in SMOOTHERS:
+        assert make_smoother(kind)(0.0, 1.5) == 1.5
+    with pytest.raises(ValueError):
+        make_smoother("median")
@@ -0,0 +1,124 @@
+import math
+import random
+
+import pytest
+
+from stream_stats import RunningStats, SlidingMax, SlidingMin, ZeroCrossings
+
+
+def samples(n=400, seed=3):
+    """Irregular timestamps (multiples of 1/8 s, so window edges are exact) and
+    small integer values, so ties and equal-to-edge ages both happen."""
+    rng = random.Random(seed)
+    t = 0.0
+    out = []
+    for _ in range(n):
+        t += rng.choice((0.125, 0.125, 0.25, 0.5))
+        out.append((t, rng.randint(-5, 5)))
+    return out
+
+
+def in_window(history, now, window):
+    return [v for t, v in history if now - t <= window]
+
+
+@pytest.mark.parametrize("cls, pick", [(SlidingMax, max), (SlidingMin, min)])
+@pytest.mark.parametrize("window", [0.0, 0.5, 1.0, 3.0])
+def test_sliding_extreme_matches_brute_force(cls, pick, window):
+    s = cls(window)
+    history = []
+    for t, v in samples():
+        s.push(t, v)
+        history.append((t, v))
+        assert s.value() == pick(in_window(history, t, window))
+
+
+@pytest.mark.parametrize("cls", [SlidingMax, SlidingMin])
+def test_sliding_extreme_eviction_at_window_edge(cls):
+    s = cls(1.0)
+    big = 9 if cls is SlidingMax else -9
+    s.push(0.0, big)
+    s.push(0.5, 0)
+    s.push(1.0, 0)
+    assert s.value() == big           # exactly `window` old: still inside
+    s.expire(1.125)
+    assert s.value() == 0             # just past the edge: gone
+    s.expire(3.0)
+    assert s.value(default=None) is None
+    s.push(4.0, 1)
+    s.clear()
+    assert s.value(default=-1) == -1
+
+
+def brute_crossings(history, now, window, deadband):
+    """Flip times of the whole history, then the ones inside the window."""
+    flips = []
+    sign = 0
+    for t, v in history:
+        s = 1 if v > deadband else (-1 if v < -deadband else 0)
+        if s != 0:
+            if sign != 0 and s != sign:
+                flips.append(t)
+            sign = s
+    return [t for t in flips if now - t <= window]
+
+
+@pytest.mark.parametrize("window", [0.5, 1.0, 4.0])
+@pytest.mark.parametrize("deadband", [0.0, 2.0])
+def test_zero_crossings_match_brute_force(window, deadband):
+    zc = ZeroCrossings(window, deadband)
+    history = []
+    n_flips = 0
+    for t, v in samples():
+        flipped = zc.push(t, v)
+        history.append((t, v))
+        flips = brute_crossings(history, t, window, deadband)
+        n_flips += flipped
+        assert zc.count == len(flips)
+        assert zc.rate() == pytest.approx(len(flips) / window)
+        if len(flips) >= 2:
+            span = flips[-1] - flips[0]
+            assert zc.cadence() == pytest.approx((len(flips) - 1) / span)
+        else:
+            assert zc.cadence() == 0.0
+    assert n_flips == len(brute_crossings(history, history[-1][0], math.inf, deadband))
+
+
+def test_zero_crossings_zero_and_deadband_keep_the_sign():
+    zc = ZeroCrossings(10.0, deadband=0.5)
+    assert not zc.push(0.0, 1.0)      # first sign is not a flip
+    assert not zc.push(0.1, 0.0)
+    assert not zc.push(0.2, -0.4)     # inside the deadband
+    assert zc.push(0.3, -0.6)
+    assert zc.sign == -1 and zc.count == 1
+
+
+def test_zero_crossings_eviction_at_window_edge():
+    zc = ZeroCrossings(1.0)
+    zc.push(0.0, 1)
+    zc.push(0.5, -1)                  # flip at 0.5
+    zc.push(1.0, 1)                   # flip at 1.0
+    zc.expire(1.5)
+    assert zc.count == 2              # 0.5 is exactly `window` old
+    zc.expire(1.625)
+    assert zc.count == 1
+    assert zc.cadence() == 0.0
+    zc.clear()
+    assert zc.count == 0 and zc.sign == 0
+
+
+def test_running_stats_match_two_pass():
+    values = [v + 1e6 for _, v in samples(200)]    # large offset: Welford stays exact
+    rs = RunningStats()
+    assert rs.var == 0.0 and rs.std == 0.0
+    for i, v in enumerate(values, 1):
+        rs.push(v)
+        seen = values[:i]
+        mean = sum(seen) / i
+        var = sum((x - mean) ** 2 for x in seen) / (i - 1) if i > 1 else 0.0
+        assert rs.n == i
+        assert rs.mean == pytest.approx(mean, rel=1e-12)
+        assert rs.var == pytest.approx(var, rel=1e-9, abs=1e-9)
+        assert rs.std == pytest.approx(math.sqrt(var), rel=1e-9, abs=1e-9)
+    rs.clear()
+    assert rs.n == 0 and rs.mean == 0.0 and rs.var == 0.0
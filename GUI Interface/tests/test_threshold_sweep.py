@@ -0,0 +1,31 @@
+from body_classifier import BodyClassifier
+from pose_recording import PoseRecorder
+from threshold_sweep import _valid, random_search, recorded_params
+
+
+def write_recording(path, **params):
+    with PoseRecorder(str(path), params=BodyClassifier(**params).params()):
+        pass
+    return str(path)
+
+
+def test_validity_uses_the_recorded_params(tmp_path):
+    # Recorded with YAW_OFF=0.12: the defaults (0.08/0.05) would pass YAW_ON=0.1
+    bases = recorded_params([write_recording(tmp_path / "a.posrec",
+                                             YAW_ON=0.15, YAW_OFF=0.12)])
+    assert bases[0]["YAW_OFF"] == 0.12
+    assert not _valid({"YAW_ON": 0.1}, bases)
+    assert _valid({"YAW_ON": 0.2}, bases)
+    assert _valid({}, bases)
+
+
+def test_candidate_must_fit_every_recording(tmp_path):
+    bases = recorded_params([write_recording(tmp_path / "a.posrec"),
+                             write_recording(tmp_path / "b.posrec",
+                                             YAW_ON=0.15, YAW_OFF=0.12)])
+    assert _valid({"YAW_ON": 0.1}, bases[:1])
+    assert not _valid({"YAW_ON": 0.1}, bases)
+
+    space = {"YAW_ON": (0.06, 0.2)}
+    for params in random_search(space, 20, bases):
+        assert params["YAW_ON"] > 0.12
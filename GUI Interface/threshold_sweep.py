@@ -0,0 +1,356 @@
+"""
+Offline tuning of the BodyClassifier thresholds over labeled recordings.
+
+Each recording (pose_recording.py) needs a label sidecar, by default
+<recording>.labels.csv, listing what the operator was actually doing:
+
+    start,end,label          # seconds from the first record
+    2.0,5.5,TURN_R
+    7.0,9.0,A
+    12.0,20.0,FWD
+
+Labels are classifier states (NEUTRAL, TURN_L, TURN_R, LEAN_L, LEAN_R,
+FWD, BACK) or gestures (A, B); frames outside every span count as NEUTRAL.
+
+Every parameter combination is replayed over all recordings on a process
+pool and scored on:
+  accuracy      frames whose R/L codes match the label
+  false/min     command onsets that the labels do not call for, per minute
+  latency       label start -> first matching frame, per labeled span
+  missed        labeled spans never recognized
+
+    python threshold_sweep.py s1.posrec s2.posrec --grid YAW_ON=0.06:0.12:4
+    python threshold_sweep.py s*.posrec --random 500 -j 8 --report sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from body_classifier import CODES, OUTPUTS, BodyClassifier
+from pose_recording import FLAG_CALIBRATING, PoseRecording, recording_features, replay
+
+# name -> (low, high) for random search; grid steps come from --grid
+DEFAULT_SPACE = {
+    "YAW_ON": (0.05, 0.14),
+    "YAW_OFF": (0.03, 0.10),
+    "ROLL_ON": (0.20, 0.50),
+    "ROLL_OFF": (0.12, 0.40),
+    "LEAN_ON": (0.08, 0.20),
+    "LEAN_OFF": (0.04, 0.15),
+    "WIP_MIN_FLIPS": (2, 5),
+    "WIP_AMP_ON": (0.10, 0.30),
+    "WIP_AMP_OFF": (0.06, 0.20),
+    "WIP_WINDOW_S": (0.8, 1.8),
+    "GESTURE_ON_MS": (150, 700),
+    "GESTURE_OFF_MS": (100, 400),
+    "STATE_ON_MS": (0, 200),
+    "STATE_OFF_MS": (0, 200),
+    "ELEV_UP_MIN": (0, 25),
+    "FWD_MIN": (10, 40),
+}
+
+# ON/OFF pairs: combinations with OFF >= ON have no hysteresis, skip them
+_HYSTERESIS = (("YAW_ON", "YAW_OFF"), ("ROLL_ON", "ROLL_OFF"),
+               ("LEAN_ON", "LEAN_OFF"), ("WIP_AMP_ON", "WIP_AMP_OFF"))
+
+LABEL_CODES = dict(zip(OUTPUTS, CODES))
+NEUTRAL_CODES = LABEL_CODES["NEUTRAL"]
+
+
+def load_labels(path):
+    """[(start_s, end_s, (codeL, codeR)), ...] from a label CSV."""
+    spans = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            label = row["label"].strip().upper()
+            if label not in LABEL_CODES:
+                raise ValueError(f"{path}: unknown label {row['label']!r}")
+            spans.append((float(row["start"]), float(row["end"]), LABEL_CODES[label]))
+    return spans
+
+
+class LabeledSession:
+    """A recording, its precomputed features and per-frame expected codes."""
+
+    def __init__(self, path, labels_path=None):
+        self.path = path
+        self.recording = PoseRecording(path)
+        rec = self.recording.records
+        self.t = rec["t"].tolist()
+        t0 = self.t[0] if self.t else 0.0
+
+        spans = load_labels(labels_path or path + ".labels.csv")
+        self.expected = []
+        for t in self.t:
+            rel = t - t0
+            codes = NEUTRAL_CODES
+            for start, end, c in spans:
+                if start <= rel < end:
+                    codes = c
+                    break
+            self.expected.append(codes)
+        self.scored = [not (fl & FLAG_CALIBRATING) for fl in rec["flags"].tolist()]
+
+        # Signs are not swept, so the features are shared by every combination
+        self.features = recording_features(self.recording,
+                                           BodyClassifier(**self.recording.params))
+
+    def evaluate(self, params):
+        """Score `params` on top of what the session was recorded with."""
+        predicted = [None] * len(self.t)
+
+        def on_step(i, codes):
+            predicted[i] = codes
+
+        replay(self.recording, BodyClassifier(**{**self.recording.params, **params}),
+               on_step=on_step, features=self.features)
+        return score(self.t, self.expected, predicted, self.scored)
+
+
+def score(t, expected, predicted, scored):
+    """Frame accuracy, false onsets, per-span latency and misses."""
+    frames = correct = false_onsets = 0
+    latencies = []
+    missed = spans = 0
+
+    prev_pred = NEUTRAL_CODES
+    span_codes, span_start, span_hit = None, 0.0, False
+    for i in range(len(t)):
+        if not scored[i]:
+            continue
+        exp, pred = expected[i], predicted[i]
+        frames += 1
+        correct += pred == exp
+
+        # A new non-neutral command the labels don't call for
+        if pred != prev_pred and pred != NEUTRAL_CODES and pred != exp:
+            false_onsets += 1
+        prev_pred = pred
+
+        # Labeled spans: time to first recognition
+        if exp != span_codes:
+            if span_codes not in (None, NEUTRAL_CODES):
+                spans += 1
+                missed += not span_hit
+            span_codes, span_start, span_hit = exp, t[i], False
+        if not span_hit and exp != NEUTRAL_CODES and pred == exp:
+            span_hit = True
+            latencies.append(t[i] - span_start)
+    if span_codes not in (None, NEUTRAL_CODES):
+        spans += 1
+        missed += not span_hit
+
+    duration = (t[-1] - t[0]) if len(t) > 1 else 0.0
+    return {
+        "frames": frames,
+        "correct": correct,
+        "false_onsets": false_onsets,
+        "duration_s": duration,
+        "latencies": latencies,
+        "spans": spans,
+        "missed": missed,
+    }
+
+
+def combine(parts):
+    """Merge per-session scores into the report metrics."""
+    frames = sum(p["frames"] for p in parts)
+    minutes = sum(p["duration_s"] for p in parts) / 60.0
+    lat = sorted(x for p in parts for x in p["latencies"])
+    spans = sum(p["spans"] for p in parts)
+    missed = sum(p["missed"] for p in parts)
+    return {
+        "accuracy": sum(p["correct"] for p in parts) / frames if frames else 0.0,
+        "false_per_min": sum(p["false_onsets"] for p in parts) / minutes if minutes else 0.0,
+        "latency_ms": 1000.0 * sum(lat) / len(lat) if lat else float("nan"),
+        "latency_p90_ms": 1000.0 * lat[int(0.9 * (len(lat) - 1))] if lat else float("nan"),
+        "missed": missed,
+        "spans": spans,
+    }
+
+
+def objective(m, w_false=0.02, w_latency=0.0002, w_missed=0.5):
+    """Single ranking score: accuracy minus penalties (higher is better)."""
+    miss_rate = m["missed"] / m["spans"] if m["spans"] else 0.0
+    latency = m["latency_ms"] if m["latency_ms"] == m["latency_ms"] else 1000.0
+    return m["accuracy"] - w_false * m["false_per_min"] - w_latency * latency - w_missed * miss_rate
+
+
+# ================================================================
+# Process pool
+# ================================================================
+_sessions = None
+
+
+def _init_worker(items):
+    global _sessions
+    _sessions = [LabeledSession(path, labels) for path, labels in items]
+
+
+def _evaluate(params):
+    m = combine([s.evaluate(params) for s in _sessions])
+    m["score"] = objective(m)
+    return params, m
+
+
+def _valid(params, bases):
+    """
+    Keeps hysteresis on every ON/OFF pair once `params` is laid over each
+    recording's params (`bases`), which is what LabeledSession.evaluate runs.
+    """
+    for base in bases:
+        for on, off in _HYSTERESIS:
+            if params.get(off, base[off]) >= params.get(on, base[on]):
+                return False
+    return True
+
+
+def recorded_params(paths):
+    """Each recording's classifier params, defaults filled in."""
+    defaults = BodyClassifier.defaults()
+    return [{**defaults, **PoseRecording(path).params} for path in paths]
+
+
+def _num(v):
+    for conv in (int, float):
+        try:
+            return conv(v)
+        except ValueError:
+            pass
+    return v.strip()            # e.g. SMOOTHER=ema,one_euro
+
+
+def _values(spec):
+    """'a,b,c' or 'lo:hi:steps' -> list of values (ints stay ints)."""
+    num = _num
+    if ":" in spec:
+        lo, hi, steps = spec.split(":")
+        lo, hi, steps = num(lo), num(hi), int(steps)
+        if steps < 2:
+            return [lo]
+        vals = [lo + (hi - lo) * k / (steps - 1) for k in range(steps)]
+        if isinstance(lo, int) and isinstance(hi, int):
+            vals = sorted({round(v) for v in vals})
+        else:
+            vals = [round(v, 6) for v in vals]
+        return vals
+    return [num(v) for v in spec.split(",")]
+
+
+def grid(specs):
+    names = list(specs)
+    for combo in itertools.product(*(specs[n] for n in names)):
+        yield dict(zip(names, combo))
+
+
+def random_search(space, n, bases, seed=0):
+    """n valid combinations over `bases` (resampling the ones without hysteresis)."""
+    rng = random.Random(seed)
+    found = 0
+    for _ in range(n * 100):
+        params = {}
+        for name, (lo, hi) in space.items():
+            if isinstance(lo, int) and isinstance(hi, int):
+                params[name] = rng.randint(lo, hi)
+            else:
+                params[name] = round(rng.uniform(lo, hi), 4)
+        if _valid(params, bases):
+            yield params
+            found += 1
+            if found == n:
+                return
+
+
+def write_report(path, ranked):
+    names = sorted({k for params, _ in ranked for k in params})
+    cols = ["rank", "score", "accuracy", "false_per_min", "latency_ms",
+            "latency_p90_ms", "missed", "spans"]
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(cols + names)
+        for rank, (params, m) in enumerate(ranked, 1):
+            w.writerow([rank] + [round(m[c], 6) if isinstance(m[c], float) else m[c]
+                                 for c in cols[1:]]
+                       + [params.get(n, "") for n in names])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="sweep classifier thresholds over labeled recordings")
+    ap.add_argument("recordings", nargs="+")
+    ap.add_argument("--labels", action="append", default=None,
+                    help="label CSV per recording (default: <recording>.labels.csv)")
+    ap.add_argument("--grid", action="append", default=[], metavar="NAME=SPEC",
+                    help="grid axis: NAME=a,b,c or NAME=lo:hi:steps")
+    ap.add_argument("--random", type=int, default=0, metavar="N",
+                    help="N random combinations over the default ranges")
+    ap.add_argument("--param", action="append", default=[], metavar="NAME=LO:HI",
+                    help="restrict the random search to these ranges")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    ap.add_argument("--report", default="sweep_report.csv")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    if args.labels and len(args.labels) != len(args.recordings):
+        ap.error("give one --labels per recording")
+    items = list(zip(args.recordings, args.labels or [None] * len(args.recordings)))
+
+    known = BodyClassifier.defaults()
+    bases = recorded_params(args.recordings)
+    if args.grid:
+        specs = {}
+        for item in args.grid:
+            name, _, spec = item.partition("=")
+            if name not in known:
+                ap.error(f"unknown parameter {name}")
+            specs[name] = _values(spec)
+        candidates = grid(specs)
+    elif args.random:
+        space = dict(DEFAULT_SPACE)
+        if args.param:
+            space = {}
+            for item in args.param:
+                name, _, spec = item.partition("=")
+                if name not in known:
+                    ap.error(f"unknown parameter {name}")
+                lo, hi = _values(spec.replace(":", ","))
+                space[name] = (lo, hi)
+        candidates = random_search(space, args.random, bases, args.seed)
+    else:
+        ap.error("give --grid axes or --random N")
+
+    # Baseline (each session as recorded) is always scored for reference
+    candidates = [{}] + [p for p in candidates if _valid(p, bases)]
+    print(f"[SWEEP] {len(candidates)} combinations x {len(items)} recordings, "
+          f"{args.jobs} processes")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                             initargs=(items,)) as pool:
+        chunk = max(1, len(candidates) // (4 * (args.jobs or 1)))
+        results = list(pool.map(_evaluate, candidates, chunksize=chunk))
+    elapsed = time.perf_counter() - t0
+
+    ranked = sorted(results, key=lambda r: r[1]["score"], reverse=True)
+    write_report(args.report, ranked)
+
+    base = next(m for p, m in results if not p)
+    print(f"[SWEEP] done in {elapsed:.1f} s, report: {args.report}")
+    print(f"[SWEEP] as recorded: score={base['score']:.4f}  acc={base['accuracy']:.3f}  "
+          f"false/min={base['false_per_min']:.2f}  latency={base['latency_ms']:.0f} ms  "
+          f"missed={base['missed']}/{base['spans']}")
+    for rank, (params, m) in enumerate(ranked[:args.top], 1):
+        desc = " ".join(f"{k}={v}" for k, v in params.items()) or "(as recorded)"
+        print(f"[SWEEP] #{rank:<3} score={m['score']:.4f}  acc={m['accuracy']:.3f}  "
+              f"false/min={m['false_per_min']:.2f}  latency={m['latency_ms']:.0f} ms  "
+              f"missed={m['missed']}/{m['spans']}  {desc}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())